@@ -0,0 +1,52 @@
+"""Compares two benchmark reports.
+
+    python -m benchmarks.compare baseline.json current.json
+
+Prints the median time of every benchmark in both reports and their ratio.
+Exits with status 1 when one got slower than ``--threshold``.
+"""
+
+import argparse
+import sys
+
+from json import load
+
+
+def loadResults(path: str) -> dict:
+    with open(path) as f:
+        report = load(f)
+    return {
+        (r["name"], r["sizeName"], r["size"]): r["median"] for r in report["results"]
+    }
+
+
+def compare(baseline: dict, current: dict) -> list[tuple]:
+    rows = []
+    for key in baseline.keys() & current.keys():
+        rows.append((*key, baseline[key], current[key], current[key] / baseline[key]))
+    return sorted(rows)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Compares two benchmark reports")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument(
+        "--threshold", type=float, default=1.2, help="slowdown ratio to fail on"
+    )
+    args = parser.parse_args(argv)
+    rows = compare(loadResults(args.baseline), loadResults(args.current))
+    print(f"{'benchmark':<40}{'size':>16}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    slower = False
+    for name, sizeName, size, before, after, ratio in rows:
+        flag = " !" if ratio > args.threshold else ""
+        slower = slower or bool(flag)
+        print(
+            f"{name:<40}{f'{sizeName}={size}':>16}"
+            f"{before * 1000:>10.3f}ms{after * 1000:>10.3f}ms{ratio:>8.2f}{flag}"
+        )
+    sys.exit(1 if slower else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Benchmarks of the datatypes hot paths.
+
+Run from the repository root::
+
+    python -m benchmarks.datatypes --output benchmarks/results/current.json
+
+Inputs are synthetic and seeded, so two runs time the same work. Compare two
+reports with ``python -m benchmarks.compare``.
+"""
+
+import argparse
+import os
+
+from json import dump
+
+import numpy as np
+import pandas
+
+from benchmarks.harness import Benchmark, run
+from src.utils.database import getDataframe
+from src.utils.datatypes import (
+    Analyse,
+    AnalyseData,
+    BackgroundProfile,
+    Calibration,
+    Method,
+)
+from src.utils.paths import resourcePath
+from src.utils.synthetic import (
+    calibrationLines,
+    syntheticAnalyse,
+    syntheticCalibrations,
+)
+
+SEED = 20240601
+ELEMENTS = [4, 16, 48]
+CHANNELS = [2048, 8192, 32768]
+
+
+def benchmarkElements(count: int) -> list[str]:
+    """``count`` elements spread over the periodic table, from Na up."""
+    lines = getDataframe("Lines")
+    mask = (lines["atomic_number"] >= 11) & lines["radiation_type"].isin(["Ka", "La"])
+    symbols = lines.loc[mask, "symbol"].unique()
+    indexes = np.linspace(0, len(symbols) - 1, min(count, len(symbols)))
+    return [str(symbols[int(i)]) for i in np.round(indexes)]
+
+
+def savedMethod(count: int) -> Method:
+    """Saves ``count`` calibrations and returns the method built from them."""
+    elements = benchmarkElements(count)
+    calibrations = syntheticCalibrations(elements, np.random.default_rng(SEED))
+    for calibration in calibrations:
+        calibration.save()
+    table = pandas.DataFrame(
+        {
+            "calibration_id": [c.calibrationId for c in calibrations],
+            "filename": [c.filename for c in calibrations],
+            "element": [c.element for c in calibrations],
+            "concentration": [c.concentrations[c.element] for c in calibrations],
+            "state": [c.state for c in calibrations],
+        }
+    )
+    return Method(
+        1, f"BENCH{count}", calibrations=table, lines=calibrationLines(elements)
+    )
+
+
+def scaledSpectra(channels: int) -> Analyse:
+    """Synthetic analyse resampled to ``channels`` channels per condition."""
+    analyse = syntheticAnalyse("spectra", rng=np.random.default_rng(SEED))
+    for i, d in enumerate(analyse.data):
+        x = np.linspace(0, d.y.size - 1, channels)
+        y = np.interp(x, np.arange(d.y.size), d.y).round().astype(np.int64)
+        analyse.data[i] = AnalyseData(d.conditionId, y)
+    return analyse
+
+
+def setupCalibrationFromFile(count: int):
+    method = savedMethod(count)
+    filename = method.calibrations["filename"].iloc[-1]
+    path = resourcePath(f"calibrations/{filename}.atxc")
+    return lambda: Calibration.fromATXCFile(path)
+
+
+def setupMethodInit(count: int):
+    method = savedMethod(count)
+    return lambda: Method(
+        method.methodId,
+        method.filename,
+        calibrations=method.calibrations.copy(),
+        lines=method.lines.copy(),
+    )
+
+
+def setupMethodSave(count: int):
+    return savedMethod(count).save
+
+
+def setupConcentrations(count: int):
+    method = savedMethod(count)
+    elements = benchmarkElements(count)
+    analyse = syntheticAnalyse("sample", elements, rng=np.random.default_rng(SEED + 1))
+
+    def calculateConcentrations():
+        # Every call sums the regions again, as for a new analyse
+        for d in analyse.data:
+            d.clearIntensities()
+        return analyse.calculateConcentrations(method)
+
+    return calculateConcentrations
+
+
+def setupBackgroundProfile(channels: int):
+    analyse = scaledSpectra(channels)
+    profile = BackgroundProfile(1, "bench", "", smoothness=1.0, prominence="10")
+
+    def applyBackgroundProfile():
+        for d in analyse.data:
+            d.applyBackgroundProfile(profile)
+
+    return applyBackgroundProfile
+
+
+def setupFromJsonTXT(channels: int):
+    path = resourcePath(f"analysis/json-{channels}.txt")
+    scaledSpectra(channels).saveTo(path)
+    return lambda: Analyse.fromTXTFile(path)
+
+
+def setupFromInstrumentTXT(channels: int):
+    # Format written by the instrument, one count per line and condition block
+    path = resourcePath(f"analysis/instrument-{channels}.txt")
+    with open(path, "w") as f:
+        for d in scaledSpectra(channels).data:
+            f.write(f"<<Data>>\nCondition {d.conditionId}\n")
+            f.write("\n".join(str(count) for count in d.y))
+            f.write("\n<<EndData>>\n")
+    return lambda: Analyse.fromTXTFile(path)
+
+
+def setupIntensities(channels: int):
+    data = scaledSpectra(channels).data
+    lines = getDataframe("Lines")
+
+    def calculateIntensities():
+        for d in data:
+            d.clearIntensities()
+        return [d.calculateIntensities(lines) for d in data]
+
+    return calculateIntensities
+
+
+def setupCachedIntensities(channels: int):
+    data = scaledSpectra(channels).data
+    lines = getDataframe("Lines")
+    for d in data:
+        d.calculateIntensities(lines)
+    return lambda: [d.calculateIntensities(lines) for d in data]
+
+
+BENCHMARKS = [
+    Benchmark(
+        "Calibration.fromATXCFile", setupCalibrationFromFile, "elements", ELEMENTS
+    ),
+    Benchmark("Method.__post_init__", setupMethodInit, "elements", ELEMENTS),
+    Benchmark("Method.save", setupMethodSave, "elements", ELEMENTS),
+    Benchmark(
+        "Analyse.calculateConcentrations", setupConcentrations, "elements", ELEMENTS
+    ),
+    Benchmark(
+        "AnalyseData.applyBackgroundProfile",
+        setupBackgroundProfile,
+        "channels",
+        CHANNELS,
+    ),
+    Benchmark("Analyse.fromTXTFile[json]", setupFromJsonTXT, "channels", CHANNELS),
+    Benchmark(
+        "Analyse.fromTXTFile[instrument]", setupFromInstrumentTXT, "channels", CHANNELS
+    ),
+    Benchmark(
+        "AnalyseData.calculateIntensities", setupIntensities, "channels", CHANNELS
+    ),
+    Benchmark(
+        "AnalyseData.calculateIntensities[cached]",
+        setupCachedIntensities,
+        "channels",
+        CHANNELS,
+    ),
+]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Times the datatypes hot paths")
+    parser.add_argument("--output", help="JSON report path")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", dest="minTime", type=float, default=0.2)
+    parser.add_argument("--select", help="only run benchmarks containing this")
+    args = parser.parse_args(argv)
+    report = run(BENCHMARKS, args.repeat, args.minTime, args.select)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable
+
+import numpy as np
+import pandas
+import scipy
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class Benchmark:
+    """A timed call, ``setup(size)`` returns the zero-argument call to time."""
+
+    name: str
+    setup: Callable[[int], Callable[[], object]]
+    sizeName: str
+    sizes: list[int]
+
+
+@dataclass
+class Result:
+    name: str
+    sizeName: str
+    size: int
+    number: int
+    times: list[float] = field(default_factory=list)
+
+    def toHashableDict(self) -> dict:
+        return {
+            "name": self.name,
+            "sizeName": self.sizeName,
+            "size": self.size,
+            "number": self.number,
+            "repeat": len(self.times),
+            "min": min(self.times),
+            "median": statistics.median(self.times),
+            "mean": statistics.fmean(self.times),
+            "stdev": statistics.stdev(self.times) if len(self.times) > 1 else 0.0,
+        }
+
+
+def measure(
+    name: str,
+    sizeName: str,
+    size: int,
+    function: Callable[[], object],
+    repeat: int = 5,
+    minTime: float = 0.2,
+) -> Result:
+    """Times ``function`` like ``timeit``, results are seconds per call.
+
+    Each of the ``repeat`` rounds calls the function as many times as needed
+    to last at least ``minTime``, so fast calls are not lost in timer noise.
+    """
+    timer = timeit.Timer(function)
+    number = 1
+    while (elapsed := timer.timeit(number)) < minTime and number < 10**6:
+        number *= max(2, min(10, int(minTime / max(elapsed, 1e-9))))
+    times = [elapsed / number]
+    times += [t / number for t in timer.repeat(repeat - 1, number)]
+    return Result(name, sizeName, size, number, times)
+
+
+@contextmanager
+def workspace():
+    """Runs in a temporary resource directory so no real file is overwritten.
+
+    ``resourcePath`` resolves against the working directory, the database is
+    already loaded from the repository when this is entered.
+    """
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="xrf-bench-") as directory:
+        shutil.copy(os.path.join(REPO, "secret.key"), directory)
+        for folder in ["calibrations", "methods", "backgrounds", "analysis"]:
+            os.makedirs(os.path.join(directory, folder))
+        os.chdir(directory)
+        try:
+            yield directory
+        finally:
+            os.chdir(previous)
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pandas.__version__,
+        "scipy": scipy.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run(
+    benchmarks: list[Benchmark],
+    repeat: int = 5,
+    minTime: float = 0.2,
+    select: str | None = None,
+    log: Callable[[str], None] = print,
+) -> dict:
+    """Runs every benchmark at each of its sizes and returns the report."""
+    results = []
+    start = time.perf_counter()
+    with workspace():
+        for benchmark in benchmarks:
+            if select and select not in benchmark.name:
+                continue
+            for size in benchmark.sizes:
+                function = benchmark.setup(size)
+                result = measure(
+                    benchmark.name, benchmark.sizeName, size, function, repeat, minTime
+                )
+                stats = result.toHashableDict()
+                log(
+                    f"{benchmark.name:<40} {benchmark.sizeName}={size:<6} "
+                    f"{stats['median'] * 1000:>10.3f} ms"
+                )
+                results.append(stats)
+    return {
+        "environment": environment(),
+        "elapsed": time.perf_counter() - start,
+        "results": results,
+    }
@@ -0,0 +1,468 @@
+import argparse
+import asyncio
+import itertools
+import logging
+import time
+
+from dataclasses import dataclass, field
+from json import dumps
+
+import numpy as np
+
+from src.utils import protocol
+from src.utils.datatypes import Analyse
+from src.utils.synthetic import syntheticAnalyse
+
+COMMANDS = ["-opn", "-chk", "-met", "-als", "-cal", "-qnt"]
+PERCENTILES = [50, 95, 99]
+# Text commands whose JSON payload ends with the stop marker
+MARKED_COMMANDS = ["-als", "-cal", "-qnt"]
+# Seconds to wait for a text -met reply, none comes for an unknown method
+METHOD_TIMEOUT = 0.5
+
+
+class ReplyError(Exception):
+    """Raised when the server replies something the protocol does not expect."""
+
+
+def analysePayload(analyse: Analyse, binary: bool = True, **metadata) -> bytes:
+    """Encodes an analyse for ``-als``, ``-cal`` or ``-qnt`` with ``metadata``."""
+    if binary:
+        return analyse.toBinary(**metadata)
+    return dumps({**metadata, **analyse.toHashableDict()}).encode("utf-8")
+
+
+class InstrumentClient:
+    """Stand-in for the VB front end on one connection.
+
+    With binary frames every request gets a fresh request id, so any number
+    of requests can be in progress on the connection and their replies come
+    back in any order. The text protocol answers one command at a time:
+    JSON payloads end with ``-stp`` and replies are not framed.
+
+    Args:
+        host: Server address.
+        port: Server port.
+        binary: Use binary frames, the text protocol if False.
+    """
+
+    def __init__(self, host: str, port: int, binary: bool = True) -> None:
+        self.host = host
+        self.port = port
+        self.binary = binary
+        self._reader = None
+        self._writer = None
+        self._readTask = None
+        self._textLock = asyncio.Lock()
+        self._pending = {}
+        self._requestIds = itertools.count(1)
+
+    async def connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(
+            self.host, self.port, limit=2**26
+        )
+        if self.binary:
+            self._readTask = asyncio.create_task(self._readReplies())
+
+    async def close(self) -> None:
+        if self._writer is None:
+            return
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        if self._readTask is not None:
+            self._readTask.cancel()
+            await asyncio.gather(self._readTask, return_exceptions=True)
+        self._writer = None
+
+    async def __aenter__(self) -> "InstrumentClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _readReplies(self) -> None:
+        try:
+            while True:
+                frame = await protocol.readFrameAsync(self._reader)
+                future = self._pending.pop(frame.requestId, None)
+                if future is not None and not future.done():
+                    future.set_result(frame)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            error = ConnectionError(f"Connection closed by the server: {e}")
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    async def request(self, command: str, payload: bytes | str = b"") -> protocol.Frame:
+        """Sends a frame and returns the server's reply to it.
+
+        Raises:
+            ReplyError: If the server replies with ``-err``.
+        """
+        requestId = next(self._requestIds)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[requestId] = future
+        self._writer.writelines(protocol.frameBytes(command, requestId, payload))
+        await self._writer.drain()
+        frame = await future
+        if frame.command == "-err":
+            raise ReplyError(f"{command} failed: {frame.text()}")
+        return frame
+
+    async def _textRequest(self, command: str, payload: bytes | str = b"") -> bytes:
+        """Sends a text command and returns the server's reply, maybe empty.
+
+        Text replies are not framed and some commands get none, so a ``-chk``
+        is sent behind the command: the reply ends where its status starts.
+        The server reads the name of a ``-met`` with whatever follows it, so
+        that ``-chk`` waits for the first bytes of the reply, or for
+        ``METHOD_TIMEOUT`` when the method is unknown.
+        """
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        peer = self._writer.get_extra_info("peername")
+        status = f"Server is running on {peer}".encode("utf-8")
+        async with self._textLock:
+            data = [command.encode("ascii"), payload]
+            if command in MARKED_COMMANDS:
+                data.append(protocol.STOP_MARKER)
+            self._writer.writelines(d for d in data if len(d))
+            await self._writer.drain()
+            if command == "-chk":
+                return await self._reader.readuntil(status)
+            received = b""
+            if command == "-met":
+                try:
+                    received = await asyncio.wait_for(
+                        self._reader.read(protocol.PEEK_SIZE), METHOD_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            self._writer.write(b"-chk")
+            await self._writer.drain()
+            received += await self._reader.readuntil(status)
+        return received[: -len(status)]
+
+    async def expect(
+        self, command: str, reply: str, payload: bytes | str = b""
+    ) -> protocol.Frame:
+        """Sends a request and returns its reply, a frame of ``reply``."""
+        if not self.binary:
+            received = await self._textRequest(command, payload)
+            return protocol.Frame(reply, 0, memoryview(received))
+        frame = await self.request(command, payload)
+        if frame.command != reply:
+            raise ReplyError(f"{command} got {frame.command}, expected {reply}")
+        return frame
+
+    async def openGui(self) -> None:
+        await self.expect("-opn", "-ack")
+
+    async def check(self) -> str:
+        return (await self.expect("-chk", "-chk")).text()
+
+    async def method(self, methodName: str) -> str:
+        text = (await self.expect("-met", "-met", methodName)).text()
+        if not text:
+            raise ReplyError(f"Unknown method: {methodName}")
+        return text
+
+    async def addAnalyse(self, analyse: Analyse | bytes) -> None:
+        """Adds an analyse, with the text protocol once the server queued it."""
+        if isinstance(analyse, Analyse):
+            analyse = analysePayload(analyse, self.binary)
+        await self.expect("-als", "-ack", analyse)
+
+    async def addCalibration(self, analyse: Analyse | bytes) -> None:
+        if isinstance(analyse, Analyse):
+            analyse = analysePayload(analyse, self.binary)
+        await self.expect("-cal", "-ack", analyse)
+
+    async def quantify(self, analyse: Analyse | bytes, methodName: str = "") -> dict:
+        if isinstance(analyse, Analyse):
+            analyse = analysePayload(analyse, self.binary, method=methodName)
+        result = (await self.expect("-qnt", "-qnt", analyse)).json()
+        if "error" in result:
+            raise ReplyError(f"-qnt failed: {result['error']}")
+        return result
+
+    async def exitApplication(self) -> None:
+        """Sends -ext, which has no reply.
+
+        With the text protocol, returns once the server closed the connection.
+        """
+        if self.binary:
+            self._writer.writelines(
+                protocol.frameBytes("-ext", next(self._requestIds))
+            )
+            await self._writer.drain()
+            return
+        async with self._textLock:
+            self._writer.write(b"-ext")
+            await self._writer.drain()
+            await self._reader.read()
+
+
+@dataclass
+class CommandStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def toHashableDict(self, elapsed: float) -> dict:
+        latencies = np.asarray(self.latencies) * 1000
+        stats = {
+            "count": len(latencies),
+            "errors": self.errors,
+            "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        }
+        if len(latencies):
+            stats["mean"] = float(latencies.mean())
+            stats["max"] = float(latencies.max())
+            for q, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES)):
+                stats[f"p{q}"] = float(value)
+        return stats
+
+
+class LoadGenerator:
+    """Drives a server with a weighted mix of commands and measures latency.
+
+    Requests are spread over ``connections`` clients with ``concurrency``
+    requests in progress at once. With a ``rate`` the requests are scheduled
+    at fixed intervals and latency is measured from the scheduled time, so a
+    slow server shows up in the latency instead of silently lowering the
+    rate. Without one, every slot sends its next request as soon as the
+    previous one is answered.
+
+    Spectra are generated once, ``analyses`` of them, and reused. ``-cal``
+    overwrites the calibration files named in ``calibrations``, so only use
+    it against a test installation.
+
+    Args:
+        host: Server address.
+        port: Server port.
+        mix: Relative weight of each command.
+        connections: Client connections to open.
+        concurrency: Requests in progress at once, over all connections.
+        rate: Requests per second, None to send as fast as possible.
+        duration: Seconds to run for.
+        requests: Stop after this many requests instead.
+        methodName: Method for ``-met`` and ``-qnt``.
+        calibrations: Calibration filenames sent with ``-cal``.
+        analyses: Distinct synthetic analyses to send.
+        seed: Seed of the command choice and the spectra.
+        binary: Use binary frames, the text protocol if False.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        mix: dict[str, float] | None = None,
+        connections: int = 1,
+        concurrency: int = 4,
+        rate: float | None = None,
+        duration: float = 10.0,
+        requests: int | None = None,
+        methodName: str | None = None,
+        calibrations: list[str] | None = None,
+        analyses: int = 8,
+        seed: int = 0,
+        binary: bool = True,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.mix = mix or {"-chk": 1, "-als": 1}
+        unknown = set(self.mix) - set(COMMANDS)
+        if unknown:
+            raise ValueError(f"Unknown commands in mix: {sorted(unknown)}")
+        if methodName is None and {"-met", "-qnt"} & set(self.mix):
+            raise ValueError("-met and -qnt need a method name")
+        if not calibrations and "-cal" in self.mix:
+            raise ValueError("-cal needs calibration filenames")
+        self.connections = connections
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.requests = requests
+        self.methodName = methodName
+        self.calibrations = calibrations or []
+        self.analyses = analyses
+        self.seed = seed
+        self.binary = binary
+        self._stats = {}
+        self._counter = None
+        self._start = 0.0
+
+    def _payloads(self) -> dict[str, list[bytes]]:
+        rng = np.random.default_rng(self.seed)
+        payloads = {"-als": [], "-cal": [], "-qnt": []}
+        for i in range(self.analyses):
+            analyse = syntheticAnalyse(f"loadgen-{i}", rng=rng)
+            payloads["-als"].append(analysePayload(analyse, self.binary))
+            payloads["-qnt"].append(
+                analysePayload(analyse, self.binary, method=self.methodName)
+            )
+        for filename in self.calibrations:
+            analyse = syntheticAnalyse(filename, rng=rng)
+            payloads["-cal"].append(analysePayload(analyse, self.binary))
+        return payloads
+
+    def _call(self, client: InstrumentClient, command: str, payload: bytes | None):
+        if command == "-opn":
+            return client.openGui()
+        if command == "-chk":
+            return client.check()
+        if command == "-met":
+            return client.method(self.methodName)
+        if command == "-als":
+            return client.addAnalyse(payload)
+        if command == "-cal":
+            return client.addCalibration(payload)
+        return client.quantify(payload)
+
+    def _nextRequest(self) -> int | None:
+        index = next(self._counter)
+        if self.requests is not None and index >= self.requests:
+            return None
+        if self.requests is None and time.perf_counter() - self._start > self.duration:
+            return None
+        return index
+
+    async def _slot(
+        self,
+        client: InstrumentClient,
+        commands: list[str],
+        payloads: dict[str, list[bytes]],
+    ) -> None:
+        while (index := self._nextRequest()) is not None:
+            command = commands[index % len(commands)]
+            if self.rate:
+                scheduled = self._start + index / self.rate
+                if (delay := scheduled - time.perf_counter()) > 0:
+                    await asyncio.sleep(delay)
+                if self.requests is None and scheduled - self._start > self.duration:
+                    return
+            else:
+                scheduled = time.perf_counter()
+            choices = payloads.get(command) or [None]
+            payload = choices[index % len(choices)]
+            stats = self._stats.setdefault(command, CommandStats())
+            try:
+                await self._call(client, command, payload)
+            except (ReplyError, ValueError) as e:
+                stats.errors += 1
+                logging.warning(f"Request {index} ({command}): {e}")
+                continue
+            stats.latencies.append(time.perf_counter() - scheduled)
+
+    def _commands(self) -> list[str]:
+        # Drawn upfront so sending never waits on it, reused past the end
+        count = self.requests or int((self.rate or 10_000) * self.duration) + 1
+        names = list(self.mix)
+        weights = np.asarray([self.mix[n] for n in names], dtype=np.float64)
+        rng = np.random.default_rng(self.seed)
+        drawn = rng.choice(len(names), count, p=weights / weights.sum())
+        return [names[i] for i in drawn]
+
+    async def run(self) -> dict:
+        """Runs the load and returns the report of every command."""
+        payloads = self._payloads()
+        commands = self._commands()
+        clients = [
+            InstrumentClient(self.host, self.port, self.binary)
+            for _ in range(self.connections)
+        ]
+        await asyncio.gather(*(client.connect() for client in clients))
+        self._stats = {}
+        self._counter = itertools.count()
+        self._start = time.perf_counter()
+        try:
+            await asyncio.gather(
+                *(
+                    self._slot(clients[i % len(clients)], commands, payloads)
+                    for i in range(self.concurrency)
+                )
+            )
+        finally:
+            elapsed = time.perf_counter() - self._start
+            await asyncio.gather(*(client.close() for client in clients))
+        total = CommandStats()
+        for stats in self._stats.values():
+            total.latencies += stats.latencies
+            total.errors += stats.errors
+        return {
+            "elapsed": elapsed,
+            "commands": {
+                command: stats.toHashableDict(elapsed)
+                for command, stats in sorted(self._stats.items())
+            },
+            "total": total.toHashableDict(elapsed),
+        }
+
+
+def formatReport(report: dict) -> str:
+    columns = ["count", "errors", "throughput", "mean"]
+    columns += [f"p{q}" for q in PERCENTILES] + ["max"]
+    lines = [f"{'command':<8}" + "".join(f"{c:>12}" for c in columns)]
+    rows = [*report["commands"].items(), ("total", report["total"])]
+    for command, stats in rows:
+        cells = []
+        for column in columns:
+            value = stats.get(column)
+            if value is None:
+                cells.append(f"{'-':>12}")
+            elif isinstance(value, int):
+                cells.append(f"{value:>12}")
+            else:
+                cells.append(f"{value:>12.2f}")
+        lines.append(f"{command:<8}" + "".join(cells))
+    lines.append(
+        f"Elapsed {report['elapsed']:.2f} s, throughput in requests/s, latency in ms"
+    )
+    return "\n".join(lines)
+
+
+def parseMix(text: str) -> dict[str, float]:
+    """Parses ``-chk=1,-als=2`` into command weights."""
+    mix = {}
+    for item in text.split(","):
+        command, _, weight = item.partition("=")
+        mix[command.strip()] = float(weight) if weight else 1.0
+    return mix
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Stand-in instrument client and socket load generator"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=16000)
+    parser.add_argument(
+        "--mix", type=parseMix, default="-chk=1,-als=1", help="e.g. -chk=1,-als=2"
+    )
+    parser.add_argument("--connections", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, help="requests/s, default unbounded")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--requests", type=int, help="stop after this many")
+    parser.add_argument("--method", dest="methodName")
+    parser.add_argument("--calibrations", type=lambda s: s.split(","))
+    parser.add_argument("--analyses", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--text", dest="binary", action="store_false", help="use the text protocol"
+    )
+    parser.add_argument("--json", action="store_true", help="print the raw report")
+    args = vars(parser.parse_args(argv))
+    asJson = args.pop("json")
+    report = asyncio.run(LoadGenerator(**args).run())
+    print(dumps(report, indent=2) if asJson else formatReport(report))
+
+
+if __name__ == "__main__":
+    main()
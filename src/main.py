@@ -1,28 +1,23 @@
 import logging
 import os
-import socket
 import sys
-import threading
 
 from PyQt6 import QtWidgets, QtGui
 
-from src.controllers import GuiHandler, ClientHandler
+from src.controllers import GuiHandler
+from src.server import QuantificationServer
 from src.utils.paths import resourcePath
 from src.views.windows.mainwindow import MainWindow
 
 
 def connectServerAndGUI(
     host, port, mainWindow: MainWindow, app: QtWidgets.QApplication
-) -> None:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind((host, port))
-        s.listen(1)
-        logging.info(f"Server listening on {host}:{port}")
-        conn, addr = s.accept()
-        logging.info(f"Connected to {addr}")
-        guiHandler = GuiHandler(mainWindow)
-        clientHandler = ClientHandler(conn, guiHandler, app)
-        threading.Thread(target=clientHandler.handleClient).start()
+) -> QuantificationServer:
+    guiHandler = GuiHandler(mainWindow)
+    server = QuantificationServer(host, port, guiHandler, app)
+    server.start()
+    app.aboutToQuit.connect(server.stop)
+    return server
 
 
 def main() -> None:
@@ -0,0 +1,369 @@
+import asyncio
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from json import dumps
+
+from src.utils import profiling, protocol, workers
+from src.utils.database import getDatabase
+from src.utils.datatypes import Analyse
+from src.utils.registry import getMethodRegistry
+
+HELP_TEXT = {
+    "-opn": "Opens the GUI window",
+    "-cls": "Closes (hides) the GUI window",
+    "-chk": "Checks and sends server status",
+    "-als": "Adds a new analysis",
+    "-cal": "Adds a new calibration",
+    "-ext": "Exits the application",
+    "-met": "Handles method requests from the client",
+    "-qnt": "Quantifies an analysis with a method and replies the concentrations",
+    "-sts": "Sends the worker queue depth and stage timings",
+    "-hlp": "Shows this help message",
+}
+# Spectra sent with the text protocol are a single JSON line of a few 100 kB
+STREAM_LIMIT = 64 * 1024 * 1024
+
+
+class QuantificationServer:
+    """Serves the instrument socket API to any number of clients.
+
+    The server runs its own asyncio loop in a background thread, so the Qt
+    event loop stays on the main thread. Parsing, saving, calibration
+    recomputes and quantification are queued to a ``WorkerPool`` of
+    processes; lighter work runs in a thread executor. Each connection answers text commands in order and
+    keeps up to ``maxInFlight`` binary frames in progress. Once that limit is
+    reached it stops reading, so a fast client is slowed down by TCP flow
+    control instead of filling memory. Writes wait on ``drain`` for the same
+    reason.
+
+    Args:
+        host: Interface to bind.
+        port: Port to bind, 0 picks a free one (see ``address``).
+        guiHandler: Receives the GUI signals, None when running headless.
+        app: Application to exit on ``-ext``.
+        maxWorkers: Executor threads.
+        maxInFlight: Binary frames processed at once per connection.
+        processes: Worker processes, defaults to the CPU count.
+        queueSize: Jobs waiting for a worker before clients are held.
+        useProcesses: Run worker jobs in processes, in threads if False.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        guiHandler=None,
+        app=None,
+        maxWorkers: int | None = None,
+        maxInFlight: int = 8,
+        processes: int | None = None,
+        queueSize: int = 64,
+        useProcesses: bool = True,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.guiHandler = guiHandler
+        self.app = app
+        self.maxInFlight = maxInFlight
+        self.address = None
+        self._executor = ThreadPoolExecutor(maxWorkers, "quantification")
+        self.workers = workers.WorkerPool(processes, queueSize, useProcesses)
+        self._backgroundJobs = set()
+        self._loop = None
+        self._thread = None
+        self._stopEvent = None
+        self._started = threading.Event()
+        self._connections = set()
+        self._writers = set()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._runLoop, name="quantification-server", daemon=True
+        )
+        self._thread.start()
+        self._started.wait()
+        if self.address is None:
+            raise OSError(f"Could not start the server on {self.host}:{self.port}")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._stopEvent.set)
+        if self._thread not in [None, threading.current_thread()]:
+            self._thread.join(timeout)
+
+    def _runLoop(self) -> None:
+        try:
+            # asyncio.run also cancels the accepts still in progress on exit
+            asyncio.run(self._serve())
+        except Exception as e:
+            logging.error(f"Server error: {e}", exc_info=True)
+        finally:
+            self._started.set()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            logging.info("Server stopped")
+
+    async def _serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stopEvent = asyncio.Event()
+        server = await asyncio.start_server(
+            self._connectionMade, self.host, self.port, limit=STREAM_LIMIT
+        )
+        await self.workers.start()
+        self.address = server.sockets[0].getsockname()[:2]
+        logging.info(f"Server listening on {self.address[0]}:{self.address[1]}")
+        self._started.set()
+        async with server:
+            await self._stopEvent.wait()
+            server.close()
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            # Connections whose handler never got to run
+            for writer in list(self._writers):
+                writer.close()
+            for job in list(self._backgroundJobs):
+                job.cancel()
+            await asyncio.gather(*self._backgroundJobs, return_exceptions=True)
+            await self.workers.close()
+            await server.wait_closed()
+
+    async def _run(self, function, *args):
+        return await self._loop.run_in_executor(self._executor, function, *args)
+
+    def _connectionMade(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        # Registered synchronously so stop() sees every accepted connection
+        self._writers.add(writer)
+        task = asyncio.create_task(self._handleConnection(reader, writer))
+        self._connections.add(task)
+
+    async def _handleConnection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        peer = writer.get_extra_info("peername")
+        logging.info(f"Connected to {peer}")
+        inFlight = asyncio.Semaphore(self.maxInFlight)
+        frameTasks = set()
+        self._logHelp()
+        try:
+            while True:
+                try:
+                    command = await reader.readexactly(4)
+                except asyncio.IncompleteReadError as e:
+                    if e.partial:
+                        raise
+                    break
+                if command == protocol.MAGIC:
+                    frame = await protocol.readFrameAsync(reader, magicRead=True)
+                    logging.info(
+                        f"Received frame: {frame.command} (request {frame.requestId})"
+                    )
+                    # Stop reading while the connection has too much in progress
+                    await inFlight.acquire()
+                    frameTask = asyncio.create_task(
+                        self._processFrame(frame, writer, inFlight)
+                    )
+                    frameTasks.add(frameTask)
+                    frameTask.add_done_callback(frameTasks.discard)
+                    continue
+                command = command.decode("utf-8")
+                logging.info(f"Received command: {command}")
+                await self._processCommand(command, reader, writer)
+                if command == "-ext":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            logging.info(f"Connection lost with {peer}")
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logging.error(f"Error handling client {peer}: {e}", exc_info=True)
+        finally:
+            for frameTask in list(frameTasks):
+                frameTask.cancel()
+            await asyncio.gather(*frameTasks, return_exceptions=True)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+            self._connections.discard(task)
+            self._writers.discard(writer)
+            logging.info(f"Disconnected from {peer}")
+
+    async def _send(self, writer: asyncio.StreamWriter, *data) -> None:
+        writer.writelines(d for d in data if len(d))
+        await writer.drain()
+
+    async def _processCommand(
+        self,
+        command: str,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        if command == "-opn":
+            self._emit("openGuiSignal")
+        elif command == "-cls":
+            self._emit("hideGuiSignal")
+        elif command == "-chk":
+            await self._send(writer, self._status(writer).encode("utf-8"))
+        elif command == "-als":
+            received = await protocol.readUntilMarkerAsync(reader)
+            await self._inBackground(self.addAnalyse(received, False))
+        elif command == "-cal":
+            received = await protocol.readUntilMarkerAsync(reader)
+            await self._inBackground(self.addCalibration(received, False))
+        elif command == "-ext":
+            self.exitApplication()
+        elif command == "-met":
+            methodName = (await reader.read(255)).decode("utf-8")
+            logging.info(f"Received method: {methodName}")
+            if (payload := await self.methodPayload(methodName)) is not None:
+                await self._send(writer, payload)
+        elif command == "-qnt":
+            received = await protocol.readUntilMarkerAsync(reader)
+            try:
+                reply = await (await self.quantify(received, False))
+            except Exception as e:
+                logging.error(f"Quantification failed: {e}", exc_info=True)
+                reply = dumps({"error": str(e)}).encode("utf-8")
+            await self._send(writer, reply)
+        elif command == "-sts":
+            await self._send(writer, dumps(self.stats()).encode("utf-8"))
+        elif command == "-hlp":
+            self._logHelp()
+        else:
+            logging.warning(
+                f"There is not any action related to {command}. "
+                f"make sure you are sending the correct command."
+            )
+
+    async def _processFrame(
+        self,
+        frame: protocol.Frame,
+        writer: asyncio.StreamWriter,
+        inFlight: asyncio.Semaphore,
+    ) -> None:
+        """Handles a binary frame, replies echo the frame's request id."""
+        try:
+            command, payload = await self._frameReply(frame, writer)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Error handling {frame.command}: {e}", exc_info=True)
+            command, payload = "-err", str(e)
+        finally:
+            inFlight.release()
+        if command is not None:
+            await self._send(
+                writer, *protocol.frameBytes(command, frame.requestId, payload)
+            )
+
+    async def _frameReply(
+        self, frame: protocol.Frame, writer: asyncio.StreamWriter
+    ) -> tuple[str | None, bytes | str]:
+        if frame.command == "-als":
+            await (await self.addAnalyse(frame.payload, True))
+            return "-ack", b""
+        if frame.command == "-cal":
+            await (await self.addCalibration(frame.payload, True))
+            return "-ack", b""
+        if frame.command == "-qnt":
+            reply = await (await self.quantify(frame.payload, True))
+            return "-qnt", reply
+        if frame.command == "-sts":
+            return "-sts", dumps(self.stats())
+        if frame.command == "-chk":
+            return "-chk", self._status(writer)
+        if frame.command == "-met":
+            payload = await self.methodPayload(frame.text())
+            return "-met", payload if payload is not None else b""
+        if frame.command == "-ext":
+            self.exitApplication()
+            return None, b""
+        if frame.command in ["-opn", "-cls", "-hlp"]:
+            await self._processCommand(frame.command, None, writer)
+            return "-ack", b""
+        raise ValueError(f"There is not any action related to {frame.command}")
+
+    def _status(self, writer: asyncio.StreamWriter) -> str:
+        message = f"Server is running on {writer.get_extra_info('sockname')}"
+        logging.info(message)
+        return message
+
+    def _emit(self, signal: str, *args) -> None:
+        # Qt queues signals emitted from other threads to the GUI thread
+        if self.guiHandler is not None:
+            getattr(self.guiHandler, signal).emit(*args)
+
+    def _logHelp(self) -> None:
+        logging.info("Available commands:")
+        for cmd, desc in HELP_TEXT.items():
+            logging.info(f"{cmd}: {desc}")
+
+    def stats(self) -> dict:
+        """Worker pool statistics, with the stage profile when profiling is on."""
+        stats = self.workers.stats()
+        if profiling.isEnabled():
+            stats["profile"] = profiling.snapshot()
+        return stats
+
+    async def methodPayload(self, methodName: str) -> bytes | None:
+        """Returns the VB payload of a method, from memory when it is unchanged."""
+        registry = getMethodRegistry()
+        if (entry := registry.cached(methodName)) is not None:
+            return entry.forVB
+        try:
+            return await self._run(registry.forVB, methodName)
+        except KeyError:
+            return None
+
+    async def _inBackground(self, enqueued) -> None:
+        """Waits for a job to be queued, then lets it finish on its own."""
+        future = await enqueued
+        job = asyncio.ensure_future(future)
+        self._backgroundJobs.add(job)
+        job.add_done_callback(self._backgroundJobDone)
+
+    def _backgroundJobDone(self, job: asyncio.Future) -> None:
+        self._backgroundJobs.discard(job)
+        if not job.cancelled() and (error := job.exception()) is not None:
+            logging.error(f"Background job failed: {error}")
+
+    async def _enqueueAnalyse(
+        self, function, payload: memoryview, binary: bool
+    ) -> asyncio.Future:
+        hashableDict = await self._run(workers.splitPayload, payload, binary)
+        return await self.workers.enqueueAnalyse(function, hashableDict)
+
+    async def addAnalyse(self, payload: memoryview, binary: bool) -> asyncio.Future:
+        """Queues an analyse to save, returns once the worker queue took it."""
+        future = await self._enqueueAnalyse(workers.saveAnalyse, payload, binary)
+        return asyncio.ensure_future(self._analyseSaved(future))
+
+    async def _analyseSaved(self, future: asyncio.Future) -> None:
+        encoded = await future
+        analyse = await self._run(Analyse.fromBinary, encoded)
+        self._emit("addAnalyseSignal", analyse)
+
+    async def addCalibration(
+        self, payload: memoryview, binary: bool
+    ) -> asyncio.Future:
+        """Queues a calibration recompute, returns once the worker queue took it."""
+        return await self._enqueueAnalyse(workers.saveCalibration, payload, binary)
+
+    async def quantify(self, payload: memoryview, binary: bool) -> asyncio.Future:
+        """Queues a -qnt request, the future holds the JSON reply."""
+        return await self._enqueueAnalyse(workers.quantifyAnalyse, payload, binary)
+
+    def exitApplication(self) -> None:
+        self._emit("exit")
+        if self.app is not None:
+            getDatabase().closeConnection()
+            logging.info("Database closed")
+            self.app.exit()
+            logging.info("Application exit")
+        self._stopEvent.set()
@@ -1,19 +1,169 @@
 import math
+import numpy as np
+
+from dataclasses import dataclass, field
+
+from src.utils.database import getDataframe
 
 # A0 = -0.0277
 # A1 = 0.0148
 A0 = -0.0255
 A1 = 0.01491
+A2 = 0.0
+CHANNELS = 2048
+DEFAULT_ENERGY_CALIBRATION_ID = 1
 
 
 def truncate(f, n):
     return math.floor(f * 10**n) / 10**n
 
 
+@dataclass
+class EnergyCalibration:
+    """Channel <-> keV model of a detector, E = A0 + A1 * px + A2 * px ** 2.
+
+    Conversions accept scalars or arrays and always return NumPy values. The
+    keV value of every channel is precomputed in ``kev`` so per-channel lookups
+    never go through the polynomial.
+    """
+
+    energyCalibrationId: int | None = field(default=None)
+    a0: float = field(default=A0)
+    a1: float = field(default=A1)
+    a2: float = field(default=A2)
+    channels: int = field(default=CHANNELS)
+    kev: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.a0 = float(self.a0)
+        self.a1 = float(self.a1)
+        self.a2 = 0.0 if self.a2 is None or np.isnan(self.a2) else float(self.a2)
+        self.channels = int(self.channels)
+        self.kev = self.pxToEv(np.arange(self.channels))
+        self.kev.setflags(write=False)
+
+    @property
+    def isLinear(self) -> bool:
+        return self.a2 == 0
+
+    def pxToEv(self, px: float | np.ndarray) -> np.ndarray:
+        px = np.asarray(px, dtype=np.float64)
+        return (self.a2 * px + self.a1) * px + self.a0
+
+    def evToPx(self, ev: float | np.ndarray) -> np.ndarray:
+        ev = np.asarray(ev, dtype=np.float64)
+        if self.isLinear:
+            return (ev - self.a0) / self.a1
+        # Root of a2 * px^2 + a1 * px + (a0 - ev) = 0 that tends to the linear
+        # solution as a2 -> 0, written in the cancellation-free form.
+        delta = ev - self.a0
+        discriminant = np.sqrt(np.clip(self.a1**2 + 4 * self.a2 * delta, 0, None))
+        return 2 * delta / (self.a1 + discriminant)
+
+    def evToChannel(self, ev: float | np.ndarray) -> np.ndarray:
+        """Nearest channel index of ``ev``, clipped to the detector range."""
+        px = np.rint(self.evToPx(ev))
+        return np.clip(px, 0, self.channels).astype(np.intp)
+
+    def channelToEv(self, channel: int | np.ndarray) -> np.ndarray:
+        """Lookup-table variant of ``pxToEv`` for integer channels."""
+        channel = np.clip(np.asarray(channel, dtype=np.intp), 0, self.channels - 1)
+        return self.kev[channel]
+
+    def roiChannels(
+        self, lowEv: np.ndarray, highEv: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        return self.evToChannel(lowEv), self.evToChannel(highEv)
+
+    def forChannels(self, channels: int) -> "EnergyCalibration":
+        """The same detector read out on ``channels`` channels.
+
+        The energy range is kept, so a channel of the result spans
+        ``self.channels / channels`` channels of this calibration.
+        """
+        if channels == self.channels:
+            return self
+        scale = self.channels / channels
+        return EnergyCalibration(
+            self.energyCalibrationId,
+            self.a0,
+            self.a1 * scale,
+            self.a2 * scale**2,
+            channels,
+        )
+
+    def toHashableDict(self) -> dict:
+        return {
+            "energyCalibrationId": self.energyCalibrationId,
+            "a0": self.a0,
+            "a1": self.a1,
+            "a2": self.a2,
+            "channels": self.channels,
+        }
+
+    @classmethod
+    def fromHashableDict(cls, kwargs: dict | None) -> "EnergyCalibration | None":
+        return None if kwargs is None else cls(**kwargs)
+
+    @classmethod
+    def fromDatabase(
+        cls, energyCalibrationId: int = DEFAULT_ENERGY_CALIBRATION_ID
+    ) -> "EnergyCalibration":
+        df = getDataframe("EnergyCalibrations")
+        row = df[df["energy_calibration_id"] == energyCalibrationId]
+        if row.empty:
+            raise KeyError(f"No energy calibration with id {energyCalibrationId}")
+        row = row.iloc[0]
+        return cls(energyCalibrationId, row["A0"], row["A1"], row["A2"])
+
+
+_energyCalibrations = {}
+
+
+def getEnergyCalibration(
+    energyCalibrationId: int = DEFAULT_ENERGY_CALIBRATION_ID,
+) -> EnergyCalibration:
+    global _energyCalibrations
+    if energyCalibrationId not in _energyCalibrations:
+        try:
+            calibration = EnergyCalibration.fromDatabase(energyCalibrationId)
+        except KeyError:
+            if energyCalibrationId != DEFAULT_ENERGY_CALIBRATION_ID:
+                raise
+            calibration = EnergyCalibration(energyCalibrationId)
+        _energyCalibrations[energyCalibrationId] = calibration
+    return _energyCalibrations[energyCalibrationId]
+
+
+def clearEnergyCalibrations() -> None:
+    global _energyCalibrations
+    _energyCalibrations = {}
+
+
+def rebin(counts: np.ndarray, channels: int) -> np.ndarray:
+    """Counts of ``counts`` on ``channels`` channels over the same range.
+
+    Works along the last axis, on one spectrum or on stacked spectra. The
+    counts of a channel are spread evenly over its width, a new channel
+    gets the share of every channel it overlaps, so totals are kept.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    size = counts.shape[-1]
+    if size == channels:
+        return counts
+    if size % channels == 0:
+        return counts.reshape(*counts.shape[:-1], channels, size // channels).sum(-1)
+    edges = np.linspace(0, size, channels + 1)
+    index = np.minimum(edges.astype(np.intp), size - 1)
+    cumulative = np.cumsum(counts, axis=-1) - counts
+    atEdges = cumulative[..., index] + (edges - index) * counts[..., index]
+    return np.diff(atEdges, axis=-1)
+
+
 def evToPx(ev: float) -> float:
-    return (ev - A0) / A1
+    return float(getEnergyCalibration().evToPx(ev))
 
 
 def pxToEv(px: float) -> float:
-    result = (px * A1) + A0
-    return truncate(result, 5) if result > 0 else 0
+    result = float(getEnergyCalibration().pxToEv(px))
+    return round(result, 5) if result > 0 else 0
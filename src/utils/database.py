@@ -61,6 +61,7 @@ _dataframes = {
     "Calibrations": _db.dataframe("SELECT * FROM Calibrations"),
     "Methods": _db.dataframe("SELECT * FROM Methods"),
     "BackgroundProfiles": _db.dataframe("SELECT * FROM BackgroundProfiles"),
+    "EnergyCalibrations": _db.dataframe("SELECT * FROM EnergyCalibrations"),
 }
 
 
@@ -73,6 +74,7 @@ def reloadDataframes():
         "Calibrations": _db.dataframe("SELECT * FROM Calibrations"),
         "Methods": _db.dataframe("SELECT * FROM Methods"),
         "BackgroundProfiles": _db.dataframe("SELECT * FROM BackgroundProfiles"),
+        "EnergyCalibrations": _db.dataframe("SELECT * FROM EnergyCalibrations"),
     }
 
 
@@ -1,4 +1,4 @@
-import logging
+import os
 import socket
 import pandas
 import numpy as np
@@ -6,6 +6,7 @@ import pyqtgraph as pg
 
 from collections import defaultdict
 from dataclasses import dataclass, field, asdict
+from itertools import count
 from json import JSONDecodeError, dump, loads, dumps
 from pathlib import Path
 from typing import Sequence
@@ -15,8 +16,37 @@ from scipy.signal import find_peaks
 
 from src.utils import calculation
 from src.utils import encryption
+from src.utils import profiling
+from src.utils import protocol
+from src.utils.deconvolution import PeakFitter
 from src.utils.database import getDataframe
 from src.utils.paths import resourcePath
+from src.utils.pyramid import MinMaxPyramid
+from src.utils.regression import RegressionResult, RegressionStatistics
+from src.utils.snapshot import Snapshot
+
+# Channels a background preview is fitted on, at most
+PREVIEW_CHANNELS = 1024
+# Intensity tables memoized per spectrum, for as many sets of lines
+INTENSITY_TABLES = 4
+
+
+def previewDecimation(channels: int) -> int:
+    """Channels binned together for a background preview of a spectrum."""
+    return max(1, channels // PREVIEW_CHANNELS)
+
+
+_versions = count(1)
+
+
+def nextVersion() -> int:
+    """Stamp of a model object's state, unique and increasing over the session.
+
+    ``Analyse``, ``Calibration`` and ``Method`` take a new stamp when created
+    and from each of their mutators, widgets compare stamps instead of the
+    objects to tell whether they have to refresh.
+    """
+    return next(_versions)
 
 
 @dataclass(order=True)
@@ -25,43 +55,127 @@ class AnalyseData:
     y: np.ndarray
     optimalY: np.ndarray = field(init=False)
     x: np.ndarray = field(init=False)
+    _pyramids: dict = field(init=False, repr=False, compare=False)
+    _intensities: tuple = field(init=False, repr=False, compare=False)
 
     def __post_init__(self):
         self.x = np.arange(0, len(self.y))
         self.optimalY = self.y.copy()
+        self._pyramids = {}
+        self.clearIntensities()
 
     def __eq__(self, others) -> bool:
         assert isinstance(others, AnalyseData), "Comparison Error"
         return np.all(np.equal(self.x, others.x)) and np.all(np.equal(self.y, others.y))
 
+    def pyramid(self, corrected: bool = False) -> MinMaxPyramid:
+        """Min/max pyramid of ``y``, or of ``optimalY`` if ``corrected``.
+
+        Built on first use, and again once ``optimalY`` has been replaced.
+        """
+        y = self.optimalY if corrected else self.y
+        pyramid = self._pyramids.get(corrected)
+        if pyramid is None or pyramid.source is not y:
+            pyramid = self._pyramids[corrected] = MinMaxPyramid(y)
+        return pyramid
+
+    @staticmethod
+    def regionsKey(lines: pandas.DataFrame) -> tuple:
+        """The lines and their regions, hashed at a fraction of summing them."""
+        return (
+            tuple(lines["symbol"].to_numpy()),
+            tuple(lines["radiation_type"].to_numpy()),
+            lines["low_kiloelectron_volt"].to_numpy(dtype=float).tobytes(),
+            lines["high_kiloelectron_volt"].to_numpy(dtype=float).tobytes(),
+        )
+
+    def clearIntensities(self) -> None:
+        """Drops the memoized intensity tables, see ``calculateIntensities``."""
+        self._intensities = (None, None, {})
+
     def calculateIntensities(self, lines: pandas.DataFrame) -> dict:
+        """Counts of ``optimalY`` in the region of each line.
+
+        Tables are memoized by the ``regionsKey`` of ``lines`` until
+        ``optimalY`` or the energy calibration is replaced, the returned
+        table is shared and must not be modified.
+        """
+        energyCalibration = calculation.getEnergyCalibration()
+        optimalY, calibration, tables = self._intensities
+        if optimalY is not self.optimalY or calibration is not energyCalibration:
+            tables = {}
+            self._intensities = (self.optimalY, energyCalibration, tables)
+        key = self.regionsKey(lines)
+        if (intensities := tables.get(key)) is None:
+            intensities = tables[key] = self._sumRegions(lines, energyCalibration)
+            if len(tables) > INTENSITY_TABLES:
+                del tables[next(iter(tables))]
+        return intensities
+
+    @profiling.profiled("intensities")
+    def _sumRegions(
+        self, lines: pandas.DataFrame, energyCalibration: calculation.EnergyCalibration
+    ) -> dict:
         intensities = defaultdict(dict)
-        for row in lines.itertuples():
-            try:
-                intensity = int(
-                    self.optimalY[
-                        round(calculation.evToPx(row.low_kiloelectron_volt)) : round(
-                            calculation.evToPx(row.high_kiloelectron_volt)
-                        )
-                    ].sum()
-                )
-                intensities[row.symbol][row.radiation_type] = intensity
-            except ValueError:
-                logging.error(f"ValueError while calculating intensities for {row}")
+        low, high = energyCalibration.roiChannels(
+            lines["low_kiloelectron_volt"].to_numpy(dtype=float),
+            lines["high_kiloelectron_volt"].to_numpy(dtype=float),
+        )
+        # Methods are calibrated on the channels of the energy calibration
+        optimalY = calculation.rebin(self.optimalY, energyCalibration.channels)
+        low = low.clip(0, optimalY.size)
+        high = np.maximum(high.clip(0, optimalY.size), low)
+        cumulative = np.concatenate(([0], np.cumsum(optimalY)))
+        sums = cumulative[high] - cumulative[low]
+        for symbol, radiationType, intensity in zip(
+            lines["symbol"], lines["radiation_type"], sums
+        ):
+            intensities[symbol][radiationType] = int(intensity)
         return intensities
 
     def applyBackgroundProfile(self, profile: "BackgroundProfile") -> None:
-        self.optimalY = self.y.copy()
-        if not profile:
-            return
-        xSmooth, ySmooth = self.smooth(self.x, self.y, profile.smoothness)
-        if kwargs := profile.peakKwargs():
-            peaks, _ = find_peaks(-ySmooth, **kwargs)
-        else:
-            peaks, _ = find_peaks(-ySmooth)
-        if peaks.size != 0:
-            regressionCurve = np.interp(self.x, xSmooth[peaks], ySmooth[peaks])
-            self.optimalY = (self.y - regressionCurve).clip(0)
+        self.optimalY = self.correctedY(profile)
+
+    @profiling.profiled("background")
+    def correctedY(
+        self,
+        profile: "BackgroundProfile",
+        region: tuple | None = None,
+        decimation: int = 1,
+    ) -> np.ndarray:
+        """Counts with the background of ``profile`` removed inside ``region``.
+
+        Leaves ``optimalY`` untouched, so it can be computed off the GUI thread.
+        With a ``decimation`` above 1 the background is fitted on the spectrum
+        binned by that many channels, a cheap preview of the full fit.
+        """
+        optimalY = self.y.copy()
+        if profile:
+            x, y = self.x, self.y
+            level = profile.smoothness
+            if decimation > 1:
+                size = y.size // decimation * decimation
+                y = y[:size].reshape(-1, decimation).mean(axis=1)
+                x = np.arange(y.size)
+                # Same smoothing in channels, unless a bin is already wider
+                level = max(1.0, profile.smoothness / decimation)
+            xSmooth, ySmooth = self.smooth(x, y, level)
+            # Samples of the smoothed spectrum are wider when bins are
+            scale = profile.smoothness / max(profile.smoothness, decimation)
+            if kwargs := profile.peakKwargs(scale):
+                peaks, _ = find_peaks(-ySmooth, **kwargs)
+            else:
+                peaks, _ = find_peaks(-ySmooth)
+            if peaks.size != 0:
+                # Bin centers back in channels, the identity without decimation
+                xPeaks = xSmooth[peaks] * decimation + (decimation - 1) / 2
+                regressionCurve = np.interp(self.x, xPeaks, ySmooth[peaks])
+                optimalY = (self.y - regressionCurve).clip(0)
+        if region is not None:
+            minX, maxX = int(region[0]), int(region[1])
+            optimalY[:minX] = self.y[:minX]
+            optimalY[maxX:] = self.y[maxX:]
+        return optimalY
 
     @staticmethod
     def smooth(
@@ -82,7 +196,7 @@ class AnalyseData:
 
     @classmethod
     def fromHashableDict(cls, data: dict) -> "AnalyseData":
-        return cls(data["conditionId"], np.array(data["y"]))
+        return cls(data["conditionId"], np.asarray(data["y"]))
 
     @classmethod
     def fromList(cls, data: list) -> "AnalyseData":
@@ -105,9 +219,11 @@ class Analyse:
     generalData: dict = field(default_factory=dict)
     filename: str | None = field(default=None)
     extension: str | None = field(default=None)
-    _backgroundRegion: tuple = field(default=(0, 2048), init=False)
+    _backgroundRegion: tuple | None = field(default=None, init=False)
+    _version: int = field(default=0, init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
+        self._version = nextVersion()
         if not self.generalData:
             self.generalData = {
                 "Type": None,
@@ -122,31 +238,81 @@ class Analyse:
             self.filename = Path(self.filePath).stem
             self.extension = self.filePath.split(".")[-1]
 
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def touch(self) -> None:
+        """Marks the analyse as changed, for edits made outside its mutators."""
+        self._version = nextVersion()
+
     @property
     def backgroundProfile(self) -> "BackgroundProfile":
         return self._backgroundProfile
 
     @backgroundProfile.setter
     def backgroundProfile(self, profile: "BackgroundProfile") -> None:
-        self._backgroundProfile = profile
-        for d in self.data:
-            d.applyBackgroundProfile(profile)
-        self.generalData["Background Profile"] = profile.filename if profile else None
+        self.setBackgroundProfile(profile)
+
+    @property
+    def channels(self) -> int:
+        """Channels of the longest spectrum, those of the detector if empty."""
+        return max(
+            (d.y.size for d in self.data),
+            default=calculation.getEnergyCalibration().channels,
+        )
 
     @property
     def backgroundRegion(self) -> tuple:
-        return self._backgroundRegion
+        """Fitted channels of the background, every channel unless set."""
+        return self._backgroundRegion or (0, self.channels)
 
     @backgroundRegion.setter
     def backgroundRegion(self, region: tuple) -> None:
+        self.setBackgroundRegion(region)
+
+    def correctedData(
+        self,
+        profile: "BackgroundProfile",
+        region: tuple | None = None,
+        preview: bool = False,
+    ) -> list[np.ndarray]:
+        """``optimalY`` of each data for ``profile`` and ``region``, unapplied.
+
+        A ``preview`` fits the background on binned spectra, see
+        ``previewDecimation``.
+        """
+        return [
+            d.correctedY(
+                profile, region, previewDecimation(d.y.size) if preview else 1
+            )
+            for d in self.data
+        ]
+
+    def setBackgroundProfile(
+        self,
+        profile: "BackgroundProfile",
+        optimalYs: list[np.ndarray] | None = None,
+    ) -> None:
+        """Sets the profile, with ``optimalYs`` from ``correctedData`` if given."""
+        if optimalYs is None:
+            optimalYs = self.correctedData(profile)
+        self._backgroundProfile = profile
+        for d, optimalY in zip(self.data, optimalYs):
+            d.optimalY = optimalY
+        self.generalData["Background Profile"] = profile.filename if profile else None
+        self.touch()
+
+    def setBackgroundRegion(
+        self, region: tuple, optimalYs: list[np.ndarray] | None = None
+    ) -> None:
+        """Sets the region, with ``optimalYs`` from ``correctedData`` if given."""
+        if optimalYs is None:
+            optimalYs = self.correctedData(self._backgroundProfile, region)
         self._backgroundRegion = region
-        minX, maxX = region
-        minX = int(minX)
-        maxX = int(maxX)
-        for data in self.data:
-            data.applyBackgroundProfile(self._backgroundProfile)
-            data.optimalY[:minX] = data.y[:minX]
-            data.optimalY[maxX:] = data.y[maxX:]
+        for d, optimalY in zip(self.data, optimalYs):
+            d.optimalY = optimalY
+        self.touch()
 
     def __eq__(self, other) -> bool:
         if other is None:
@@ -183,15 +349,16 @@ class Analyse:
         hashableDict["filePath"] = filePath
         hashableDict["filename"] = Path(filePath).stem
         hashableDict["extension"] = filePath.split(".")[-1]
-        if filePath.endswith(".atx"):
-            key = encryption.loadKey()
-            jsonText = dumps(hashableDict)
-            encryptedText = encryption.encryptText(jsonText, key)
-            with open(filePath, "wb") as f:
-                f.write(encryptedText + b"\n")
-        elif filePath.endswith(".txt"):
-            with open(filePath, "w") as f:
-                dump(hashableDict, f, indent=4)
+        with profiling.stage("write"):
+            if filePath.endswith(".atx"):
+                key = encryption.loadKey()
+                jsonText = dumps(hashableDict)
+                encryptedText = encryption.encryptText(jsonText, key)
+                with open(filePath, "wb") as f:
+                    f.write(encryptedText + b"\n")
+            elif filePath.endswith(".txt"):
+                with open(filePath, "w") as f:
+                    dump(hashableDict, f, indent=4)
 
     def calculateActiveIntensities(self, lines: pandas.DataFrame) -> dict:
         allIntensities = [d.calculateIntensities(lines) for d in self.data]
@@ -203,12 +370,23 @@ class Analyse:
                 ][row.symbol][row.radiation_type]
         return intensities
 
-    def calculateConcentrations(self, method: "Method") -> dict:
-        concentrations = defaultdict(dict)
+    def calculateConcentrations(self, method: "Method", mode: str = "roi") -> dict:
+        if mode == "fit":
+            return self.sortConcentrations(method.fitConcentrations([self])[0])
         activeIntensities = self.calculateActiveIntensities(method.lines)
         allIntensities = {
             d.conditionId: d.calculateIntensities(method.lines) for d in self.data
         }
+        return self.sortConcentrations(
+            self._correctInterferences(method, activeIntensities, allIntensities)
+        )
+
+    @staticmethod
+    @profiling.profiled("interferences")
+    def _correctInterferences(
+        method: "Method", activeIntensities: dict, allIntensities: dict
+    ) -> dict:
+        concentrations = defaultdict(dict)
         # Pre-filter active elements and store as dictionaries
         activeLines = method.lines[method.lines["active"] == 1]
         for activeElement, d in activeIntensities.items():
@@ -251,6 +429,10 @@ class Analyse:
                         concentrations[activeElement][activeRadiation] = float(
                             intensity * coefficient
                         )
+        return concentrations
+
+    @staticmethod
+    def sortConcentrations(concentrations: dict) -> dict:
         return dict(
             sorted(
                 concentrations.items(),
@@ -278,8 +460,10 @@ class Analyse:
             AnalyseData.fromHashableDict(dataDict) for dataDict in analyseDict["data"]
         ]
         if "conditions" in analyseDict:
-            analyseDict["conditions"] = pandas.DataFrame(analyseDict.pop("conditions"))
-            analyseDict["conditions"].reset_index(inplace=True, drop=True)
+            with profiling.stage("dataframe"):
+                conditions = pandas.DataFrame(analyseDict.pop("conditions"))
+                conditions.reset_index(inplace=True, drop=True)
+            analyseDict["conditions"] = conditions
         if "backgroundProfile" in analyseDict:
             if (profileDict := analyseDict.pop("backgroundProfile", None)) is not None:
                 analyseDict["_backgroundProfile"] = BackgroundProfile.fromHashableDict(
@@ -290,8 +474,9 @@ class Analyse:
     @classmethod
     def fromTXTFile(cls, filePath: str) -> "Analyse":
         try:
-            with open(filePath, "r") as f:
-                return cls.fromHashableDict(loads(f.read()))
+            with open(filePath, "r") as f, profiling.stage("decode"):
+                analyseDict = loads(f.read())
+            return cls.fromHashableDict(analyseDict)
         except JSONDecodeError:
             with open(filePath, "r") as f:
                 data = []
@@ -312,20 +497,49 @@ class Analyse:
         with open(filePath, "r") as f:
             encryptedText = f.readline()
         decryptedText = encryption.decryptText(encryptedText, key)
-        analyseDict = loads(decryptedText)
+        with profiling.stage("decode"):
+            analyseDict = loads(decryptedText)
         return cls.fromHashableDict(analyseDict)
 
+    @classmethod
+    def fromFile(cls, filePath: str) -> "Analyse | None":
+        """Reads a ``.txt`` or ``.atx`` file, None for other extensions."""
+        if filePath.endswith(".txt"):
+            return cls.fromTXTFile(filePath)
+        if filePath.endswith(".atx"):
+            return cls.fromATXFile(filePath)
+        return None
+
     @classmethod
     def fromSocket(cls, connection: socket.socket) -> "Analyse":
-        received = ""
-        while True:
-            received += connection.recv(10).decode("utf-8")
-            if received[-4:] == "-stp":
-                received = received[:-4]
-                break
-        analyseDict = loads(received)
+        received = protocol.recvUntilMarker(connection)
+        with profiling.stage("decode"):
+            analyseDict = loads(str(received, "utf-8"))
         return cls.fromHashableDict(analyseDict)
 
+    @classmethod
+    def fromBinary(cls, payload: bytes | bytearray | memoryview) -> "Analyse":
+        return cls.fromHashableDict(protocol.decodeAnalyse(payload))
+
+    def toBinary(self, **metadata) -> bytes:
+        """Packs the analyse for binary frames, ``metadata`` is sent alongside."""
+        return protocol.encodeAnalyse(
+            {
+                **metadata,
+                "filePath": self.filePath,
+                "data": [
+                    {"conditionId": d.conditionId, "y": d.y} for d in self.data
+                ],
+                "conditions": self.conditions.to_dict(),
+                "backgroundProfile": (
+                    self.backgroundProfile.toHashableDict()
+                    if self.backgroundProfile
+                    else None
+                ),
+                "generalData": self.generalData.copy(),
+            }
+        )
+
 
 @dataclass(order=True)
 class Calibration:
@@ -341,8 +555,10 @@ class Calibration:
     activeIntensities: dict = field(default_factory=dict)
     coefficients: dict = field(default_factory=dict)
     interferences: dict = field(default_factory=dict)
+    _version: int = field(default=0, init=False, repr=False, compare=False)
 
     def __post_init__(self):
+        self._version = nextVersion()
         df = getDataframe("Lines").copy()
         df[["condition_id", "active"]] = self._lines[["condition_id", "active"]]
         df.reset_index(drop=True, inplace=True)
@@ -371,6 +587,16 @@ class Calibration:
             and self._lines.equals(other._lines)
         )
 
+    @property
+    def version(self) -> int:
+        """Latest stamp of the calibration or of its analyse."""
+        if self._analyse is None:
+            return self._version
+        return max(self._version, self._analyse.version)
+
+    def touch(self) -> None:
+        self._version = nextVersion()
+
     @property
     def analyse(self) -> Analyse:
         return self._analyse
@@ -381,6 +607,7 @@ class Calibration:
         self.activeIntensities = self.analyse.calculateActiveIntensities(self._lines)
         self.calculateCoefficients()
         self.calculateInterferences()
+        self.touch()
 
     @property
     def lines(self) -> pandas.DataFrame:
@@ -421,6 +648,15 @@ class Calibration:
                                 )
                     self.interferences[element][activeRadiation] = interferences
 
+    def snapshot(self) -> Snapshot:
+        """State to tell unsaved changes from, the analyse is kept by version."""
+        return Snapshot.take(
+            self,
+            values=("filename", "element", "concentrations", "state"),
+            frames=("_lines",),
+            references=("_analyse",),
+        )
+
     def status(self) -> str:
         return self.convertStateToStatus(self.state)
 
@@ -446,11 +682,12 @@ class Calibration:
             self.calculateCoefficients()
             self.calculateInterferences()
         filePath = resourcePath(resourcePath(f"calibrations/{self.filename}.atxc"))
-        key = encryption.loadKey()
-        jsonText = dumps(self.toHashableDict())
-        encryptedText = encryption.encryptText(jsonText, key)
-        with open(filePath, "wb") as f:
-            f.write(encryptedText + b"\n")
+        with profiling.stage("write"):
+            key = encryption.loadKey()
+            jsonText = dumps(self.toHashableDict())
+            encryptedText = encryption.encryptText(jsonText, key)
+            with open(filePath, "wb") as f:
+                f.write(encryptedText + b"\n")
 
     def toHashableDict(self) -> dict:
         return {
@@ -471,8 +708,10 @@ class Calibration:
         if analyseDict := calibrationDict.pop("analyse"):
             analyse = Analyse.fromHashableDict(analyseDict)
             calibrationDict["_analyse"] = analyse
-        calibrationDict["_lines"] = pandas.DataFrame(calibrationDict.pop("lines"))
-        calibrationDict["_lines"].reset_index(drop=True, inplace=True)
+        with profiling.stage("dataframe"):
+            lines = pandas.DataFrame(calibrationDict.pop("lines"))
+            lines.reset_index(drop=True, inplace=True)
+        calibrationDict["_lines"] = lines
         return cls(**calibrationDict)
 
     @classmethod
@@ -481,7 +720,8 @@ class Calibration:
         with open(filePath, "r") as f:
             encryptedText = f.readline()
         decryptedText = encryption.decryptText(encryptedText, key)
-        kwargs = loads(decryptedText)
+        with profiling.stage("decode"):
+            kwargs = loads(decryptedText)
         return cls.fromHashableDict(kwargs)
 
     @classmethod
@@ -511,8 +751,28 @@ class Method:
     lines: pandas.DataFrame | None = field(default=None)
     coefficients: pandas.DataFrame | None = field(default=None)
     interferences: pandas.DataFrame | None = field(default=None)
+    coefficientStatistics: RegressionStatistics | None = field(
+        default=None, repr=False
+    )
+    interferenceStatistics: RegressionStatistics | None = field(
+        default=None, repr=False
+    )
+    # Observations each calibration added to the running sums, by filename,
+    # with the mtime of its file at the time
+    contributions: dict | None = field(default=None, repr=False)
+    coefficientRegression: RegressionResult | None = field(
+        default=None, init=False, repr=False
+    )
+    interferenceRegression: RegressionResult | None = field(
+        default=None, init=False, repr=False
+    )
+    _peakFitter: tuple | None = field(default=None, init=False, repr=False)
+    _version: int = field(default=0, init=False, repr=False, compare=False)
 
     def __post_init__(self):
+        self._version = nextVersion()
+        if self.contributions is None:
+            self.contributions = {}
         if self.lines is None:
             self.lines = getDataframe("Lines").copy()
             self.lines["active"] = 0
@@ -524,6 +784,9 @@ class Method:
             for f in self.calibrations["filename"].values
         ]
         self.fillLines(calibrations)
+        if self.coefficients is None and self.interferences is None:
+            self.fillStatistics(calibrations)
+            return
         if self.coefficients is None:
             self.fillCoefficients(calibrations)
         if self.interferences is None:
@@ -544,6 +807,13 @@ class Method:
             and self.interferences.equals(other.interferences)
         )
 
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def touch(self) -> None:
+        self._version = nextVersion()
+
     def fillLines(self, calibrations: Sequence) -> None:
         for calibration in calibrations:
             self.addCalibrationLines(calibration)
@@ -555,90 +825,241 @@ class Method:
         self.lines.loc[indexes, "condition_id"] = calibration.lines.loc[
             indexes, "condition_id"
         ]
+        self.touch()
 
     def removeCalibrationLines(self, calibration: Calibration) -> None:
         indexes = self.lines[
             self.lines["symbol"].isin(calibration.concentrations)
         ].index
         self.lines.loc[indexes, "condition_id"] = np.nan
+        self.touch()
 
-    def fillInterferences(self, calibrations: Sequence) -> None:
-        interferences = defaultdict(dict)
+    def _activeLineKeys(self) -> set:
+        active = self.lines[self.lines["active"] == 1]
+        return set(active["symbol"] + "-" + active["radiation_type"])
+
+    @staticmethod
+    def _coefficientObservations(calibrations: Sequence) -> tuple[list, list, list]:
+        keys, x, y = [], [], []
+        for calibration in calibrations:
+            concentrations = calibration.concentrations
+            for element, radiationDict in calibration.coefficients.items():
+                for radiation, coefficient in radiationDict.items():
+                    keys.append(f"{element}-{radiation}")
+                    x.append(concentrations[element])
+                    y.append(coefficient)
+        return keys, x, y
 
-        # Collect interference data
+    @staticmethod
+    def _interferenceObservations(calibrations: Sequence) -> tuple[list, list, list]:
+        keys, x, y = [], [], []
         for calibration in calibrations:
-            concentrations = (
-                calibration.concentrations
-            )  # Cache reference to avoid repeated access
+            concentrations = calibration.concentrations
             for element, radiationDict in calibration.interferences.items():
                 for activeRadiation, values in radiationDict.items():
-                    if self.lines.query(
-                        f"symbol == '{element}' and radiation_type == '{activeRadiation}' and active == 1"
-                    ).empty:
-                        continue
-                    key = f"{element}-{activeRadiation}"
-                    interferences[key][concentrations[element]] = {
-                        e: list(v.values())[0] for e, v in values.items()
-                    }
-
-        # Perform the linear regression for each interference
-        for k, data in interferences.items():
-            # Extract the x values (concentrations) and corresponding y-values (element values)
-            x = np.array(list(data.keys()))
-
-            # Prepare a dictionary to store slopes
-            slopes = {}
-
-            # Transpose the data to get y-values for each element
-            elements = list(data[x[0]].keys())
-            y_values = {
-                element: np.array([data[concentration][element] for concentration in x])
-                for element in elements
-            }
-
-            # Perform zero-intercept linear regression for each element
-            for element, y in y_values.items():
-                # Use vectorized slope calculation
-                slope = np.sum(x * y) / np.sum(x**2) * 100
-                slopes[element] = slope
+                    for interferer, v in values.items():
+                        keys.append((f"{element}-{activeRadiation}", interferer))
+                        x.append(concentrations[element])
+                        y.append(next(iter(v.values())))
+        return keys, x, y
 
-            # Replace the interferences data with the slopes for each element
-            interferences[k] = slopes
-
-        # Convert the final interferences dictionary into a pandas DataFrame
-        self.interferences = pandas.DataFrame.from_dict(interferences, orient="index")
+    def fillInterferences(self, calibrations: Sequence) -> None:
+        self.interferenceStatistics = RegressionStatistics(
+            ["key", "interferer"]
+        )
+        self.interferenceStatistics.update(
+            *self._interferenceObservations(calibrations)
+        )
+        self.updateInterferences()
 
     def fillCoefficients(self, calibrations: Sequence) -> None:
-        coefficients = defaultdict(dict)
+        self.coefficientStatistics = RegressionStatistics(["key"])
+        self.coefficientStatistics.update(*self._coefficientObservations(calibrations))
+        self.updateCoefficients()
+
+    def updateInterferences(self) -> None:
+        """Solves the interference slopes of the active lines from the running sums."""
+        sums = self.interferenceStatistics.sums
+        keys = sums.index[
+            sums.index.get_level_values("key").isin(self._activeLineKeys())
+        ]
+        if keys.empty:
+            self.interferenceRegression = None
+            self.interferences = pandas.DataFrame()
+            self.touch()
+            return
+        self.interferenceRegression = self.interferenceStatistics.result(
+            keys, scale=100
+        )
+        series = self.interferenceRegression.toSeries()
+        self.interferences = series.unstack().reindex(
+            index=list(dict.fromkeys(keys.get_level_values("key"))),
+            columns=list(dict.fromkeys(keys.get_level_values("interferer"))),
+        )
+        self.interferences.index.name = None
+        self.interferences.columns.name = None
+        self.touch()
+
+    def updateCoefficients(self) -> None:
+        """Solves the coefficient slopes of the active lines from the running sums."""
+        sums = self.coefficientStatistics.sums
+        keys = sums.index[sums.index.isin(self._activeLineKeys())]
+        if keys.empty:
+            self.coefficientRegression = None
+            self.coefficients = pandas.DataFrame()
+            self.touch()
+            return
+        self.coefficientRegression = self.coefficientStatistics.result(
+            keys, scale=100
+        )
+        self.coefficients = self.coefficientRegression.toSeries().to_frame(0)
+        self.coefficients.index.name = None
+        self.touch()
+
+    def fillStatistics(self, calibrations: Sequence) -> None:
+        """Builds the running sums and the contributions from ``calibrations``."""
+        self.contributions = {
+            calibration.filename: self._contribution(calibration)
+            for calibration in calibrations
+        }
+        self.fillCoefficients(calibrations)
+        self.fillInterferences(calibrations)
 
-        # Collect coefficient data efficiently
-        for calibration in calibrations:
-            concentrations = (
-                calibration.concentrations
-            )  # Cache reference to avoid repeated access
-            for element, radiationDict in calibration.coefficients.items():
-                for radiation, coefficient in radiationDict.items():
-                    if self.lines.query(
-                        f"symbol == '{element}' and radiation_type == '{radiation}' and active == 1"
-                    ).empty:
-                        continue
-                    key = f"{element}-{radiation}"
-                    coefficients[key][concentrations[element]] = coefficient
+    def _contribution(self, calibration: Calibration) -> dict:
+        filePath = resourcePath(f"calibrations/{calibration.filename}.atxc")
+        coefficientKeys, *coefficients = self._coefficientObservations([calibration])
+        interferenceKeys, *interferences = self._interferenceObservations(
+            [calibration]
+        )
+        return {
+            "mtime": os.path.getmtime(filePath) if os.path.exists(filePath) else None,
+            "coefficients": [coefficientKeys]
+            + [list(map(float, values)) for values in coefficients],
+            "interferences": [[list(key) for key in interferenceKeys]]
+            + [list(map(float, values)) for values in interferences],
+        }
 
-        # Perform linear regression for each entry in coefficients
-        for k, data in coefficients.items():
-            # Prepare the x and y values
-            x = np.array(list(data.keys()))
-            y = np.array(list(data.values()))
+    def _applyContribution(self, contribution: dict, sign: int) -> None:
+        keys, x, y = contribution["interferences"]
+        self.coefficientStatistics.update(*contribution["coefficients"], sign=sign)
+        self.interferenceStatistics.update(
+            [tuple(key) for key in keys], x, y, sign=sign
+        )
 
-            # Perform linear regression
-            slope = np.sum(x * y) / np.sum(x**2) * 100
+    def _hasStatistics(self) -> bool:
+        """Whether the running sums hold exactly the recorded contributions."""
+        return (
+            self.coefficientStatistics is not None
+            and self.interferenceStatistics is not None
+            and set(self.calibrations["filename"]) <= set(self.contributions)
+        )
 
-            # Store the slope as the result in coefficients
-            coefficients[k] = slope
+    def _updateStatistics(self, calibration: Calibration, sign: int) -> None:
+        if not self._hasStatistics() or (
+            sign < 0 and calibration.filename not in self.contributions
+        ):
+            # Method saved without its contributions, build them once from the
+            # files
+            calibrations = [
+                Calibration.fromATXCFile(resourcePath(f"calibrations/{f}.atxc"))
+                for f in self.calibrations["filename"].values
+                if f != calibration.filename
+            ]
+            if sign > 0:
+                calibrations.append(calibration)
+            self.fillStatistics(calibrations)
+            return
+        if sign > 0:
+            contribution = self._contribution(calibration)
+            self.contributions[calibration.filename] = contribution
+        else:
+            # Remove what the calibration added, its file may have changed since
+            contribution = self.contributions.pop(calibration.filename)
+        self._applyContribution(contribution, sign)
+        self.updateCoefficients()
+        self.updateInterferences()
+
+    def refreshCalibrations(self) -> None:
+        """Replaces the contributions of calibrations whose file changed since.
+
+        Only the edited calibration files are read again.
+        """
+        for filename in self.calibrations["filename"].values:
+            filePath = resourcePath(f"calibrations/{filename}.atxc")
+            if not os.path.exists(filePath):
+                continue
+            contribution = self.contributions[filename]
+            if contribution["mtime"] == os.path.getmtime(filePath):
+                continue
+            calibration = Calibration.fromATXCFile(filePath)
+            self._applyContribution(contribution, -1)
+            self.contributions[filename] = self._contribution(calibration)
+            self._applyContribution(self.contributions[filename], 1)
+            self.addCalibrationLines(calibration)
 
-        # Convert coefficients dictionary to pandas DataFrame
-        self.coefficients = pandas.DataFrame.from_dict(coefficients, orient="index")
+    def addCalibration(self, calibration: Calibration) -> None:
+        """Adds a calibration's lines and observations to the regressions.
+
+        Only the running sums of the calibration's own keys are touched, the
+        other calibration files are not read again.
+        """
+        self.addCalibrationLines(calibration)
+        self._updateStatistics(calibration, 1)
+
+    def removeCalibration(self, calibration: Calibration) -> None:
+        """Removes a calibration's lines and observations from the regressions.
+
+        The observations removed are the ones the calibration added, even if
+        its file was edited in the meantime.
+        """
+        self.removeCalibrationLines(calibration)
+        self._updateStatistics(calibration, -1)
+
+    def peakFitter(self) -> PeakFitter:
+        signature = pandas.util.hash_pandas_object(
+            self.lines[
+                [
+                    "active",
+                    "condition_id",
+                    "low_kiloelectron_volt",
+                    "high_kiloelectron_volt",
+                ]
+            ],
+            index=False,
+        ).sum()
+        if self._peakFitter is None or self._peakFitter[0] != signature:
+            self._peakFitter = (signature, PeakFitter(self.lines))
+        return self._peakFitter[1]
+
+    def fitConcentrations(self, analyses: Sequence["Analyse"]) -> list[dict]:
+        fitter = self.peakFitter()
+        spectraIntensities = fitter.fitAnalyses(analyses)
+        results = []
+        for intensities in spectraIntensities:
+            concentrations = defaultdict(dict)
+            for symbol, radiations in intensities.items():
+                for radiation, intensity in radiations.items():
+                    key = f"{symbol}-{radiation}"
+                    if key not in self.coefficients.index or intensity <= 0:
+                        continue
+                    coefficient = self.coefficients.loc[key].values[0]
+                    concentrations[symbol][radiation] = float(intensity * coefficient)
+            results.append(concentrations)
+        return results
+
+    def snapshot(self) -> Snapshot:
+        """State to tell unsaved changes from."""
+        return Snapshot.take(
+            self,
+            values=("filename", "description", "state"),
+            frames=(
+                "calibrations",
+                "conditions",
+                "lines",
+                "coefficients",
+                "interferences",
+            ),
+        )
 
     def status(self) -> str:
         return self.convertStateToStatus(self.state)
@@ -654,22 +1075,40 @@ class Method:
             self.lines.copy(),
             self.coefficients.copy() if self.coefficients is not None else None,
             self.interferences.copy() if self.interferences is not None else None,
+            (
+                self.coefficientStatistics.copy()
+                if self.coefficientStatistics is not None
+                else None
+            ),
+            (
+                self.interferenceStatistics.copy()
+                if self.interferenceStatistics is not None
+                else None
+            ),
+            dict(self.contributions),
         )
 
     def save(self) -> None:
-        calibrations = [
-            Calibration.fromATXCFile(resourcePath(f"calibrations/{f}.atxc"))
-            for f in self.calibrations["filename"].values
-        ]
-        self.fillLines(calibrations)
-        self.fillInterferences(calibrations)
-        self.fillCoefficients(calibrations)
+        if not self._hasStatistics():
+            calibrations = [
+                Calibration.fromATXCFile(resourcePath(f"calibrations/{f}.atxc"))
+                for f in self.calibrations["filename"].values
+            ]
+            self.fillLines(calibrations)
+            self.fillStatistics(calibrations)
+        else:
+            # Calibrations are kept up to date one at a time, only the edited
+            # calibration files and the active lines may have changed since
+            self.refreshCalibrations()
+            self.updateInterferences()
+            self.updateCoefficients()
         methodPath = resourcePath(f"methods/{self.filename}.atxm")
-        key = encryption.loadKey()
-        jsonText = dumps(self.toHashableDict())
-        encryptedText = encryption.encryptText(jsonText, key)
-        with open(methodPath, "wb") as f:
-            f.write(encryptedText + b"\n")
+        with profiling.stage("write"):
+            key = encryption.loadKey()
+            jsonText = dumps(self.toHashableDict())
+            encryptedText = encryption.encryptText(jsonText, key)
+            with open(methodPath, "wb") as f:
+                f.write(encryptedText + b"\n")
 
     def forVB(self) -> str:
         myDict = {
@@ -694,18 +1133,31 @@ class Method:
             "lines": self.lines.to_dict(),
             "coefficients": self.coefficients.to_dict(),
             "interferences": self.interferences.to_dict(),
+            "coefficientStatistics": (
+                self.coefficientStatistics.toHashableDict()
+                if self.coefficientStatistics is not None
+                else None
+            ),
+            "interferenceStatistics": (
+                self.interferenceStatistics.toHashableDict()
+                if self.interferenceStatistics is not None
+                else None
+            ),
+            "contributions": self.contributions,
         }
 
     @classmethod
     def fromHashableDict(cls, kwargs: dict):
-        kwargs["conditions"] = pandas.DataFrame(kwargs["conditions"])
-        kwargs["conditions"].reset_index(drop=True, inplace=True)
-        kwargs["lines"] = pandas.DataFrame(kwargs["lines"])
-        kwargs["lines"].reset_index(drop=True, inplace=True)
-        kwargs["calibrations"] = pandas.DataFrame(kwargs["calibrations"])
-        kwargs["calibrations"].reset_index(drop=True, inplace=True)
-        kwargs["coefficients"] = pandas.DataFrame(kwargs["coefficients"])
-        kwargs["interferences"] = pandas.DataFrame(kwargs["interferences"])
+        with profiling.stage("dataframe"):
+            for table in ["conditions", "lines", "calibrations"]:
+                kwargs[table] = pandas.DataFrame(kwargs[table])
+                kwargs[table].reset_index(drop=True, inplace=True)
+            kwargs["coefficients"] = pandas.DataFrame(kwargs["coefficients"])
+            kwargs["interferences"] = pandas.DataFrame(kwargs["interferences"])
+        for statistics in ["coefficientStatistics", "interferenceStatistics"]:
+            kwargs[statistics] = RegressionStatistics.fromHashableDict(
+                kwargs.get(statistics)
+            )
         return cls(**kwargs)
 
     @classmethod
@@ -714,7 +1166,8 @@ class Method:
         with open(filePath, "r") as f:
             encryptedText = f.readline()
         decryptedText = encryption.decryptText(encryptedText, key)
-        kwargs = loads(decryptedText)
+        with profiling.stage("decode"):
+            kwargs = loads(decryptedText)
         return cls.fromHashableDict(kwargs)
 
     @classmethod
@@ -725,6 +1178,19 @@ class Method:
             return "Edited by user"
 
 
+# find_peaks arguments counted in samples, the others are in counts
+SAMPLE_KWARGS = {"distance", "width", "wlen", "plateau_size"}
+
+
+def _scaleSamples(value, scale: float, atLeastOne: bool):
+    if isinstance(value, (tuple, list)):
+        return type(value)(_scaleSamples(v, scale, atLeastOne) for v in value)
+    if value is None:
+        return None
+    value *= scale
+    return max(1, round(value)) if atLeastOne else value
+
+
 @dataclass(order=True, eq=True)
 class BackgroundProfile:
     profileId: int
@@ -744,24 +1210,31 @@ class BackgroundProfile:
     def status(self) -> str:
         return self.convertStateToStatus(self.state)
 
-    def peakKwargs(self) -> dict:
-        return {
+    def peakKwargs(self, scale: float = 1.0) -> dict:
+        """Arguments of ``find_peaks``, with sample distances multiplied by
+        ``scale`` for a spectrum resampled by that factor."""
+        kwargs = {
             f: eval(value)
             for f, value in self.__dict__.items()
             if f not in ["profileId", "filename", "description", "smoothness", "state"]
             and value is not None
         }
+        if scale != 1.0:
+            for f in SAMPLE_KWARGS.intersection(kwargs):
+                kwargs[f] = _scaleSamples(kwargs[f], scale, f in {"distance", "wlen"})
+        return kwargs
 
     def copy(self) -> "BackgroundProfile":
         return BackgroundProfile(**self.__dict__)
 
     def save(self) -> None:
         filePath = resourcePath(resourcePath(f"backgrounds/{self.filename}.atxb"))
-        key = encryption.loadKey()
-        jsonText = dumps(self.toHashableDict())
-        encryptedText = encryption.encryptText(jsonText, key)
-        with open(filePath, "wb") as f:
-            f.write(encryptedText + b"\n")
+        with profiling.stage("write"):
+            key = encryption.loadKey()
+            jsonText = dumps(self.toHashableDict())
+            encryptedText = encryption.encryptText(jsonText, key)
+            with open(filePath, "wb") as f:
+                f.write(encryptedText + b"\n")
 
     def toHashableDict(self) -> dict:
         return asdict(self)
@@ -776,7 +1249,8 @@ class BackgroundProfile:
         with open(filePath, "r") as f:
             encryptedText = f.readline()
         decryptedText = encryption.decryptText(encryptedText, key)
-        kwargs = loads(decryptedText)
+        with profiling.stage("decode"):
+            kwargs = loads(decryptedText)
         return cls(**kwargs)
 
     @classmethod
@@ -810,15 +1284,25 @@ class PlotData:
         self.region.setMovable(True)
 
     @classmethod
-    def fromSeries(cls, rowId: int, series: pandas.Series) -> "PlotData":
+    def fromSeries(
+        cls,
+        rowId: int,
+        series: pandas.Series,
+        energyCalibration: calculation.EnergyCalibration | None = None,
+    ) -> "PlotData":
+        energyCalibration = energyCalibration or calculation.getEnergyCalibration()
         active = bool(series["active"])
-        spectrumLine = cls._generateLine(series)
-        peakLine = cls._generateLine(series, lineType="peak")
-        rng = (
-            calculation.evToPx(float(series["low_kiloelectron_volt"])),
-            calculation.evToPx(float(series["high_kiloelectron_volt"])),
+        spectrumLine = cls._generateLine(series, energyCalibration)
+        peakLine = cls._generateLine(series, energyCalibration, lineType="peak")
+        rng = energyCalibration.evToPx(
+            [
+                float(series["low_kiloelectron_volt"]),
+                float(series["high_kiloelectron_volt"]),
+            ]
+        ).tolist()
+        region = cls._generateRegion(
+            rng, not bool(series["active"]), energyCalibration.channels
         )
-        region = cls._generateRegion(rng, not bool(series["active"]))
         try:
             conditionId = int(series["condition_id"])
         except ValueError:
@@ -829,9 +1313,11 @@ class PlotData:
 
     @staticmethod
     def _generateLine(
-        series: pandas.Series, lineType: str = "spectrum"
+        series: pandas.Series,
+        energyCalibration: calculation.EnergyCalibration,
+        lineType: str = "spectrum",
     ) -> pg.InfiniteLine:
-        value = calculation.evToPx(float(series["kiloelectron_volt"]))
+        value = float(energyCalibration.evToPx(float(series["kiloelectron_volt"])))
         line = pg.InfiniteLine()
         line.setAngle(90)
         line.setMovable(False)
@@ -869,11 +1355,13 @@ class PlotData:
 
     @staticmethod
     def _generateRegion(
-        rng: list[float, float] | tuple[float, float], movable: bool = True
+        rng: list[float, float] | tuple[float, float],
+        movable: bool = True,
+        channels: int = calculation.CHANNELS,
     ):
         region = pg.LinearRegionItem(swapMode="push")
         region.setZValue(10)
         region.setRegion(rng)
-        region.setBounds((0, 2048))
+        region.setBounds((0, channels))
         region.setMovable(movable)
         return region
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Sequence
+from scipy.special import erf
+
+from src.utils import calculation
+
+# Detector resolution, FWHM^2 = NOISE^2 + FANO_TERM * E (keV)
+NOISE = 0.08
+FANO_TERM = 2.355**2 * 0.115 * 0.00365
+FWHM_TO_SIGMA = 1 / (2 * np.sqrt(2 * np.log(2)))
+
+
+@dataclass
+class Cluster:
+    conditionId: int
+    start: int
+    stop: int
+    lineRows: np.ndarray
+    projection: np.ndarray
+    roiFractions: np.ndarray
+
+
+class PeakFitter:
+    """Fits overlapping active lines as Gaussian peaks on the background-free spectrum.
+
+    Active lines are grouped per condition into clusters of overlapping ROIs.
+    The design matrix of each cluster (one unit-area Gaussian per line plus a
+    linear baseline) only depends on the method, so its pseudo-inverse is built
+    once here and every fit is a single matrix product over all spectra.
+
+    Intensities are reported as the fitted counts of each line inside its own
+    ROI, so they stay on the scale of the ROI-sum coefficients while the
+    contribution of the overlapping lines is already removed.
+    """
+
+    def __init__(
+        self,
+        lines: pandas.DataFrame,
+        energyCalibration: calculation.EnergyCalibration | None = None,
+    ) -> None:
+        self._energyCalibration = (
+            energyCalibration or calculation.getEnergyCalibration()
+        )
+        self.lines = lines.query("active == 1").dropna(subset=["condition_id"])
+        self.lines = self.lines.reset_index(drop=True)
+        self.keys = (self.lines["symbol"] + "-" + self.lines["radiation_type"]).tolist()
+        self.clusters = []
+        for conditionId, group in self.lines.groupby("condition_id"):
+            self._buildClusters(int(conditionId), group)
+
+    @staticmethod
+    def sigma(kev: np.ndarray) -> np.ndarray:
+        return np.sqrt(NOISE**2 + FANO_TERM * np.clip(kev, 0, None)) * FWHM_TO_SIGMA
+
+    def _buildClusters(self, conditionId: int, group: pandas.DataFrame) -> None:
+        group = group.sort_values("low_kiloelectron_volt")
+        low = group["low_kiloelectron_volt"].to_numpy(dtype=float)
+        high = group["high_kiloelectron_volt"].to_numpy(dtype=float)
+        # A new cluster starts where a ROI begins after every previous ROI ended
+        reach = np.maximum.accumulate(high)
+        starts = np.flatnonzero(np.r_[True, low[1:] > reach[:-1]])
+        for rows in np.split(group.index.to_numpy(), starts[1:]):
+            self._addCluster(conditionId, rows)
+
+    def _addCluster(self, conditionId: int, rows: np.ndarray) -> None:
+        lines = self.lines.loc[rows]
+        lowChannels, highChannels = self._energyCalibration.roiChannels(
+            lines["low_kiloelectron_volt"].to_numpy(dtype=float),
+            lines["high_kiloelectron_volt"].to_numpy(dtype=float),
+        )
+        start, stop = int(lowChannels.min()), int(highChannels.max())
+        if stop - start <= rows.size + 2:
+            return
+        edges = self._energyCalibration.pxToEv(np.arange(start, stop + 1) - 0.5)
+        centers = lines["kiloelectron_volt"].to_numpy(dtype=float)
+        sigmas = self.sigma(centers)
+        # Unit-area Gaussians integrated over each channel
+        cdf = 0.5 * (1 + erf((edges[:, None] - centers) / (np.sqrt(2) * sigmas)))
+        peaks = np.diff(cdf, axis=0)
+        x = np.linspace(-1, 1, stop - start)
+        design = np.column_stack((peaks, np.ones_like(x), x))
+        roiFractions = np.array(
+            [
+                peaks[lo - start : hi - start, i].sum()
+                for i, (lo, hi) in enumerate(zip(lowChannels, highChannels))
+            ]
+        )
+        self.clusters.append(
+            Cluster(
+                conditionId,
+                start,
+                stop,
+                rows,
+                np.linalg.pinv(design)[: rows.size],
+                roiFractions,
+            )
+        )
+
+    @property
+    def conditionIds(self) -> list[int]:
+        return sorted({cluster.conditionId for cluster in self.clusters})
+
+    def fit(self, spectraByCondition: dict[int, np.ndarray]) -> np.ndarray:
+        """Returns the (spectra x active lines) fitted ROI intensities.
+
+        ``spectraByCondition`` maps a condition id to the (spectra x channels)
+        stack of that condition; every stack must have the same number of rows.
+        Lines whose condition is missing are left as NaN.
+        """
+        count = len(next(iter(spectraByCondition.values()), ()))
+        intensities = np.full((count, len(self.lines)), np.nan)
+        for cluster in self.clusters:
+            spectra = spectraByCondition.get(cluster.conditionId)
+            if spectra is None or spectra.shape[1] < cluster.stop:
+                continue
+            amplitudes = spectra[:, cluster.start : cluster.stop] @ cluster.projection.T
+            intensities[:, cluster.lineRows] = (
+                amplitudes.clip(0) * cluster.roiFractions
+            )
+        return intensities
+
+    def fitAnalyses(self, analyses: Sequence) -> list[dict]:
+        """Fits every analyse at once and returns their intensities per symbol."""
+        spectraByCondition = {}
+        # Spectra of any resolution are rebinned to the calibrated channels
+        channels = self._energyCalibration.channels
+        for conditionId in self.conditionIds:
+            stack = [analyse.getDataByConditionId(conditionId) for analyse in analyses]
+            if all(data is None for data in stack):
+                continue
+            spectra = np.full((len(stack), channels), np.nan)
+            for row, data in enumerate(stack):
+                if data is not None:
+                    spectra[row] = calculation.rebin(data.optimalY, channels)
+            spectraByCondition[conditionId] = spectra
+        intensities = self.fit(spectraByCondition) if spectraByCondition else None
+        results = []
+        for row in range(len(analyses)):
+            result = defaultdict(dict)
+            if intensities is not None:
+                for line, intensity in zip(
+                    self.lines.itertuples(index=False), intensities[row]
+                ):
+                    if not np.isnan(intensity):
+                        result[line.symbol][line.radiation_type] = float(intensity)
+            results.append(result)
+        return results
@@ -1,6 +1,6 @@
 from cryptography.fernet import Fernet
 
-from src.utils import paths
+from src.utils import paths, profiling
 
 
 def generateKeyToFile() -> None:
@@ -25,6 +25,7 @@ def encryptText(text: str, key: bytes) -> bytes:
     return encrypted
 
 
+@profiling.profiled("decrypt")
 def decryptText(text: str, key: bytes) -> str:
     fernet = Fernet(key)
     decrypted = fernet.decrypt(text).decode()
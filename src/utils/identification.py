@@ -0,0 +1,276 @@
+import numpy as np
+import pandas
+
+from typing import Sequence
+from scipy.ndimage import minimum_filter1d, uniform_filter1d
+
+from src.utils import calculation
+from src.utils.database import getDataframe
+
+# Weaker line of each family, with the plausible (weak / strong) intensity range
+RATIO_PAIRS = {"Ka": ("Kb", (0.05, 0.4)), "La": ("Lb", (0.2, 1.2))}
+# Absorption edge to line energy, used to judge the tube overvoltage
+EDGE_RATIOS = {"K": 1.12, "L": 1.16, "M": 1.2}
+OPTIMAL_OVERVOLTAGE = 2.5
+
+
+class PeakIdentifier:
+    """Detects peaks in whole stacks of spectra and maps them to candidate lines.
+
+    Every spectrum of every analyse is stacked into one (spectra x channels)
+    array so peak detection, line matching and scoring run as array operations
+    instead of per-line Python loops.
+
+    Args:
+        lines: Candidate lines, defaults to the Lines table.
+        conditions: Tube conditions used to judge excitation, defaults to the
+            Conditions table.
+        energyCalibration: Channel <-> keV model, defaults to the default profile.
+        tolerance: Maximum distance in keV between a peak and a matched line.
+        significance: Minimum net counts over the Poisson noise of the baseline.
+        window: Width in channels of the baseline minimum filter.
+        threshold: Minimum score for a line to be proposed as active.
+    """
+
+    def __init__(
+        self,
+        lines: pandas.DataFrame | None = None,
+        conditions: pandas.DataFrame | None = None,
+        energyCalibration: calculation.EnergyCalibration | None = None,
+        tolerance: float = 0.06,
+        significance: float = 5.0,
+        window: int = 31,
+        threshold: float = 0.35,
+    ) -> None:
+        self._lines = (lines if lines is not None else getDataframe("Lines")).copy()
+        self._conditions = (
+            conditions if conditions is not None else getDataframe("Conditions")
+        )
+        self._energyCalibration = (
+            energyCalibration or calculation.getEnergyCalibration()
+        )
+        self.tolerance = tolerance
+        self.significance = significance
+        self.window = window
+        self.threshold = threshold
+        self._buildEnergyIndex()
+
+    def _buildEnergyIndex(self) -> None:
+        self._lines.reset_index(drop=True, inplace=True)
+        energies = self._lines["kiloelectron_volt"].to_numpy(dtype=float)
+        self._order = np.argsort(energies, kind="stable")
+        self._energies = energies[self._order]
+        family = self._lines["radiation_type"].str[0]
+        self._edgeEnergies = energies * family.map(EDGE_RATIOS).fillna(1.0).to_numpy()
+
+    def detectPeaks(
+        self, spectra: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Returns (spectrum index, peak keV, net counts, signal to noise)."""
+        spectra = np.atleast_2d(np.asarray(spectra, dtype=float))
+        smoothed = uniform_filter1d(spectra, 3, axis=1, mode="nearest")
+        baseline = minimum_filter1d(smoothed, self.window, axis=1, mode="nearest")
+        baseline = uniform_filter1d(baseline, self.window, axis=1, mode="nearest")
+        net = smoothed - np.minimum(baseline, smoothed)
+        noise = np.sqrt(baseline.clip(0) + 1)
+        isMaximum = np.zeros(net.shape, dtype=bool)
+        isMaximum[:, 1:-1] = (net[:, 1:-1] > net[:, :-2]) & (net[:, 1:-1] >= net[:, 2:])
+        rows, channels = np.nonzero(isMaximum & (net > self.significance * noise))
+        # Parabolic refinement of the peak position between channels
+        left = net[rows, channels - 1]
+        center = net[rows, channels]
+        right = net[rows, channels + 1]
+        curvature = left - 2 * center + right
+        offset = np.divide(
+            0.5 * (left - right),
+            curvature,
+            out=np.zeros_like(center),
+            where=curvature != 0,
+        ).clip(-0.5, 0.5)
+        energies = self._energyCalibration.pxToEv(channels + offset)
+        return rows, energies, center, center / noise[rows, channels]
+
+    def matchPeaks(self, peakEnergies: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Returns (peak index, line row) for every line within the tolerance."""
+        low = np.searchsorted(self._energies, peakEnergies - self.tolerance, "left")
+        high = np.searchsorted(self._energies, peakEnergies + self.tolerance, "right")
+        counts = high - low
+        peakIndexes = np.repeat(np.arange(peakEnergies.size), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return peakIndexes, self._order[low[peakIndexes] + offsets]
+
+    def conditionSuitability(
+        self, lineRows: np.ndarray, conditionIds: np.ndarray
+    ) -> np.ndarray:
+        kilovolts = (
+            self._conditions.set_index("condition_id")["kilovolt"]
+            .reindex(conditionIds)
+            .to_numpy(dtype=float)
+        )
+        overvoltage = kilovolts / self._edgeEnergies[lineRows]
+        rising = (overvoltage - 1) / (OPTIMAL_OVERVOLTAGE - 1)
+        falling = np.sqrt(OPTIMAL_OVERVOLTAGE / overvoltage)
+        suitability = np.where(overvoltage < OPTIMAL_OVERVOLTAGE, rising, falling)
+        return np.nan_to_num(suitability, nan=0.0).clip(0, 1)
+
+    def _ratioConsistency(self, matches: pandas.DataFrame) -> np.ndarray:
+        consistency = np.ones(len(matches))
+        keys = ["spectrum", "symbol"]
+        for strong, (weak, (minRatio, maxRatio)) in RATIO_PAIRS.items():
+            strongMatches = matches[matches["radiation_type"] == strong]
+            weakMatches = matches[matches["radiation_type"] == weak]
+            strongBest = strongMatches.groupby(keys)["net"].max()
+            weakBest = weakMatches.groupby(keys)["net"].max()
+            ratio = (weakBest / strongBest.reindex(weakBest.index)).rename("ratio")
+            # Strong line: consistent if the weak line is missing or in range
+            strongRatio = ratio.reindex(
+                pandas.MultiIndex.from_frame(strongMatches[keys])
+            ).to_numpy()
+            strongScore = np.where(
+                np.isnan(strongRatio) | ((strongRatio >= minRatio) & (strongRatio <= maxRatio)),
+                1.0,
+                0.5,
+            )
+            # Weak line: implausible without its strong line
+            weakRatio = ratio.reindex(
+                pandas.MultiIndex.from_frame(weakMatches[keys])
+            ).to_numpy()
+            weakScore = np.where(
+                np.isnan(weakRatio),
+                0.3,
+                np.where((weakRatio >= minRatio) & (weakRatio <= maxRatio), 1.0, 0.5),
+            )
+            consistency[matches.index.get_indexer(strongMatches.index)] = strongScore
+            consistency[matches.index.get_indexer(weakMatches.index)] = weakScore
+        return consistency
+
+    def scoreMatches(
+        self, spectra: np.ndarray, conditionIds: np.ndarray
+    ) -> pandas.DataFrame:
+        """Scores every (spectrum, line) match of a stack of spectra."""
+        rows, energies, net, snr = self.detectPeaks(spectra)
+        peakIndexes, lineRows = self.matchPeaks(energies)
+        matches = pandas.DataFrame(
+            {
+                "spectrum": rows[peakIndexes],
+                "line": lineRows,
+                "symbol": self._lines["symbol"].to_numpy()[lineRows],
+                "radiation_type": self._lines["radiation_type"].to_numpy()[lineRows],
+                "condition_id": np.asarray(conditionIds)[rows[peakIndexes]],
+                "net": net[peakIndexes],
+                "distance": energies[peakIndexes]
+                - self._lines["kiloelectron_volt"].to_numpy(dtype=float)[lineRows],
+                "snr": snr[peakIndexes],
+            }
+        )
+        proximity = np.exp(-0.5 * (matches["distance"] / (self.tolerance / 2)) ** 2)
+        significance = 1 - np.exp(-matches["snr"] / (4 * self.significance))
+        suitability = self.conditionSuitability(
+            matches["line"].to_numpy(), matches["condition_id"].to_numpy()
+        )
+        matches["score"] = (
+            proximity * significance * suitability * self._ratioConsistency(matches)
+        )
+        return matches
+
+    @staticmethod
+    def stackSpectra(
+        analyses: Sequence, channels: int | None = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Stacks the optimalY of every condition of every analyse.
+
+        Spectra are rebinned to ``channels``, or zero padded to the longest
+        one if not given.
+        """
+        data = [(i, d) for i, analyse in enumerate(analyses) for d in analyse.data]
+        if channels is None:
+            channels = max((d.optimalY.size for _, d in data), default=0)
+            spectra = np.zeros((len(data), channels))
+            for row, (_, d) in enumerate(data):
+                spectra[row, : d.optimalY.size] = d.optimalY
+        else:
+            spectra = np.zeros((len(data), channels))
+            for row, (_, d) in enumerate(data):
+                spectra[row] = calculation.rebin(d.optimalY, channels)
+        analyseIndexes = np.array([i for i, _ in data], dtype=int)
+        conditionIds = np.array([d.conditionId for _, d in data], dtype=int)
+        return spectra, analyseIndexes, conditionIds
+
+    def identify(self, analyses: Sequence) -> pandas.DataFrame:
+        """Proposes, for every analyse, the lines to activate and their condition.
+
+        The result has one row per (analyse, line) with the best scoring
+        condition; ``active`` is set when the score reaches the threshold.
+        """
+        spectra, analyseIndexes, conditionIds = self.stackSpectra(
+            analyses, self._energyCalibration.channels
+        )
+        matches = self.scoreMatches(spectra, conditionIds)
+        matches["analyse"] = analyseIndexes[matches["spectrum"].to_numpy()]
+        best = (
+            matches.sort_values("score", ascending=False, kind="stable")
+            .drop_duplicates(["analyse", "line"])
+            .sort_values(["analyse", "line"])
+        )
+        lines = self._lines.iloc[best["line"].to_numpy()]
+        return pandas.DataFrame(
+            {
+                "analyse": best["analyse"].to_numpy(),
+                "line_id": lines["line_id"].to_numpy(),
+                "symbol": best["symbol"].to_numpy(),
+                "radiation_type": best["radiation_type"].to_numpy(),
+                "kiloelectron_volt": lines["kiloelectron_volt"].to_numpy(),
+                "condition_id": best["condition_id"].to_numpy(),
+                "score": best["score"].to_numpy(),
+                "active": (best["score"] >= self.threshold).to_numpy(),
+            }
+        )
+
+    def identifyCalibrations(
+        self, calibrations: Sequence, standardsOnly: bool = True
+    ) -> pandas.DataFrame:
+        """Runs ``identify`` over a calibration set in a single batch.
+
+        With ``standardsOnly`` the proposals of each calibration are limited to
+        the elements it certifies a concentration for.
+        """
+        calibrations = [c for c in calibrations if c.analyse is not None]
+        proposals = self.identify([c.analyse for c in calibrations])
+        proposals.insert(
+            0,
+            "filename",
+            np.array([c.filename for c in calibrations], dtype=object)[
+                proposals["analyse"].to_numpy()
+            ],
+        )
+        if standardsOnly:
+            certified = pandas.Series(
+                [set(c.concentrations) for c in calibrations]
+            ).iloc[proposals["analyse"].to_numpy()]
+            mask = [
+                symbol in elements
+                for symbol, elements in zip(proposals["symbol"], certified)
+            ]
+            proposals = proposals[mask]
+        return proposals.drop(columns="analyse").reset_index(drop=True)
+
+    @staticmethod
+    def applyProposals(
+        lines: pandas.DataFrame, proposals: pandas.DataFrame
+    ) -> pandas.DataFrame:
+        """Returns a copy of ``lines`` with the active proposals switched on.
+
+        When several calibrations propose the same line, the best scoring
+        proposal sets its condition.
+        """
+        lines = lines.copy()
+        active = proposals[proposals["active"]]
+        if "score" in active:
+            active = active.sort_values("score", ascending=False, kind="stable")
+        active = active.drop_duplicates("line_id").set_index("line_id")["condition_id"]
+        mask = lines["line_id"].isin(active.index)
+        lines.loc[mask, "active"] = 1
+        lines.loc[mask, "condition_id"] = (
+            lines.loc[mask, "line_id"].map(active).astype(float)
+        )
+        return lines
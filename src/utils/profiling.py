@@ -0,0 +1,256 @@
+"""Opt-in timing of the quantification pipeline stages.
+
+Set ``XRF_PROFILE=1`` (or call ``enable``) to record how often each stage
+runs and how long it takes. Stages are marked with ``stage`` or
+``profiled``; while profiling is off both cost a global lookup.
+
+``XRF_PROFILE_OUTPUT`` names a file the stages are written to on exit, as
+JSON or, with a ``.prof`` or ``.pstats`` suffix, as a ``pstats`` dump that
+``snakeviz`` or ``python -m pstats`` can open. Worker processes write next
+to it with their pid appended.
+"""
+
+import atexit
+import bisect
+import functools
+import marshal
+import math
+import multiprocessing
+import os
+import threading
+import time
+
+from contextlib import nullcontext
+from json import dumps
+
+STAGES = [
+    "decrypt",
+    "decode",
+    "dataframe",
+    "background",
+    "intensities",
+    "interferences",
+    "write",
+]
+# Upper bounds of the histogram buckets in seconds, 1 us to ~ 17 min by x2
+BUCKETS = [1e-6 * 2**i for i in range(31)]
+
+_NULL = nullcontext()
+_profiler = None
+
+
+class StageStats:
+    __slots__ = ["count", "total", "children", "minimum", "maximum", "histogram"]
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.children = 0.0
+        self.minimum = math.inf
+        self.maximum = 0.0
+        self.histogram = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds: float, children: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.children += children
+        self.minimum = min(self.minimum, seconds)
+        self.maximum = max(self.maximum, seconds)
+        self.histogram[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` percentile."""
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + [self.maximum], self.histogram):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def toHashableDict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "self": self.total - self.children,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.minimum if self.count else 0.0,
+            "max": self.maximum,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "histogram": self.histogram,
+        }
+
+
+class Profiler:
+    """Collects the stage timings of every thread of the process."""
+
+    def __init__(self) -> None:
+        self.stages = {}
+        # (caller stage, stage) -> [count, seconds], callers are None at the top
+        self.edges = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> list:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def enter(self, name: str) -> None:
+        # [name, start, seconds spent in nested stages]
+        self._stack().append([name, time.perf_counter(), 0.0])
+
+    def exit(self) -> None:
+        stack = self._stack()
+        name, start, children = stack.pop()
+        seconds = time.perf_counter() - start
+        caller = stack[-1][0] if stack else None
+        if stack:
+            stack[-1][2] += seconds
+        with self._lock:
+            if name not in self.stages:
+                self.stages[name] = StageStats()
+            self.stages[name].add(seconds, children)
+            edge = self.edges.setdefault((caller, name), [0, 0.0])
+            edge[0] += 1
+            edge[1] += seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "buckets": BUCKETS,
+                "stages": {
+                    name: stats.toHashableDict() for name, stats in self.stages.items()
+                },
+                "callers": [
+                    {"caller": caller, "stage": name, "count": c, "total": t}
+                    for (caller, name), (c, t) in self.edges.items()
+                ],
+            }
+
+    def pstats(self) -> dict:
+        """Stages in the ``pstats`` format, as if they were functions."""
+
+        def key(name: str) -> tuple:
+            return ("~", 0, f"<{name}>")
+
+        with self._lock:
+            stats = {}
+            for name, s in self.stages.items():
+                callers = {
+                    key(caller): (c, c, t, t)
+                    for (caller, stage), (c, t) in self.edges.items()
+                    if stage == name and caller is not None
+                }
+                stats[key(name)] = (
+                    s.count,
+                    s.count,
+                    s.total - s.children,
+                    s.total,
+                    callers,
+                )
+            return stats
+
+
+class _Stage:
+    __slots__ = ["profiler", "name"]
+
+    def __init__(self, profiler: Profiler, name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.profiler.enter(self.name)
+
+    def __exit__(self, *exc) -> None:
+        self.profiler.exit()
+
+
+def enable() -> Profiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler()
+    return _profiler
+
+
+def disable() -> None:
+    global _profiler
+    _profiler = None
+
+
+def isEnabled() -> bool:
+    return _profiler is not None
+
+
+def reset() -> None:
+    global _profiler
+    if _profiler is not None:
+        _profiler = Profiler()
+
+
+def stage(name: str):
+    """Context manager timing the enclosed block as ``name``."""
+    if _profiler is None:
+        return _NULL
+    return _Stage(_profiler, name)
+
+
+def profiled(name: str):
+    """Decorator timing every call of the function as ``name``."""
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = _profiler
+            if profiler is None:
+                return function(*args, **kwargs)
+            profiler.enter(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.exit()
+
+        return wrapper
+
+    return decorator
+
+
+def snapshot() -> dict | None:
+    return _profiler.snapshot() if _profiler is not None else None
+
+
+def dumpJson(path: str) -> None:
+    with open(path, "w") as f:
+        f.write(dumps(snapshot(), indent=2))
+
+
+def dumpStats(path: str) -> None:
+    """Writes a ``pstats`` compatible file, e.g. for ``pstats.Stats(path)``."""
+    with open(path, "wb") as f:
+        marshal.dump(_profiler.pstats() if _profiler is not None else {}, f)
+
+
+def dump(path: str) -> None:
+    if path.endswith((".prof", ".pstats")):
+        dumpStats(path)
+    else:
+        dumpJson(path)
+
+
+def _dumpOnExit(path: str) -> None:
+    if _profiler is None or not _profiler.stages:
+        return
+    if multiprocessing.parent_process() is not None:
+        root, extension = os.path.splitext(path)
+        path = f"{root}-{os.getpid()}{extension}"
+    dump(path)
+
+
+if os.environ.get("XRF_PROFILE", "").lower() not in ["", "0", "false", "no"]:
+    enable()
+    if output := os.environ.get("XRF_PROFILE_OUTPUT"):
+        atexit.register(_dumpOnExit, output)
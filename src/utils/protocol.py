@@ -0,0 +1,189 @@
+import asyncio
+import socket
+import struct
+import numpy as np
+
+from dataclasses import dataclass
+from json import dumps, loads
+
+from src.utils import profiling
+
+# Binary frames start with MAGIC so they can share the port with the text
+# protocol, whose commands are 4 ASCII characters such as "-als".
+MAGIC = b"XRFB"
+# magic, command, request id, payload length
+HEADER = struct.Struct("!4s4sIQ")
+METADATA_LENGTH = struct.Struct("!I")
+STOP_MARKER = b"-stp"
+PEEK_SIZE = 65536
+
+
+@dataclass
+class Frame:
+    command: str
+    requestId: int
+    payload: memoryview
+
+    def text(self) -> str:
+        return str(self.payload, "utf-8")
+
+    def json(self):
+        return loads(str(self.payload, "utf-8")) if len(self.payload) else None
+
+
+def recvExactly(connection: socket.socket, size: int) -> memoryview:
+    """Reads exactly ``size`` bytes into one preallocated buffer."""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = connection.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ConnectionError(
+                f"Connection closed after {received} of {size} bytes"
+            )
+        received += count
+    return view
+
+
+def readFrame(connection: socket.socket, magicRead: bool = False) -> Frame:
+    """Reads one binary frame.
+
+    With ``magicRead`` the caller has already consumed the 4 magic bytes, as
+    the text command loop does to tell both protocols apart.
+    """
+    if magicRead:
+        header = MAGIC + bytes(recvExactly(connection, HEADER.size - len(MAGIC)))
+    else:
+        header = bytes(recvExactly(connection, HEADER.size))
+    magic, command, requestId, length = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"Invalid frame magic: {magic!r}")
+    payload = recvExactly(connection, length) if length else memoryview(b"")
+    return Frame(command.decode("ascii"), requestId, payload)
+
+
+def packHeader(command: str, requestId: int, length: int) -> bytes:
+    encoded = command.encode("ascii")
+    if len(encoded) != 4:
+        raise ValueError(f"Frame commands are 4 characters long, got {command!r}")
+    return HEADER.pack(MAGIC, encoded, requestId, length)
+
+
+def writeFrame(
+    connection: socket.socket,
+    command: str,
+    requestId: int,
+    payload: bytes | bytearray | memoryview | str = b"",
+) -> None:
+    header, payload = frameBytes(command, requestId, payload)
+    connection.sendall(header)
+    if len(payload):
+        connection.sendall(payload)
+
+
+def recvUntilMarker(
+    connection: socket.socket, marker: bytes = STOP_MARKER
+) -> memoryview:
+    """Reads a text protocol message terminated by ``marker``.
+
+    Incoming bytes are peeked first so nothing after the marker (the next
+    command) is consumed, then the message is read in one ``recv_into``
+    pass. The marker is searched in raw bytes, so it may be split across
+    reads, as may multi-byte UTF-8 characters.
+    """
+    buffer = bytearray()
+    while True:
+        peeked = connection.recv(PEEK_SIZE, socket.MSG_PEEK)
+        if not peeked:
+            raise ConnectionError("Connection closed before the stop marker")
+        # Part of the marker may already sit at the end of the buffer
+        tail = bytes(buffer[-(len(marker) - 1) :]) if buffer else b""
+        index = (tail + peeked).find(marker)
+        if index == -1:
+            size = len(peeked)
+        else:
+            size = index - len(tail) + len(marker)
+        start = len(buffer)
+        buffer.extend(bytes(size))
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            count = connection.recv_into(view[start + received :], size - received)
+            if count == 0:
+                raise ConnectionError("Connection closed before the stop marker")
+            received += count
+        view.release()
+        if index != -1:
+            return memoryview(buffer)[: -len(marker)]
+
+
+async def readFrameAsync(
+    reader: asyncio.StreamReader, magicRead: bool = False
+) -> Frame:
+    """``readFrame`` for asyncio streams."""
+    size = HEADER.size - len(MAGIC) if magicRead else HEADER.size
+    header = await reader.readexactly(size)
+    if magicRead:
+        header = MAGIC + header
+    magic, command, requestId, length = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"Invalid frame magic: {magic!r}")
+    payload = await reader.readexactly(length) if length else b""
+    return Frame(command.decode("ascii"), requestId, memoryview(payload))
+
+
+async def readUntilMarkerAsync(
+    reader: asyncio.StreamReader, marker: bytes = STOP_MARKER
+) -> memoryview:
+    """``recvUntilMarker`` for asyncio streams."""
+    received = await reader.readuntil(marker)
+    return memoryview(received)[: -len(marker)]
+
+
+def frameBytes(
+    command: str, requestId: int, payload: bytes | bytearray | memoryview | str = b""
+) -> list:
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    return [packHeader(command, requestId, len(payload)), payload]
+
+
+def encodeAnalyse(hashableDict: dict) -> bytes:
+    """Packs an analyse as JSON metadata followed by raw spectrum buffers.
+
+    Every ``data`` entry keeps its ``conditionId`` in the metadata together with
+    the dtype and channel count of its ``y`` buffer.
+    """
+    metadata = {k: v for k, v in hashableDict.items() if k != "data"}
+    buffers = []
+    metadata["data"] = []
+    for data in hashableDict["data"]:
+        y = np.ascontiguousarray(data["y"])
+        y = y.astype(y.dtype.newbyteorder("<"), copy=False)
+        metadata["data"].append(
+            {"conditionId": data["conditionId"], "dtype": y.dtype.str, "size": y.size}
+        )
+        buffers.append(y.tobytes())
+    encoded = dumps(metadata).encode("utf-8")
+    return b"".join([METADATA_LENGTH.pack(len(encoded)), encoded, *buffers])
+
+
+@profiling.profiled("decode")
+def decodeAnalyse(payload: bytes | bytearray | memoryview) -> dict:
+    """Unpacks ``encodeAnalyse`` payloads into an analyse hashable dict.
+
+    Spectra are numpy views on the payload buffer, nothing is copied.
+    """
+    (length,) = METADATA_LENGTH.unpack_from(payload)
+    offset = METADATA_LENGTH.size
+    metadata = loads(str(payload[offset : offset + length], "utf-8"))
+    offset += length
+    for data in metadata["data"]:
+        dtype = np.dtype(data.pop("dtype"))
+        size = data.pop("size")
+        data["y"] = np.frombuffer(payload, dtype, size, offset)
+        offset += dtype.itemsize * size
+    if offset != len(payload):
+        raise ValueError(f"Analyse payload has {len(payload) - offset} extra bytes")
+    return metadata
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+class MinMaxPyramid:
+    """Extrema of spectra over blocks of 2, 4, 8, ... channels.
+
+    Level ``k`` holds the minimum and the maximum of every block of ``2 ** k``
+    channels, level 0 is the counts themselves. Drawing a range of channels
+    on a number of pixels reads the coarsest level that still has a block per
+    pixel, so zooming and panning cost work proportional to the width of the
+    view rather than to the channel count.
+
+    Several spectra of the same length are held as the rows of one pyramid,
+    see ``stack``. Levels are computed on first use.
+    """
+
+    def __init__(self, ys: np.ndarray) -> None:
+        self.source = ys
+        self.ys = np.atleast_2d(np.asarray(ys, dtype=float))
+        self._levels = [(self.ys, self.ys)]
+        self._extrema = None
+
+    @property
+    def channels(self) -> int:
+        return self.ys.shape[1]
+
+    @property
+    def rows(self) -> int:
+        return self.ys.shape[0]
+
+    @classmethod
+    def stack(cls, pyramids: list["MinMaxPyramid"]) -> "MinMaxPyramid":
+        """One pyramid of the rows of ``pyramids``, reusing their levels."""
+        if len(pyramids) == 1:
+            return pyramids[0]
+        stacked = cls(np.vstack([p.ys for p in pyramids]))
+        depth = max(len(p._levels) for p in pyramids)
+        for level in range(1, depth):
+            levels = [p.level(level) for p in pyramids]
+            stacked._levels.append(
+                (np.vstack([m for m, _ in levels]), np.vstack([m for _, m in levels]))
+            )
+        return stacked
+
+    def extrema(self) -> tuple[float, float]:
+        """Smallest and largest counts of all rows, (0, 0) when empty."""
+        if self._extrema is None:
+            self._extrema = (
+                (float(self.ys.min()), float(self.ys.max())) if self.ys.size else (0, 0)
+            )
+        return self._extrema
+
+    def level(self, level: int) -> tuple[np.ndarray, np.ndarray]:
+        """Minima and maxima of the blocks of ``2 ** level`` channels."""
+        while len(self._levels) <= level:
+            minima, maxima = self._levels[-1]
+            if minima.shape[1] % 2:
+                minima = np.concatenate((minima, minima[:, -1:]), axis=1)
+                maxima = np.concatenate((maxima, maxima[:, -1:]), axis=1)
+            self._levels.append(
+                (
+                    np.minimum(minima[:, 0::2], minima[:, 1::2]),
+                    np.maximum(maxima[:, 0::2], maxima[:, 1::2]),
+                )
+            )
+        return self._levels[level]
+
+    def levelFor(self, channels: int, pixels: int) -> int:
+        """Coarsest level with at least one block per pixel over ``channels``."""
+        if channels <= pixels or pixels < 1:
+            return 0
+        depth = max(int(np.ceil(np.log2(max(self.channels, 1)))), 0)
+        return min(int(np.log2(channels / pixels)), depth)
+
+    def vertices(
+        self, start: int, stop: int, pixels: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vertices drawing channels ``start`` to ``stop`` on ``pixels`` columns.
+
+        A block of a coarse level gives two vertices, its maximum and its
+        minimum at the centre of the block.
+
+        Returns:
+            The x, y and connect arrays of the vertices of every row, connect
+            is 0 on the last vertex of each row.
+        """
+        level = self.levelFor(stop - start, pixels)
+        if level == 0:
+            ys = self.ys[:, start:stop]
+            x = np.arange(start, start + ys.shape[1], dtype=float)
+        else:
+            size = 1 << level
+            first, last = start // size, -(-stop // size)
+            minima, maxima = self.level(level)
+            count = minima[:, first:last].shape[1]
+            ys = np.empty((self.rows, count, 2))
+            ys[..., 0] = maxima[:, first:last]
+            ys[..., 1] = minima[:, first:last]
+            ys = ys.reshape(self.rows, 2 * count)
+            x = np.repeat((first + np.arange(count)) * size + (size - 1) / 2, 2)
+        connect = np.ones(ys.shape, dtype=np.int32)
+        connect[:, -1:] = 0
+        return np.tile(x, self.rows), ys.ravel(), connect.ravel()
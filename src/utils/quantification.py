@@ -0,0 +1,89 @@
+import os
+import threading
+
+from json import dumps
+
+from src.utils import protocol
+from src.utils.datatypes import Analyse, BackgroundProfile, Method
+from src.utils.paths import resourcePath
+from src.utils.registry import getMethodRegistry
+
+# Keys of a quantification request besides the analyse itself
+REQUEST_KEYS = ["method", "profile", "mode"]
+# Concentrations from the region sums or from the fitted peaks
+MODES = ["roi", "fit"]
+
+_profiles = {}
+_cacheLock = threading.Lock()
+
+
+def getMethod(methodName: str) -> Method:
+    return getMethodRegistry().method(methodName)
+
+
+def getBackgroundProfile(profileName: str) -> BackgroundProfile:
+    """Returns a profile, read again once its ``.atxb`` file has been saved."""
+    filePath = resourcePath(f"backgrounds/{profileName}.atxb")
+    try:
+        mtime = os.stat(filePath).st_mtime_ns
+    except OSError:
+        raise KeyError(f"Unknown background profile: {profileName}") from None
+    with _cacheLock:
+        cached = _profiles.get(profileName)
+        if cached is None or cached[0] != mtime:
+            cached = _profiles[profileName] = (
+                mtime,
+                BackgroundProfile.fromATXBFile(filePath),
+            )
+        return cached[1]
+
+
+def clearCache() -> None:
+    global _profiles
+    with _cacheLock:
+        _profiles = {}
+    getMethodRegistry().invalidate()
+
+
+def quantify(
+    analyse: Analyse,
+    methodName: str,
+    profileName: str | None = None,
+    mode: str = "roi",
+) -> dict:
+    """Returns the concentration table of an analyse with a cached method.
+
+    Raises:
+        ValueError: If ``mode`` is not one of ``MODES``.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown quantification mode: {mode}")
+    method = getMethod(methodName)
+    if profileName:
+        analyse.backgroundProfile = getBackgroundProfile(profileName)
+    return {
+        "filename": analyse.filename,
+        "method": methodName,
+        "profile": profileName or None,
+        "mode": mode,
+        "concentrations": analyse.calculateConcentrations(method, mode),
+    }
+
+
+def quantifyRequest(request: dict) -> bytes:
+    """Quantifies an analyse hashable dict carrying the ``REQUEST_KEYS``."""
+    kwargs = {key: request.pop(key) for key in REQUEST_KEYS if key in request}
+    if "method" not in kwargs:
+        raise KeyError("Quantification requests need a method")
+    analyse = Analyse.fromHashableDict(request)
+    result = quantify(
+        analyse,
+        kwargs["method"],
+        kwargs.get("profile"),
+        kwargs.get("mode") or "roi",
+    )
+    return dumps(result).encode("utf-8")
+
+
+def quantifyBinary(payload: bytes | bytearray | memoryview) -> bytes:
+    return quantifyRequest(protocol.decodeAnalyse(payload))
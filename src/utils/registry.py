@@ -0,0 +1,101 @@
+import os
+import threading
+
+from dataclasses import dataclass
+
+from src.utils.datatypes import Method
+from src.utils.paths import resourcePath
+
+
+@dataclass
+class MethodEntry:
+    method: Method
+    mtime: int | None
+    forVB: bytes
+
+
+class MethodRegistry:
+    """Keeps decoded methods and their serialized VB payloads in memory.
+
+    An entry is reused as long as the modification time of its ``.atxm`` file
+    is unchanged, so a fresh lookup costs a single ``stat``. Saves from the GUI
+    replace the entry directly with ``update``. Building an entry also builds
+    the method's peak fitter, so quantification never pays for it per request.
+    """
+
+    def __init__(self) -> None:
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def methodPath(methodName: str) -> str:
+        return resourcePath(f"methods/{methodName}.atxm")
+
+    def _mtime(self, methodName: str) -> int | None:
+        try:
+            return os.stat(self.methodPath(methodName)).st_mtime_ns
+        except OSError:
+            return None
+
+    def _build(self, method: Method, mtime: int | None) -> MethodEntry:
+        method.peakFitter()
+        return MethodEntry(method, mtime, method.forVB().encode("utf-8"))
+
+    def cached(self, methodName: str) -> MethodEntry | None:
+        """Returns the entry if it is still fresh, without loading anything."""
+        entry = self._entries.get(methodName)
+        if entry is not None and entry.mtime == self._mtime(methodName):
+            return entry
+        return None
+
+    def get(self, methodName: str) -> MethodEntry:
+        """Returns the fresh entry of a method, decrypting it again if needed.
+
+        Methods saved after the server started are found as well, the file
+        decides whether a method exists rather than the Methods table loaded
+        at import.
+
+        Raises:
+            KeyError: If the method has no ``.atxm`` file.
+        """
+        if (entry := self.cached(methodName)) is not None:
+            return entry
+        with self._lock:
+            if (entry := self.cached(methodName)) is not None:
+                return entry
+            mtime = self._mtime(methodName)
+            if mtime is None or os.path.basename(methodName) != methodName:
+                raise KeyError(f"Unknown method: {methodName}")
+            method = Method.fromATXMFile(self.methodPath(methodName))
+            entry = self._build(method, mtime)
+            self._entries[methodName] = entry
+            return entry
+
+    def method(self, methodName: str) -> Method:
+        return self.get(methodName).method
+
+    def forVB(self, methodName: str) -> bytes:
+        return self.get(methodName).forVB
+
+    def update(self, method: Method) -> None:
+        """Replaces the entry of a method that was just saved."""
+        entry = self._build(method.copy(), self._mtime(method.filename))
+        with self._lock:
+            self._entries[method.filename] = entry
+
+    def invalidate(self, methodName: str | None = None) -> None:
+        with self._lock:
+            if methodName is None:
+                self._entries = {}
+            else:
+                self._entries.pop(methodName, None)
+
+
+_methodRegistry = None
+
+
+def getMethodRegistry() -> MethodRegistry:
+    global _methodRegistry
+    if _methodRegistry is None:
+        _methodRegistry = MethodRegistry()
+    return _methodRegistry
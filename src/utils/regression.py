@@ -0,0 +1,130 @@
+import numpy as np
+import pandas
+
+from dataclasses import dataclass, field
+
+
+@dataclass
+class RegressionResult:
+    """Zero-intercept fits of many groups, indexed by group.
+
+    ``slopes`` and ``uncertainties`` are multiplied by ``scale``, ``rss`` is
+    the weighted residual sum of squares of each group in units of y.
+    """
+
+    keys: pandas.Index
+    slopes: np.ndarray
+    uncertainties: np.ndarray
+    counts: np.ndarray
+    rss: np.ndarray
+    scale: float = 1.0
+
+    def toSeries(self) -> pandas.Series:
+        return pandas.Series(self.slopes, index=self.keys)
+
+    def uncertaintySeries(self) -> pandas.Series:
+        return pandas.Series(self.uncertainties, index=self.keys)
+
+    def rssSeries(self) -> pandas.Series:
+        return pandas.Series(self.rss, index=self.keys)
+
+    def residuals(self, keys: list, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Residuals ``y - slope * x`` of observations, NaN for unknown keys."""
+        positions = self.keys.get_indexer(pandas.Index(list(keys)))
+        slopes = np.append(self.slopes / self.scale, np.nan)[positions]
+        return np.asarray(y, dtype=float) - slopes * np.asarray(x, dtype=float)
+
+
+@dataclass
+class RegressionStatistics:
+    """Running sufficient statistics of zero-intercept fits, one row per key.
+
+    Observations can be added or removed at any time, so a fit over many
+    calibrations is updated in O(keys) when a single calibration changes.
+    The sums are weighted, Σw·x·y, Σw·x² and Σw·y², and solved with weighted
+    least squares.
+    """
+
+    names: list[str]
+    sums: pandas.DataFrame | None = field(default=None, repr=False)
+
+    COLUMNS = ["sxy", "sxx", "syy", "count"]
+
+    def __post_init__(self):
+        if self.sums is None:
+            self.sums = pandas.DataFrame(
+                columns=self.COLUMNS,
+                index=self._makeIndex([]),
+                dtype=float,
+            )
+
+    def _makeIndex(self, keys: list) -> pandas.Index:
+        if len(self.names) == 1:
+            return pandas.Index(keys, name=self.names[0], dtype=object)
+        if not keys:
+            return pandas.MultiIndex.from_arrays(
+                [[] for _ in self.names], names=self.names
+            )
+        return pandas.MultiIndex.from_tuples(keys, names=self.names)
+
+    def update(
+        self,
+        keys: list,
+        x: np.ndarray,
+        y: np.ndarray,
+        sign: int = 1,
+        weights: np.ndarray | None = None,
+    ) -> None:
+        """Adds (sign=1) or removes (sign=-1) observations.
+
+        Removing observations takes the weights they were added with.
+        """
+        if not len(keys):
+            return
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        w = np.ones_like(x) if weights is None else np.asarray(weights, dtype=float)
+        observations = pandas.DataFrame(
+            {"sxy": w * x * y, "sxx": w * x * x, "syy": w * y * y, "count": 1.0},
+            index=self._makeIndex(list(keys)),
+        )
+        observations = observations.groupby(level=self.names, sort=False).sum()
+        self.sums = self.sums.add(sign * observations, fill_value=0)
+        self.sums = self.sums[self.sums["count"] > 0.5]
+
+    def result(
+        self, keys: pandas.Index | None = None, scale: float = 1.0
+    ) -> RegressionResult:
+        """Solves the fits of ``keys`` (every key by default) from the sums."""
+        sums = self.sums if keys is None else self.sums[self.sums.index.isin(keys)]
+        sxy = sums["sxy"].to_numpy()
+        sxx = sums["sxx"].to_numpy()
+        counts = sums["count"].to_numpy().round().astype(int)
+        slopes = np.divide(sxy, sxx, out=np.full(len(sums), np.nan), where=sxx != 0)
+        # Weighted residual sum of squares of a zero-intercept fit:
+        # Syy - Sxy^2 / Sxx
+        rss = (sums["syy"].to_numpy() - slopes * sxy).clip(0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variance = np.where(counts > 1, rss / (counts - 1), np.nan)
+            uncertainties = np.sqrt(variance / sxx)
+        return RegressionResult(
+            sums.index, slopes * scale, uncertainties * scale, counts, rss, scale
+        )
+
+    def copy(self) -> "RegressionStatistics":
+        return RegressionStatistics(list(self.names), self.sums.copy())
+
+    def toHashableDict(self) -> dict:
+        return {
+            "names": self.names,
+            "sums": self.sums.reset_index().to_dict(orient="list"),
+        }
+
+    @classmethod
+    def fromHashableDict(cls, kwargs: dict | None) -> "RegressionStatistics | None":
+        if kwargs is None:
+            return None
+        names = kwargs["names"]
+        sums = pandas.DataFrame(kwargs["sums"], columns=names + cls.COLUMNS)
+        sums = sums.astype({column: float for column in cls.COLUMNS})
+        return cls(names, sums.set_index(names))
@@ -0,0 +1,266 @@
+"""Background computation for recomputes triggered from the GUI.
+
+Slots submit their heavy work to the shared ``ComputeScheduler`` under a key
+naming the source, e.g. ``(widget, "background-region")``. A source has at
+most one job running: a request arriving meanwhile waits, replacing any
+request that was already waiting, and the result of a job that has been
+superseded is dropped. Dragging a region therefore computes the first and
+the latest position instead of every intermediate one.
+
+Interactive edits can also ask for a ``preview``, a cheaper approximation
+computed under its own key: it supersedes the work of the key, and the next
+result of the key supersedes it in turn. A drag previews every step at
+display rate and submits the full computation once released.
+
+Callbacks run in the GUI thread, results are delivered through a queued
+signal. ``BatchLoader`` maps a function over many inputs, e.g. files to
+open, and delivers the results in batches.
+"""
+
+import logging
+import os
+import queue
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Hashable
+
+from PyQt6 import QtCore
+
+_scheduler = None
+
+
+@dataclass
+class ComputeJob:
+    generation: int
+    function: Callable
+    args: tuple
+    callback: Callable | None
+    errorCallback: Callable | None
+
+
+@dataclass
+class _Source:
+    generation: int = 0
+    running: bool = False
+    pending: ComputeJob | None = field(default=None)
+
+
+class ComputeScheduler(QtCore.QObject):
+    """Runs GUI triggered recomputes on a thread pool.
+
+    Jobs share the objects of the GUI, the functions should compute from
+    them and leave the changes to their callback, which runs in the GUI
+    thread once the job is done.
+    """
+
+    _finished = QtCore.pyqtSignal(object, object, object, object)
+
+    def __init__(
+        self, parent: QtCore.QObject | None = None, maxWorkers: int | None = None
+    ) -> None:
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(
+            maxWorkers or min(4, os.cpu_count() or 1), "compute"
+        )
+        self._sources = {}
+        self._counters = {"submitted": 0, "coalesced": 0, "dropped": 0}
+        self._finished.connect(
+            self._deliver, QtCore.Qt.ConnectionType.QueuedConnection
+        )
+
+    def submit(
+        self,
+        key: Hashable,
+        function: Callable,
+        *args,
+        callback: Callable | None = None,
+        errorCallback: Callable | None = None,
+    ) -> None:
+        """Computes ``function(*args)`` and passes the result to ``callback``.
+
+        Supersedes the jobs of ``key`` submitted before, their results are
+        not delivered. ``errorCallback`` gets the exception if the function
+        raises, the error is logged otherwise.
+        """
+        source = self._sources.setdefault(key, _Source())
+        source.generation += 1
+        job = ComputeJob(source.generation, function, args, callback, errorCallback)
+        self._counters["submitted"] += 1
+        if source.running:
+            if source.pending is not None:
+                self._counters["coalesced"] += 1
+            source.pending = job
+        else:
+            self._start(key, source, job)
+
+    def preview(
+        self,
+        key: Hashable,
+        function: Callable,
+        *args,
+        callback: Callable | None = None,
+        errorCallback: Callable | None = None,
+    ) -> None:
+        """Submits a fast approximation of the work of ``key``.
+
+        The jobs of ``key`` are cancelled, and a later result of ``key``
+        drops the preview if it is not delivered yet.
+        """
+        self.cancel(key)
+        self.submit(
+            (key, "preview"),
+            function,
+            *args,
+            callback=callback,
+            errorCallback=errorCallback,
+        )
+
+    def cancel(self, key: Hashable) -> None:
+        """Drops the waiting job of ``key`` and the result of the running one."""
+        if (source := self._sources.get(key)) is None:
+            return
+        source.generation += 1
+        source.pending = None
+        if not source.running:
+            del self._sources[key]
+
+    def isBusy(self, key: Hashable) -> bool:
+        return key in self._sources
+
+    def stats(self) -> dict:
+        return dict(self._counters, sources=len(self._sources))
+
+    def shutdown(self) -> None:
+        for key in list(self._sources):
+            self.cancel(key)
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _start(self, key: Hashable, source: _Source, job: ComputeJob) -> None:
+        source.running = True
+        source.pending = None
+        self._executor.submit(self._run, key, job)
+
+    def _run(self, key: Hashable, job: ComputeJob) -> None:
+        try:
+            result, error = job.function(*job.args), None
+        except Exception as e:
+            result, error = None, e
+        self._finished.emit(key, job, result, error)
+
+    @QtCore.pyqtSlot(object, object, object, object)
+    def _deliver(self, key: Hashable, job: ComputeJob, result, error) -> None:
+        source = self._sources[key]
+        source.running = False
+        if job.generation != source.generation:
+            self._counters["dropped"] += 1
+        elif error is not None:
+            if job.errorCallback is not None:
+                job.errorCallback(error)
+            else:
+                logging.error(f"Computation {key} failed: {error}")
+        else:
+            self.cancel((key, "preview"))
+            if job.callback is not None:
+                job.callback(result)
+        # The callback may have submitted or cancelled jobs of the key itself
+        if source.running:
+            return
+        if source.pending is not None:
+            self._start(key, source, source.pending)
+        elif self._sources.get(key) is source:
+            del self._sources[key]
+
+
+def getComputeScheduler() -> ComputeScheduler:
+    """Scheduler shared by the widgets, created on first use."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ComputeScheduler()
+    return _scheduler
+
+
+class BatchLoader(QtCore.QObject):
+    """Maps ``function`` over many inputs on a thread pool.
+
+    Results are handed to the GUI thread in batches, at most ``batchSize``
+    every ``interval`` milliseconds, so that inserting them keeps the window
+    responsive. A batch lists ``(input, result, error)`` in completion order.
+    """
+
+    batchLoaded = QtCore.pyqtSignal(list)
+    progressed = QtCore.pyqtSignal(int, int)
+    finished = QtCore.pyqtSignal()
+
+    def __init__(
+        self,
+        function: Callable,
+        parent: QtCore.QObject | None = None,
+        maxWorkers: int | None = None,
+        interval: int = 50,
+        batchSize: int = 25,
+    ) -> None:
+        super().__init__(parent)
+        self._function = function
+        self._executor = ThreadPoolExecutor(
+            maxWorkers or min(8, (os.cpu_count() or 1) + 4), "loader"
+        )
+        self._batchSize = batchSize
+        self._completed = queue.SimpleQueue()
+        self._futures = []
+        self._total = 0
+        self._done = 0
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._flush)
+
+    def load(self, inputs: list) -> None:
+        """Queues ``inputs``, added to those of a load still running."""
+        for value in inputs:
+            future = self._executor.submit(self._function, value)
+            future.add_done_callback(partial(self._complete, value))
+            self._futures.append(future)
+        self._total += len(inputs)
+        self._timer.start()
+
+    def cancel(self) -> None:
+        """Drops the inputs not decoded yet, finished results still arrive."""
+        for future in self._futures:
+            future.cancel()
+
+    def isRunning(self) -> bool:
+        return self._done < self._total
+
+    def shutdown(self) -> None:
+        self.cancel()
+        self._executor.shutdown(wait=True)
+
+    def _complete(self, value, future: Future) -> None:
+        if future.cancelled():
+            self._completed.put((value, None, None, True))
+        elif (error := future.exception()) is not None:
+            self._completed.put((value, None, error, False))
+        else:
+            self._completed.put((value, future.result(), None, False))
+
+    def _flush(self) -> None:
+        batch = []
+        done = self._done
+        while len(batch) < self._batchSize:
+            try:
+                value, result, error, cancelled = self._completed.get_nowait()
+            except queue.Empty:
+                break
+            done += 1
+            if not cancelled:
+                batch.append((value, result, error))
+        self._done = done
+        if batch:
+            self.batchLoaded.emit(batch)
+        self.progressed.emit(self._done, self._total)
+        if self._done == self._total:
+            self._timer.stop()
+            self._futures = []
+            self._total = self._done = 0
+            self.finished.emit()
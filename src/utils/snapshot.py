@@ -0,0 +1,243 @@
+"""Snapshots of model objects for unsaved-change checks and undo.
+
+A ``FrameSnapshot`` freezes the columns of a table as read-only arrays.
+Recording an edit with ``update`` copies only the columns the edited rows
+changed and shares every other column with the previous snapshot, so a
+history of edits holds one copy of the table plus the changed columns.
+Comparing two snapshots of a history skips the columns they share.
+
+A ``Snapshot`` holds the state of an ``Analyse``, ``Calibration`` or
+``Method``: its plain attributes, its tables as frame snapshots, and the
+model objects it refers to by identity and version instead of by copy.
+``changes`` lists what an object changed since, down to the rows of its
+tables, and ``restore`` writes back only those. ``History`` keeps the undo
+and redo stacks of either kind.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Mapping, Sequence
+
+import numpy as np
+import pandas
+
+
+def _frozen(values) -> np.ndarray:
+    array = np.array(values)
+    array.setflags(write=False)
+    return array
+
+
+def _copied(value):
+    return value.copy() if isinstance(value, (dict, list, set)) else value
+
+
+def _differing(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Positions where ``a`` and ``b`` differ, missing values being equal."""
+    return np.flatnonzero(
+        ~(np.asarray(a == b, dtype=bool) | (pandas.isna(a) & pandas.isna(b)))
+    )
+
+
+class FrameSnapshot:
+    """Read-only copy of the columns of a table.
+
+    The table is a DataFrame or any mapping of names to sequences of the
+    same length, e.g. the columns of a DataFrame and a list of flags.
+    """
+
+    def __init__(self, columns: dict[str, np.ndarray], index=None) -> None:
+        self.columns = columns
+        self.index = index
+
+    @classmethod
+    def take(cls, frame: pandas.DataFrame | Mapping) -> "FrameSnapshot":
+        index = frame.index if isinstance(frame, pandas.DataFrame) else None
+        return cls({name: _frozen(frame[name]) for name in frame.keys()}, index)
+
+    def update(
+        self, frame: pandas.DataFrame | Mapping, rows: Sequence[int]
+    ) -> "FrameSnapshot":
+        """Snapshot of ``frame`` after an edit of the positions ``rows``.
+
+        The other rows are assumed unchanged, the columns whose ``rows``
+        still hold their values are shared with this snapshot.
+        """
+        rows = np.asarray(rows, dtype=int)
+        columns = dict(self.columns)
+        for name, array in self.columns.items():
+            values = np.asarray(frame[name])[rows]
+            if _differing(array[rows], values).size:
+                array = array.copy()
+                array[rows] = values
+                array.setflags(write=False)
+                columns[name] = array
+        return FrameSnapshot(columns, self.index)
+
+    def changes(self, other: "FrameSnapshot") -> dict[str, np.ndarray]:
+        """Rows of each column that differ in ``other``, shared ones skipped."""
+        changes = {}
+        for name, array in self.columns.items():
+            otherArray = other.columns[name]
+            if otherArray is array:
+                continue
+            if (rows := _differing(array, otherArray)).size:
+                changes[name] = rows
+        return changes
+
+    def rowChanges(
+        self, frame: pandas.DataFrame | Mapping | None
+    ) -> dict[str, np.ndarray] | None:
+        """Rows of each column of ``frame`` that differ from the snapshot.
+
+        Returns None when the columns, the index or the length differ.
+        """
+        if frame is None or list(frame.keys()) != list(self.columns):
+            return None
+        if self.index is not None and not self.index.equals(frame.index):
+            return None
+        changes = {}
+        for name, array in self.columns.items():
+            values = np.asarray(frame[name])
+            if len(values) != len(array):
+                return None
+            if (rows := _differing(array, values)).size:
+                changes[name] = rows
+        return changes
+
+    def matches(self, frame: pandas.DataFrame | Mapping | None) -> bool:
+        return self.rowChanges(frame) == {}
+
+    def toFrame(self) -> pandas.DataFrame:
+        return pandas.DataFrame(
+            {name: array.copy() for name, array in self.columns.items()},
+            index=self.index,
+        )
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """State of a model object, see ``take``."""
+
+    values: dict = field(default_factory=dict)
+    frames: dict = field(default_factory=dict)
+    references: dict = field(default_factory=dict)
+
+    @classmethod
+    def take(
+        cls,
+        obj,
+        values: Sequence[str] = (),
+        frames: Sequence[str] = (),
+        references: Sequence[str] = (),
+    ) -> "Snapshot":
+        """Snapshot of the attributes of ``obj``.
+
+        Args:
+            values: Attributes compared by value, containers are copied
+                shallowly.
+            frames: DataFrame attributes, kept as ``FrameSnapshot``.
+            references: Attributes holding versioned model objects, kept by
+                identity and version.
+        """
+
+        def frame(value):
+            return FrameSnapshot.take(value) if value is not None else None
+
+        def reference(value):
+            return (value, value.version) if value is not None else (None, None)
+
+        return cls(
+            {name: _copied(getattr(obj, name)) for name in values},
+            {name: frame(getattr(obj, name)) for name in frames},
+            {name: reference(getattr(obj, name)) for name in references},
+        )
+
+    def changes(self, obj) -> dict:
+        """Attributes of ``obj`` that changed since the snapshot.
+
+        Frames map to the changed rows of each column, see
+        ``FrameSnapshot.rowChanges``, the other attributes to None.
+        """
+        changes = {}
+        for name, (reference, version) in self.references.items():
+            value = getattr(obj, name)
+            if value is not reference or (
+                value is not None and value.version != version
+            ):
+                changes[name] = None
+        for name, frame in self.frames.items():
+            value = getattr(obj, name)
+            if frame is None or value is None:
+                if frame is not value:
+                    changes[name] = None
+            elif (rows := frame.rowChanges(value)) != {}:
+                changes[name] = rows
+        for name, v in self.values.items():
+            if getattr(obj, name) != v:
+                changes[name] = None
+        return changes
+
+    def matches(self, obj) -> bool:
+        """Whether ``obj`` is still in the state of the snapshot."""
+        return not self.changes(obj)
+
+    def restore(self, obj, changes: dict | None = None) -> None:
+        """Puts the ``changes`` of ``obj`` back to the state of the snapshot.
+
+        Only the changed rows of frames are written back. Referenced objects
+        are put back by identity, edits made to them in place are kept.
+        """
+        if changes is None:
+            changes = self.changes(obj)
+        for name, rows in changes.items():
+            if name in self.references:
+                setattr(obj, name, self.references[name][0])
+            elif name not in self.frames:
+                value = self.values[name]
+                setattr(obj, name, _copied(value))
+            elif (frame := self.frames[name]) is None:
+                setattr(obj, name, None)
+            elif rows is None:
+                setattr(obj, name, frame.toFrame())
+            else:
+                value = getattr(obj, name)
+                for column, columnRows in rows.items():
+                    value.iloc[columnRows, value.columns.get_loc(column)] = (
+                        frame.columns[column][columnRows]
+                    )
+
+
+class History:
+    """Undo and redo stacks over the snapshots of one object.
+
+    ``current`` is the snapshot of the present state, ``push`` records the
+    state after an edit. ``undo`` and ``redo`` return the snapshot to
+    restore, the caller applies it, e.g. from ``FrameSnapshot.changes``.
+    """
+
+    def __init__(self, snapshot, limit: int = 100) -> None:
+        self.current = snapshot
+        self._undo = deque(maxlen=limit)
+        self._redo = []
+
+    def push(self, snapshot) -> None:
+        self._undo.append(self.current)
+        self._redo.clear()
+        self.current = snapshot
+
+    def canUndo(self) -> bool:
+        return bool(self._undo)
+
+    def canRedo(self) -> bool:
+        return bool(self._redo)
+
+    def undo(self):
+        self._redo.append(self.current)
+        self.current = self._undo.pop()
+        return self.current
+
+    def redo(self):
+        self._undo.append(self.current)
+        self.current = self._redo.pop()
+        return self.current
@@ -0,0 +1,119 @@
+import asyncio
+import numpy as np
+
+from multiprocessing import shared_memory
+
+from src.utils import calculation
+
+# Bytes per slot, as much as 16 conditions of 2048 float64 channels or
+# 4 of 8192, whatever the channel count and dtype of the spectra
+SLOT_BYTES = 16 * calculation.CHANNELS * 8
+# Offsets of the spectra in a slot are aligned for any count dtype
+ALIGNMENT = 8
+
+
+class SpectrumRing:
+    """Fixed size slots of spectra in shared memory.
+
+    The server copies the spectra of each submitted analyse into a free slot
+    and only sends the slot id and the small analyse metadata to a worker
+    process. The worker maps the slot as numpy views, so no count array is
+    pickled. A slot is released once the worker's result is acknowledged.
+
+    The spectra of an analyse are packed one after the other with their own
+    channel count and dtype. Those that do not fit in the slot anymore are
+    sent inline with the metadata instead, pickled to the worker.
+
+    Create the ring in the server with ``SpectrumRing(...)`` and attach to it
+    in workers with ``SpectrumRing.attach(ring.spec)``.
+    """
+
+    def __init__(
+        self,
+        slots: int = 64,
+        slotBytes: int = SLOT_BYTES,
+        name: str | None = None,
+    ) -> None:
+        self.slots = slots
+        self.slotBytes = slotBytes
+        self._owner = name is None
+        self._memory = shared_memory.SharedMemory(
+            name, create=self._owner, size=slots * slotBytes
+        )
+        self._free = None
+
+    @property
+    def spec(self) -> dict:
+        return {
+            "name": self._memory.name,
+            "slots": self.slots,
+            "slotBytes": self.slotBytes,
+        }
+
+    @classmethod
+    def attach(cls, spec: dict) -> "SpectrumRing":
+        return cls(spec["slots"], spec["slotBytes"], spec["name"])
+
+    async def acquire(self) -> int:
+        """Waits for a free slot, which holds back the submitter when all are in use."""
+        if self._free is None:
+            self._free = asyncio.Queue()
+            for slot in range(self.slots):
+                self._free.put_nowait(slot)
+        return await self._free.get()
+
+    def release(self, slot: int) -> None:
+        self._free.put_nowait(slot)
+
+    @property
+    def freeSlots(self) -> int:
+        return self._free.qsize() if self._free is not None else self.slots
+
+    def _view(self, slot: int, entry: dict) -> np.ndarray:
+        return np.ndarray(
+            entry["size"],
+            entry["dtype"],
+            buffer=self._memory.buf,
+            offset=slot * self.slotBytes + entry["offset"],
+        )
+
+    def write(self, slot: int, data: list[dict]) -> list[dict]:
+        """Copies the ``y`` of every data entry into ``slot``.
+
+        Returns the entries to send to the worker, with ``y`` replaced by
+        its place in the slot, or kept as an array if it does not fit.
+        """
+        entries = []
+        offset = 0
+        for d in data:
+            y = np.asarray(d["y"])
+            end = offset + y.nbytes
+            if end > self.slotBytes:
+                entries.append({"conditionId": d["conditionId"], "y": y})
+                continue
+            entry = {
+                "conditionId": d["conditionId"],
+                "dtype": y.dtype.str,
+                "size": y.size,
+                "offset": offset,
+            }
+            self._view(slot, entry)[:] = y
+            entries.append(entry)
+            offset = -(-end // ALIGNMENT) * ALIGNMENT
+        return entries
+
+    def read(self, slot: int, entries: list[dict]) -> list[dict]:
+        """Returns the data entries of ``slot`` with ``y`` as views on the ring."""
+        return [
+            (
+                e
+                if "y" in e
+                else {"conditionId": e["conditionId"], "y": self._view(slot, e)}
+            )
+            for e in entries
+        ]
+
+    def close(self) -> None:
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas
+
+from src.utils import calculation
+from src.utils.database import getDataframe
+from src.utils.datatypes import Analyse, AnalyseData, Calibration
+
+# Detector resolution at Mn-Ka and the electronic noise, in keV
+FWHM_MN_KA = 0.15
+FWHM_NOISE = 0.1
+
+
+def peakSigma(kev: float | np.ndarray) -> float | np.ndarray:
+    """Gaussian sigma of a peak at ``kev`` for a typical SDD detector."""
+    fwhm = np.sqrt(FWHM_NOISE**2 + (FWHM_MN_KA**2 - FWHM_NOISE**2) * kev / 5.895)
+    return fwhm / 2.3548
+
+
+def syntheticSpectrum(
+    lineEnergies: np.ndarray,
+    lineIntensities: np.ndarray,
+    kilovolt: float,
+    rng: np.random.Generator,
+    background: float = 200.0,
+) -> np.ndarray:
+    """Counts of a spectrum with Gaussian peaks on a bremsstrahlung continuum.
+
+    Lines above the tube voltage are not excited. Counts are Poisson sampled.
+    """
+    kev = calculation.getEnergyCalibration().kev
+    kev = np.clip(kev, 1e-3, None)
+    # Kramers' law, absorbed at low energies
+    continuum = background * np.clip(kilovolt - kev, 0, None) / kev
+    continuum *= 1 - np.exp(-((kev / 2) ** 3))
+    excited = lineEnergies < kilovolt
+    energies = lineEnergies[excited][:, np.newaxis]
+    sigmas = peakSigma(energies)
+    peaks = lineIntensities[excited][:, np.newaxis] * np.exp(
+        -0.5 * ((kev - energies) / sigmas) ** 2
+    )
+    expected = continuum + peaks.sum(axis=0)
+    return rng.poisson(expected).astype(np.int64)
+
+
+def syntheticAnalyse(
+    filename: str,
+    elements: list[str] | None = None,
+    conditionIds: list[int] | None = None,
+    rng: np.random.Generator | None = None,
+    intensity: float = 5000.0,
+) -> Analyse:
+    """Builds an analyse with one spectrum per condition.
+
+    Args:
+        filename: Name of the analyse, used by the server to save it.
+        elements: Symbols whose lines are drawn, defaults to Fe, Cu and Zn.
+        conditionIds: Conditions to measure, defaults to the active ones.
+        rng: Random generator, pass a seeded one for reproducible spectra.
+        intensity: Peak height of an element's strongest line.
+    """
+    rng = rng or np.random.default_rng()
+    elements = elements or ["Fe", "Cu", "Zn"]
+    conditions = getDataframe("Conditions")
+    if conditionIds is None:
+        conditionIds = conditions.query("active == 1")["condition_id"].tolist()
+    lines = getDataframe("Lines")
+    lines = lines[lines["symbol"].isin(elements)]
+    energies = lines["kiloelectron_volt"].to_numpy(dtype=np.float64)
+    # Ka and La lines are the strongest, the others are a fraction of them
+    weights = np.where(lines["radiation_type"].isin(["Ka", "La"]), 1.0, 0.2)
+    intensities = intensity * weights * rng.uniform(0.5, 1.5, len(lines))
+    data = []
+    for conditionId in conditionIds:
+        kilovolt = conditions.loc[
+            conditions["condition_id"] == conditionId, "kilovolt"
+        ].iloc[0]
+        y = syntheticSpectrum(energies, intensities, float(kilovolt), rng)
+        data.append(AnalyseData(int(conditionId), y))
+    return Analyse(f"{filename}.txt", data)
+
+
+def calibrationLines(elements: list[str]) -> pandas.DataFrame:
+    """Lines table with one active line per element, as a method would have.
+
+    The Ka line is used unless the tubes cannot excite it, then the La line.
+    Each line is measured with the lowest voltage condition exceeding 1.5
+    times its energy, or the highest voltage one.
+    """
+    lines = getDataframe("Lines").copy()
+    lines["active"] = 0
+    lines["condition_id"] = np.nan
+    conditions = getDataframe("Conditions").query("active == 1")
+    conditions = conditions.sort_values(["kilovolt", "condition_id"])
+    kilovolts = conditions["kilovolt"].to_numpy(dtype=np.float64)
+    for element in elements:
+        candidates = lines[lines["symbol"] == element].set_index("radiation_type")
+        radiation = "Ka"
+        if (
+            "Ka" not in candidates.index
+            or candidates.loc["Ka", "kiloelectron_volt"] * 1.5 > kilovolts[-1]
+        ):
+            radiation = "La"
+        row = lines[
+            (lines["symbol"] == element) & (lines["radiation_type"] == radiation)
+        ].index
+        energy = lines.loc[row, "kiloelectron_volt"].iloc[0]
+        index = min(np.searchsorted(kilovolts, energy * 1.5), len(kilovolts) - 1)
+        lines.loc[row, ["active", "condition_id"]] = [
+            1,
+            conditions["condition_id"].iloc[index],
+        ]
+    return lines
+
+
+def syntheticCalibrations(
+    elements: list[str],
+    rng: np.random.Generator | None = None,
+    concentration: float = 100.0,
+    firstId: int = 1,
+) -> list[Calibration]:
+    """Builds one pure-element calibration per element sharing the same lines."""
+    rng = rng or np.random.default_rng()
+    lines = calibrationLines(elements)
+    calibrations = []
+    for calibrationId, element in enumerate(elements, firstId):
+        analyse = syntheticAnalyse(f"CAL-{element}", [element], rng=rng)
+        calibrations.append(
+            Calibration(
+                calibrationId,
+                f"CAL-{element}",
+                element,
+                {element: concentration},
+                1,
+                analyse,
+                lines[["active", "condition_id"]].copy(),
+            )
+        )
+    return calibrations
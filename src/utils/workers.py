@@ -0,0 +1,294 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from json import loads
+from typing import Callable
+
+from src.utils import profiling, protocol, quantification
+from src.utils.datatypes import Analyse, Calibration
+from src.utils.paths import resourcePath
+from src.utils.spectrumring import SpectrumRing
+
+STAGES = ["write", "queue", "parse", "compute", "total"]
+
+# Set in every worker by initializeWorker: the lock serializing file writes
+# across workers and the ring holding the submitted spectra
+_dataLock = None
+_ring = None
+
+
+def initializeWorker(dataLock, ringSpec: dict | None = None) -> None:
+    global _dataLock, _ring
+    _dataLock = dataLock
+    if ringSpec is not None and (_ring is None or _ring.spec != ringSpec):
+        _ring = SpectrumRing.attach(ringSpec)
+
+
+def splitPayload(payload: bytes, binary: bool) -> dict:
+    """Decodes a submitted analyse, binary spectra stay views on ``payload``."""
+    if binary:
+        return protocol.decodeAnalyse(payload)
+    with profiling.stage("decode"):
+        return loads(str(payload, "utf-8"))
+
+
+def analyseFromSlot(slot: int, metadata: dict) -> Analyse:
+    hashableDict = {k: v for k, v in metadata.items() if k != "data"}
+    hashableDict["data"] = _ring.read(slot, metadata["data"])
+    return Analyse.fromHashableDict(hashableDict)
+
+
+def saveAnalyse(slot: int, metadata: dict) -> tuple[bytes, dict]:
+    """Worker job: stores a submitted analyse under analysis/tmp.
+
+    Returns the analyse re-encoded for binary frames, so the server can hand
+    it to the GUI without parsing JSON again, and the stage timings.
+    """
+    start = time.perf_counter()
+    analyse = analyseFromSlot(slot, metadata)
+    parsed = time.perf_counter()
+    with _dataLock:
+        analyse.saveTo(resourcePath(f"analysis/tmp/{analyse.filename}.txt"))
+    encoded = analyse.toBinary()
+    return encoded, {"parse": parsed - start, "compute": time.perf_counter() - parsed}
+
+
+def saveCalibration(slot: int, metadata: dict) -> tuple[str, dict]:
+    """Worker job: replaces the analyse of a calibration and re-saves it."""
+    start = time.perf_counter()
+    analyse = analyseFromSlot(slot, metadata)
+    parsed = time.perf_counter()
+    with _dataLock:
+        calibration = Calibration.fromATXCFile(
+            resourcePath(f"calibrations/{analyse.filename}.atxc")
+        )
+        calibration.analyse = analyse
+        calibration.state = 1
+        calibration.save()
+    return analyse.filename, {
+        "parse": parsed - start,
+        "compute": time.perf_counter() - parsed,
+    }
+
+
+def quantifyAnalyse(slot: int, metadata: dict) -> tuple[bytes, dict]:
+    """Worker job: answers a -qnt request with a cached method."""
+    start = time.perf_counter()
+    request = {k: v for k, v in metadata.items() if k != "data"}
+    request["data"] = _ring.read(slot, metadata["data"])
+    parsed = time.perf_counter()
+    reply = quantification.quantifyRequest(request)
+    return reply, {"parse": parsed - start, "compute": time.perf_counter() - parsed}
+
+
+@dataclass
+class StageTiming:
+    count: int = 0
+    total: float = 0.0
+    maximum: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def toHashableDict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.maximum,
+        }
+
+
+@dataclass
+class Job:
+    function: Callable
+    args: tuple
+    future: asyncio.Future
+    label: str
+    timings: dict = field(default_factory=dict)
+    release: Callable | None = field(default=None)
+    enqueued: float = field(default_factory=time.perf_counter)
+
+
+class WorkerPool:
+    """Runs submitted jobs in worker processes behind a bounded queue.
+
+    ``submit`` waits while the queue is full, which pushes back on the
+    connection that submitted the job. It then returns the job's result or
+    raises its error, so results go back to the connection and request that
+    asked for them. Dispatchers pull jobs from the queue, one per worker, so
+    a slow job only holds its own worker.
+
+    Worker jobs return ``(result, timings)`` where ``timings`` holds the
+    seconds spent in the ``parse`` and ``compute`` stages.
+
+    Analyses go through ``enqueueAnalyse``, which copies their spectra into a
+    ``SpectrumRing`` slot so workers only receive the slot id. The slot is
+    released once the worker returns.
+
+    Args:
+        processes: Worker processes, defaults to the CPU count.
+        queueSize: Jobs waiting for a worker before submitters are held.
+        useProcesses: Run jobs in a process pool, in threads if False, e.g. for
+            tests.
+        slots: Ring slots, defaults to one per queued or running job.
+    """
+
+    def __init__(
+        self,
+        processes: int | None = None,
+        queueSize: int = 64,
+        useProcesses: bool = True,
+        slots: int | None = None,
+    ) -> None:
+        self.processes = processes or multiprocessing.cpu_count()
+        self.queueSize = queueSize
+        self.useProcesses = useProcesses
+        self.slots = slots or queueSize + self.processes
+        self.ring = None
+        self._queue = None
+        self._executor = None
+        self._dispatchers = []
+        self._timings = {}
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0}
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(self.queueSize)
+        self.ring = SpectrumRing(self.slots)
+        if self.useProcesses:
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(
+                self.processes,
+                context,
+                initializer=initializeWorker,
+                initargs=(context.Lock(), self.ring.spec),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                self.processes,
+                "worker",
+                initializer=initializeWorker,
+                initargs=(multiprocessing.Lock(), self.ring.spec),
+            )
+        self._dispatchers = [
+            asyncio.create_task(self._dispatch()) for _ in range(self.processes)
+        ]
+
+    async def close(self) -> None:
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            job.future.cancel()
+            if job.release is not None:
+                job.release()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    async def enqueue(
+        self,
+        function: Callable,
+        *args,
+        label: str | None = None,
+        timings: dict | None = None,
+        release: Callable | None = None,
+    ) -> asyncio.Future:
+        """Queues a job, waiting for room, and returns the future of its result.
+
+        ``release`` is called once the job no longer runs, whatever its outcome.
+        """
+        future = asyncio.get_running_loop().create_future()
+        job = Job(
+            function, args, future, label or function.__name__, timings or {}, release
+        )
+        await self._queue.put(job)
+        self._counters["submitted"] += 1
+        return future
+
+    async def enqueueAnalyse(
+        self, function: Callable, hashableDict: dict, label: str | None = None
+    ) -> asyncio.Future:
+        """Queues ``function(slot, metadata)`` for an analyse hashable dict.
+
+        Waits for a free ring slot first, then for room in the queue.
+        """
+        slot = await self.ring.acquire()
+        try:
+            start = time.perf_counter()
+            metadata = {k: v for k, v in hashableDict.items() if k != "data"}
+            metadata["data"] = self.ring.write(slot, hashableDict["data"])
+            return await self.enqueue(
+                function,
+                slot,
+                metadata,
+                label=label,
+                timings={"write": time.perf_counter() - start},
+                release=lambda: self.ring.release(slot),
+            )
+        except BaseException:
+            self.ring.release(slot)
+            raise
+
+    async def submit(self, function: Callable, *args, label: str | None = None):
+        return await (await self.enqueue(function, *args, label=label))
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            started = time.perf_counter()
+            try:
+                if job.future.cancelled():
+                    continue
+                result, timings = await loop.run_in_executor(
+                    self._executor, job.function, *job.args
+                )
+                timings.update(job.timings)
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except Exception as e:
+                self._counters["failed"] += 1
+                logging.error(f"Job {job.label} failed: {e}")
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                self._counters["completed"] += 1
+                timings["queue"] = started - job.enqueued
+                timings["total"] = time.perf_counter() - job.enqueued
+                self._record(job.label, timings)
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                if job.release is not None:
+                    job.release()
+                self._queue.task_done()
+
+    def _record(self, label: str, timings: dict) -> None:
+        stages = self._timings.setdefault(
+            label, {stage: StageTiming() for stage in STAGES}
+        )
+        for stage, seconds in timings.items():
+            stages[stage].add(seconds)
+
+    def stats(self) -> dict:
+        return {
+            "queueDepth": self._queue.qsize() if self._queue is not None else 0,
+            "queueSize": self.queueSize,
+            "processes": self.processes,
+            "freeSlots": self.ring.freeSlots if self.ring is not None else 0,
+            **self._counters,
+            "timings": {
+                label: {stage: t.toHashableDict() for stage, t in stages.items()}
+                for label, stages in self._timings.items()
+            },
+        }
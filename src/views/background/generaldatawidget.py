@@ -4,10 +4,9 @@ import pyqtgraph as pg
 
 from functools import partial
 from PyQt6 import QtWidgets
-from scipy.interpolate import CubicSpline
-from scipy.signal import find_peaks
 
 from src.utils import datatypes
+from src.utils.scheduler import getComputeScheduler
 from src.views.base.generaldatawidget import GeneralDataWidget
 
 
@@ -22,6 +21,8 @@ class BackgroundGeneralDataWidget(GeneralDataWidget):
         self._createWidgets()
         self._profile = None
         self._data = None
+        self._originalCurve = None
+        self._optimalCurve = None
         if profile is not None:
             self.supply(profile)
         self.hide()
@@ -47,6 +48,29 @@ class BackgroundGeneralDataWidget(GeneralDataWidget):
                 widget.editingFinished.connect(
                     partial(self._generalDataChanged, key, widget)
                 )
+                widget.textEdited.connect(partial(self._previewGeneralData, key))
+
+    def _previewGeneralData(self, key: str, text: str) -> None:
+        profile = self._profile.copy()
+        if key == "smoothness":
+            try:
+                profile.smoothness = float(text)
+            except ValueError:
+                return
+            if not 1 <= profile.smoothness <= 25:
+                return
+        else:
+            setattr(profile, key, text or None)
+        # Text being typed is often not a valid argument yet, it is not reported
+        getComputeScheduler().preview(
+            (self, "canvas"),
+            self._data.correctedY,
+            profile,
+            None,
+            datatypes.previewDecimation(self._data.y.size),
+            callback=self._plotOptimalY,
+            errorCallback=lambda error: None,
+        )
 
     def _generalDataChanged(self, key: str, lineEdit: QtWidgets.QLineEdit) -> None:
         if lineEdit.text() == "":
@@ -84,40 +108,28 @@ class BackgroundGeneralDataWidget(GeneralDataWidget):
             widget.setText(str(value)) if value else widget.setText(None)
 
     def _drawCanvas(self) -> None:
-        self._plotWidget.clear()
-        x = self._data.x
-        y = self._data.y
-        self._optimalY = self._calculateOptimalY()
-        self._plotWidget.plot(
-            x, y, name="Original", pen=pg.mkPen(color="#FF7F0EFF", width=2)
-        )
-        self._plotWidget.plot(
-            x, self._optimalY, name="Optimal", pen=pg.mkPen(color="#1F77B4FF", width=2)
+        getComputeScheduler().submit(
+            (self, "canvas"),
+            self._data.correctedY,
+            self._profile.copy(),
+            callback=self._plotOptimalY,
         )
-        self._setPlotLimits(self._optimalY.max())
 
-    def _calculateOptimalY(self) -> np.ndarray:
-        optimalY = self._data.y.copy()
-        xSmooth, ySmooth = self.smooth(self._data.x, optimalY, self._profile.smoothness)
-        if kwargs := self._profile.peakKwargs():
-            peaks, _ = find_peaks(-ySmooth, **kwargs)
+    def _plotOptimalY(self, optimalY: np.ndarray) -> None:
+        x = self._data.x
+        y = self._data.y
+        self._optimalY = optimalY
+        if self._optimalCurve is None:
+            self._originalCurve = self._plotWidget.plot(
+                x, y, name="Original", pen=pg.mkPen(color="#FF7F0EFF", width=2)
+            )
+            self._optimalCurve = self._plotWidget.plot(
+                x, optimalY, name="Optimal", pen=pg.mkPen(color="#1F77B4FF", width=2)
+            )
         else:
-            peaks, _ = find_peaks(-ySmooth)
-        if peaks.size != 0:
-            regressionCurve = np.interp(self._data.x, xSmooth[peaks], ySmooth[peaks])
-            optimalY = (optimalY - regressionCurve).clip(0)
-        return optimalY
-
-    @staticmethod
-    def smooth(
-        x: np.ndarray, y: np.ndarray, level: float
-    ) -> tuple[np.ndarray, np.ndarray]:
-        cs = CubicSpline(x, y)
-        # Generate finer x values for smoother plot
-        X = np.linspace(0, x.size, int(x.size / level))
-        # Interpolate y values for the smoother plot
-        Y = cs(X)
-        return X, Y
+            self._originalCurve.setData(x, y)
+            self._optimalCurve.setData(x, optimalY)
+        self._setPlotLimits(optimalY.max(), optimalY.size)
 
     def supply(self, profile: datatypes.BackgroundProfile) -> None:
         if profile is None:
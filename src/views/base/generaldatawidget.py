@@ -3,6 +3,8 @@ from functools import partial
 import pyqtgraph as pg
 from PyQt6 import QtWidgets, QtCore
 
+from src.utils import calculation
+
 
 class GeneralDataWidget(QtWidgets.QWidget):
     def __init__(
@@ -27,7 +29,7 @@ class GeneralDataWidget(QtWidgets.QWidget):
         # self._plotWidget.getPlotItem().setMouseEnabled(x=False, y=False)
         self._plotWidget.setBackground("#FFFFFF")
         self._plotWidget.setFrameShape(QtWidgets.QFrame.Shape.NoFrame)
-        self._plotWidget.setLimits(xMin=-100, xMax=2148, yMax=1)
+        self._setPlotLimits(1)
         plotItem = self._plotWidget.getPlotItem()
         plotItem.setContentsMargins(10, 10, 10, 10)
         self._legend = plotItem.addLegend(
@@ -98,9 +100,11 @@ class GeneralDataWidget(QtWidgets.QWidget):
     def _drawCanvas(self) -> None:
         pass
 
-    def _setPlotLimits(self, maxIntensity: int) -> None:
-        xMin = -100
-        xMax = 2048 + 100
+    def _setPlotLimits(
+        self, maxIntensity: int, channels: int = calculation.CHANNELS
+    ) -> None:
+        xMin = -channels / 20
+        xMax = channels - xMin
         yMin = -maxIntensity * 0.1
         yMax = maxIntensity * 1.1
         self._plotWidget.setLimits(xMin=xMin, xMax=xMax, yMin=yMin, yMax=yMax)
@@ -0,0 +1,158 @@
+"""Overlay of many spectra drawn in a few painter calls.
+
+The curves sharing a colour and a channel count are stacked and drawn as
+one array of line segments, broken between spectra. Only the channels in
+view are drawn, read from the level of their ``MinMaxPyramid`` matching
+the width of the view.
+"""
+
+from typing import Hashable
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt6 import QtCore, QtGui
+from pyqtgraph.graphicsItems.PlotCurveItem import arrayToLineSegments
+
+from src.utils.pyramid import MinMaxPyramid
+
+
+class SpectrumOverlayItem(pg.GraphicsObject):
+    """Draws many spectra against their channel index.
+
+    Curves are added and removed by key, the item only rebuilds its line
+    segments when they change or the view range does.
+    """
+
+    def __init__(self, width: int = 2) -> None:
+        super().__init__()
+        self._width = width
+        self._curves = {}
+        self._extrema = {}
+        self._groups = None
+        self._segments = None
+        self._segmentsKey = None
+        self._bounds = None
+
+    def setCurve(
+        self, key: Hashable, y: np.ndarray | MinMaxPyramid, color
+    ) -> None:
+        """Draws the counts ``y``, given as an array or as their pyramid."""
+        pyramid = y if isinstance(y, MinMaxPyramid) else MinMaxPyramid(y)
+        self._curves[key] = (pyramid, pg.mkColor(color))
+        self._extrema[key] = pyramid.extrema()
+        self._invalidate()
+
+    def setCurveData(self, key: Hashable, y: np.ndarray | MinMaxPyramid) -> None:
+        self.setCurve(key, y, self._curves[key][1])
+
+    def setCurveColor(self, key: Hashable, color) -> None:
+        self._curves[key] = (self._curves[key][0], pg.mkColor(color))
+        self._invalidate()
+
+    def removeCurve(self, key: Hashable) -> None:
+        if self._curves.pop(key, None) is not None:
+            del self._extrema[key]
+            self._invalidate()
+
+    def hasCurve(self, key: Hashable) -> bool:
+        return key in self._curves
+
+    def clear(self) -> None:
+        self._curves.clear()
+        self._extrema.clear()
+        self._invalidate()
+
+    def channels(self) -> int:
+        """Channels of the longest curve, 0 without any."""
+        return max((p.channels for p, _ in self._curves.values()), default=0)
+
+    def yRange(self) -> tuple[float, float]:
+        """Smallest and largest counts of the curves, (0, 0) without any."""
+        if not self._extrema:
+            return 0, 0
+        minima, maxima = zip(*self._extrema.values())
+        return min(minima), max(maxima)
+
+    def _invalidate(self) -> None:
+        self._groups = None
+        self._segments = None
+        self.prepareGeometryChange()
+        self._bounds = None
+        self.informViewBoundsChanged()
+        self.update()
+
+    def _stackedGroups(self) -> list:
+        if self._groups is None:
+            grouped = {}
+            for pyramid, color in self._curves.values():
+                key = (color.rgba(), pyramid.channels)
+                grouped.setdefault(key, []).append(pyramid)
+            self._groups = [
+                (
+                    pg.mkPen(QtGui.QColor.fromRgba(rgba), width=self._width),
+                    MinMaxPyramid.stack(pyramids),
+                )
+                for (rgba, _), pyramids in grouped.items()
+            ]
+        return self._groups
+
+    def _dataBounds(self) -> QtCore.QRectF:
+        if self._bounds is None:
+            yMin, yMax = self.yRange()
+            width = max(self.channels() - 1, 0)
+            self._bounds = QtCore.QRectF(0, yMin, width, yMax - yMin)
+        return self._bounds
+
+    def dataBounds(self, ax: int, frac: float = 1.0, orthoRange=None) -> tuple:
+        if not self._curves:
+            return None, None
+        bounds = self._dataBounds()
+        if ax == 0:
+            return bounds.left(), bounds.right()
+        return bounds.top(), bounds.bottom()
+
+    def pixelPadding(self) -> int:
+        return self._width
+
+    def boundingRect(self) -> QtCore.QRectF:
+        if not self._curves:
+            return QtCore.QRectF()
+        pixelWidth, pixelHeight = self.pixelWidth(), self.pixelHeight()
+        return self._dataBounds().adjusted(
+            -self._width * pixelWidth,
+            -self._width * pixelHeight,
+            self._width * pixelWidth,
+            self._width * pixelHeight,
+        )
+
+    def viewTransformChanged(self) -> None:
+        super().viewTransformChanged()
+        self.prepareGeometryChange()
+        self.update()
+
+    def _visibleChannels(self, channels: int) -> tuple[int, int, int]:
+        """First and last channels in view, padded by a pixel, and the pixels
+        they span."""
+        view = self.getViewBox()
+        viewRect = self.viewRect()
+        if view is None or viewRect is None or viewRect.width() <= 0:
+            return 0, channels, channels
+        pixel = viewRect.width() / max(view.width(), 1)
+        start = int(np.clip(np.floor(viewRect.left() - pixel), 0, channels))
+        stop = int(np.clip(np.ceil(viewRect.right() + pixel) + 1, start, channels))
+        return start, stop, int((stop - start) / pixel)
+
+    def paint(self, painter: QtGui.QPainter, *args) -> None:
+        groups = self._stackedGroups()
+        key = [self._visibleChannels(pyramid.channels) for _, pyramid in groups]
+        if self._segments is None or key != self._segmentsKey:
+            # Qt strokes wide pens much faster as separate lines than as a path
+            self._segments = []
+            for (pen, pyramid), window in zip(groups, key):
+                x, y, connect = pyramid.vertices(*window)
+                segments = arrayToLineSegments(x, y, connect, finiteCheck=False)
+                self._segments.append((pen, segments))
+            self._segmentsKey = key
+        for pen, segments in self._segments:
+            painter.setPen(pen)
+            painter.drawLines(*segments.drawargs())
@@ -1,6 +1,30 @@
+import numpy as np
 import pandas
 
-from PyQt6 import QtWidgets, QtCore
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+
+# Columns holding 0/1 flags, shown as colored True/False
+BOOLEAN_COLUMNS = ["active", "rotation"]
+
+
+def cellText(column: str, value) -> str:
+    """Text of a DataFrame cell as the tables show it."""
+    if column in BOOLEAN_COLUMNS:
+        return "True" if int(value) == 1 else "False"
+    if column == "condition_id":
+        return "" if pandas.isna(value) else str(int(value))
+    return str(value)
+
+
+def cellColor(column: str, value) -> QtCore.Qt.GlobalColor | None:
+    if column in BOOLEAN_COLUMNS:
+        return (
+            QtCore.Qt.GlobalColor.darkGreen
+            if int(value) == 1
+            else QtCore.Qt.GlobalColor.red
+        )
+    return None
 
 
 class TableItem(QtWidgets.QTableWidgetItem):
@@ -158,45 +182,25 @@ class DataframeTableWidget(TableWidget):
     def _fillTable(self) -> None:
         if self._df.empty:
             return
+        self.setRowCount(len(self._df))
+        columns = list(self._df.columns)
         for rowIndex, row in enumerate(self._df.itertuples(index=False)):
             items = {"rowId": rowIndex}
-            for columnIndex, value in enumerate(row):
-                item = TableItem(str(value), self._editable)
-                items[self._df.columns[columnIndex]] = item
-            self.addRow(items)
-        if "active" in self.rows[0]:
-            self.blockSignals(True)
-            for row in self.rows.values():
-                if int(row["active"].text()) == 1:
-                    row["active"].setForeground(QtCore.Qt.GlobalColor.darkGreen)
-                    row["active"].setText("True")
-                else:
-                    row["active"].setForeground(QtCore.Qt.GlobalColor.red)
-                    row["active"].setText("False")
-            self.blockSignals(False)
-        if "rotation" in self.rows[0]:
-            self.blockSignals(True)
-            for row in self.rows.values():
-                if int(row["rotation"].text()) == 1:
-                    row["rotation"].setForeground(QtCore.Qt.GlobalColor.darkGreen)
-                    row["rotation"].setText("True")
-                else:
-                    row["rotation"].setForeground(QtCore.Qt.GlobalColor.red)
-                    row["rotation"].setText("False")
-            self.blockSignals(False)
-        if "condition_id" in self.rows[0]:
-            self.blockSignals(True)
-            for row in self.rows.values():
-                if (conditionId := row["condition_id"].text()) != "nan":
-                    row["condition_id"].setText(conditionId.split(".")[0])
-                else:
-                    row["condition_id"].setText(None)
-            self.blockSignals(False)
+            for columnIndex, (column, value) in enumerate(zip(columns, row)):
+                item = TableItem(cellText(column, value), self._editable)
+                if (color := cellColor(column, value)) is not None:
+                    item.setForeground(color)
+                self.setItem(rowIndex, columnIndex, item)
+                items[column] = item
+            self.rows[rowIndex] = items
+        self.selectRow(self.rowCount() - 1)
 
     def supply(self, dataframe: pandas.DataFrame):
         if dataframe is None:
             return
-        if self._df is not None and self._df.equals(dataframe):
+        if self._df is dataframe or (
+            self._df is not None and self._df.equals(dataframe)
+        ):
             return
         self.blockSignals(True)
         self._df = dataframe
@@ -207,3 +211,258 @@ class DataframeTableWidget(TableWidget):
             )
             self._fillTable()
         self.blockSignals(False)
+
+
+class DataframeModel(QtCore.QAbstractTableModel):
+    """Read-only table model over a DataFrame.
+
+    Cells are formatted with ``cellText`` and ``cellColor`` only when a view
+    asks for them, so the cost of a table is the number of visible cells.
+    """
+
+    def __init__(self, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self._df = pandas.DataFrame()
+        self._columns = []
+        self._values = np.empty((0, 0), dtype=object)
+        self._verticalLabels = None
+
+    @property
+    def dataframe(self) -> pandas.DataFrame:
+        return self._df
+
+    def supply(self, dataframe: pandas.DataFrame) -> None:
+        self.beginResetModel()
+        self._df = dataframe
+        self._columns = [str(column) for column in dataframe.columns]
+        self._values = dataframe.to_numpy(dtype=object)
+        self._verticalLabels = None
+        self.endResetModel()
+
+    def setVerticalHeaderLabels(self, labels) -> None:
+        self._verticalLabels = [str(label) for label in labels]
+        if self._values.shape[0]:
+            self.headerDataChanged.emit(
+                QtCore.Qt.Orientation.Vertical, 0, self._values.shape[0] - 1
+            )
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._values.shape[0]
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._values.shape[1]
+
+    def data(
+        self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole
+    ):
+        if not index.isValid():
+            return None
+        column = self._columns[index.column()]
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return cellText(column, self._values[index.row(), index.column()])
+        if role == QtCore.Qt.ItemDataRole.ForegroundRole:
+            color = cellColor(column, self._values[index.row(), index.column()])
+            return QtGui.QBrush(color) if color is not None else None
+        if role == QtCore.Qt.ItemDataRole.TextAlignmentRole:
+            return QtCore.Qt.AlignmentFlag.AlignCenter
+        return None
+
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole,
+    ):
+        if role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Orientation.Horizontal:
+            return " ".join(self._columns[section].split("_")).title()
+        if self._verticalLabels is not None:
+            return self._verticalLabels[section]
+        return str(section + 1)
+
+
+class RowMaskProxyModel(QtCore.QSortFilterProxyModel):
+    """Shows the source rows whose entry in a boolean mask is set."""
+
+    def __init__(self, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self._mask = None
+
+    def setRowMask(self, mask: np.ndarray | None) -> None:
+        self._mask = None if mask is None else np.asarray(mask, dtype=bool)
+        self.invalidateRowsFilter()
+
+    def filterAcceptsRow(
+        self, sourceRow: int, sourceParent: QtCore.QModelIndex
+    ) -> bool:
+        return self._mask is None or bool(self._mask[sourceRow])
+
+
+class DataframeTableView(QtWidgets.QTableView):
+    """Model/view counterpart of ``DataframeTableWidget`` for read-only tables.
+
+    Rows can be hidden with ``setRowMask`` without touching the view rows.
+    """
+
+    def __init__(
+        self,
+        parent: QtWidgets.QWidget | None = None,
+        dataframe: pandas.DataFrame | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self._model = DataframeModel(self)
+        self._proxy = RowMaskProxyModel(self)
+        self._proxy.setSourceModel(self._model)
+        self.setModel(self._proxy)
+        self.setAlternatingRowColors(True)
+        self.setFrameShape(QtWidgets.QFrame.Shape.NoFrame)
+        self.setSelectionMode(QtWidgets.QTableView.SelectionMode.SingleSelection)
+        self.setSelectionBehavior(QtWidgets.QTableView.SelectionBehavior.SelectRows)
+        self.verticalHeader().setSectionResizeMode(
+            QtWidgets.QHeaderView.ResizeMode.Fixed
+        )
+        self.horizontalHeader().setSectionResizeMode(
+            QtWidgets.QHeaderView.ResizeMode.Stretch
+        )
+        if dataframe is not None:
+            self.supply(dataframe)
+
+    @property
+    def dataframe(self) -> pandas.DataFrame:
+        return self._model.dataframe
+
+    def supply(self, dataframe: pandas.DataFrame) -> None:
+        if dataframe is None:
+            return
+        current = self._model.dataframe
+        if current is dataframe or current.equals(dataframe):
+            return
+        self._model.supply(dataframe)
+        self._proxy.setRowMask(None)
+
+    def setRowMask(self, mask: np.ndarray | None) -> None:
+        self._proxy.setRowMask(mask)
+
+    def setVerticalHeaderLabels(self, labels) -> None:
+        self._model.setVerticalHeaderLabels(labels)
+
+    def currentRow(self) -> int:
+        """Row of the current index in the DataFrame, -1 if there is none."""
+        index = self._proxy.mapToSource(self.currentIndex())
+        return index.row() if index.isValid() else -1
+
+
+class ButtonDelegate(QtWidgets.QStyledItemDelegate):
+    """Paints a push button in its cells and emits ``clicked`` on release.
+
+    The button is drawn with a hidden template widget, so style sheet rules
+    for ``objectName`` apply without creating a widget per row. The cell
+    text is the button label and its decoration the icon.
+    """
+
+    clicked = QtCore.pyqtSignal(QtCore.QModelIndex)
+
+    def __init__(self, parent: QtWidgets.QWidget, objectName: str) -> None:
+        super().__init__(parent)
+        self._template = QtWidgets.QPushButton(parent)
+        self._template.setObjectName(objectName)
+        self._template.hide()
+        self._pressed = None
+
+    def paint(
+        self,
+        painter: QtGui.QPainter,
+        option: QtWidgets.QStyleOptionViewItem,
+        index: QtCore.QModelIndex,
+    ) -> None:
+        button = QtWidgets.QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = index.data(QtCore.Qt.ItemDataRole.DisplayRole) or ""
+        if isinstance(
+            icon := index.data(QtCore.Qt.ItemDataRole.DecorationRole), QtGui.QIcon
+        ):
+            button.icon = icon
+            button.iconSize = QtCore.QSize(16, 16)
+        button.state = QtWidgets.QStyle.StateFlag.State_Enabled
+        if option.state & QtWidgets.QStyle.StateFlag.State_MouseOver:
+            button.state |= QtWidgets.QStyle.StateFlag.State_MouseOver
+        if self._pressed == QtCore.QPersistentModelIndex(index):
+            button.state |= QtWidgets.QStyle.StateFlag.State_Sunken
+        style = self._template.style()
+        style.drawControl(
+            QtWidgets.QStyle.ControlElement.CE_PushButton,
+            button,
+            painter,
+            self._template,
+        )
+
+    def editorEvent(
+        self,
+        event: QtCore.QEvent,
+        model: QtCore.QAbstractItemModel,
+        option: QtWidgets.QStyleOptionViewItem,
+        index: QtCore.QModelIndex,
+    ) -> bool:
+        if event.type() == QtCore.QEvent.Type.MouseButtonPress:
+            self._pressed = QtCore.QPersistentModelIndex(index)
+            return False
+        if event.type() == QtCore.QEvent.Type.MouseButtonRelease:
+            pressed, self._pressed = self._pressed, None
+            if pressed == QtCore.QPersistentModelIndex(index) and option.rect.contains(
+                event.position().toPoint()
+            ):
+                self.clicked.emit(index)
+                return True
+        return False
+
+
+class ComboBoxDelegate(QtWidgets.QStyledItemDelegate):
+    """Edits its cells with a combo box created only while a cell is edited.
+
+    ``items`` returns the choices of an index. The choice is written back with
+    ``setData`` as soon as it is picked.
+    """
+
+    def __init__(self, parent: QtWidgets.QWidget, objectName: str, items) -> None:
+        super().__init__(parent)
+        self._objectName = objectName
+        self._items = items
+
+    def createEditor(
+        self,
+        parent: QtWidgets.QWidget,
+        option: QtWidgets.QStyleOptionViewItem,
+        index: QtCore.QModelIndex,
+    ) -> QtWidgets.QComboBox:
+        editor = QtWidgets.QComboBox(parent)
+        editor.setObjectName(self._objectName)
+        editor.addItems(self._items(index))
+        editor.activated.connect(lambda _: self._commit(editor))
+        return editor
+
+    def _commit(self, editor: QtWidgets.QComboBox) -> None:
+        self.commitData.emit(editor)
+        self.closeEditor.emit(editor)
+
+    def setEditorData(
+        self, editor: QtWidgets.QComboBox, index: QtCore.QModelIndex
+    ) -> None:
+        editor.setCurrentText(index.data(QtCore.Qt.ItemDataRole.EditRole) or "")
+
+    def setModelData(
+        self,
+        editor: QtWidgets.QComboBox,
+        model: QtCore.QAbstractItemModel,
+        index: QtCore.QModelIndex,
+    ) -> None:
+        if editor.currentText() != (index.data(QtCore.Qt.ItemDataRole.EditRole) or ""):
+            model.setData(index, editor.currentText(), QtCore.Qt.ItemDataRole.EditRole)
+
+    def updateEditorGeometry(
+        self,
+        editor: QtWidgets.QWidget,
+        option: QtWidgets.QStyleOptionViewItem,
+        index: QtCore.QModelIndex,
+    ) -> None:
+        editor.setGeometry(option.rect)
@@ -13,6 +13,7 @@ class CoefficientWidget(QtWidgets.QWidget):
     ):
         super().__init__(parent)
         self._calibration = None
+        self._version = None
         self._initializeUi()
         if calibration is not None:
             self.supply(calibration)
@@ -119,9 +120,10 @@ class CoefficientWidget(QtWidgets.QWidget):
         """
         if calibration is None:
             return
-        if self._calibration and self._calibration == calibration:
+        if calibration is self._calibration and calibration.version == self._version:
             return
         self.blockSignals(True)
         self._calibration = calibration
+        self._version = calibration.version
         self._initializeComboBoxes()
         self.blockSignals(False)
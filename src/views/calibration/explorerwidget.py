@@ -23,7 +23,8 @@ class CalibrationExplorerWidget(ExplorerWidget):
     ):
         super().__init__(parent)
         self._calibration = None
-        self._initCalibration = None
+        self._version = None
+        self._snapshot = None
         self._widgets = {
             "General Data": CalibrationGeneralDataWidget(self, editable=True),
             "Peak Search": PeakSearchWidget(self),
@@ -48,7 +49,7 @@ class CalibrationExplorerWidget(ExplorerWidget):
             action()
 
     def newCalibration(self) -> None:
-        if self._calibration != self._initCalibration:
+        if self._isModified():
             messageBox = QtWidgets.QMessageBox(self)
             messageBox.setIcon(QtWidgets.QMessageBox.Icon.Question)
             messageBox.setText(
@@ -68,7 +69,7 @@ class CalibrationExplorerWidget(ExplorerWidget):
             self.requestNewCalibration.emit()
 
     def saveCalibration(self) -> None:
-        if self._calibration == self._initCalibration:
+        if not self._isModified():
             return
         self._calibration.state = 2
         self._calibration.save()
@@ -88,7 +89,7 @@ class CalibrationExplorerWidget(ExplorerWidget):
                 f"WHERE line_id = {row.line_id};"
             )
         reloadDataframes()
-        self._initCalibration = self._calibration.copy()
+        self._snapshot = self._calibration.snapshot()
         self.saved.emit(self._calibration)
 
     def openCalibration(self):
@@ -104,6 +105,7 @@ class CalibrationExplorerWidget(ExplorerWidget):
         )
         messageBox.setDefaultButton(QtWidgets.QMessageBox.StandardButton.Yes)
         if messageBox.exec() == QtWidgets.QMessageBox.StandardButton.Yes:
+            self.saveCalibration()
             filePath, _ = QtWidgets.QFileDialog.getOpenFileName(
                 self, "Open Calibration", "./", "Antique'X calibration (*.atxc)"
             )
@@ -143,6 +145,24 @@ class CalibrationExplorerWidget(ExplorerWidget):
             self._treeItemMap["peak-search"].addChild(child)
             self._treeWidget.expandItem(self._treeItemMap["peak-search"])
 
+    def _isModified(self) -> bool:
+        """Whether the calibration changed since it was supplied or saved."""
+        return self._snapshot is not None and bool(
+            self._snapshot.changes(self._calibration)
+        )
+
+    def _discardChanges(self) -> None:
+        """Puts back the rows and attributes edited since the last save.
+
+        The calibration is edited in place, unsaved edits must not outlive
+        the explorer.
+        """
+        if self._snapshot is None:
+            return
+        if changes := self._snapshot.changes(self._calibration):
+            self._snapshot.restore(self._calibration, changes)
+            self._calibration.touch()
+
     def _supplyWidgets(self) -> None:
         for widget in self._widgets.values():
             widget.supply(self._calibration)
@@ -150,18 +170,21 @@ class CalibrationExplorerWidget(ExplorerWidget):
     def supply(self, calibration: datatypes.Calibration):
         if calibration is None:
             return
-        if self._calibration and self._calibration == calibration:
+        if calibration is self._calibration and calibration.version == self._version:
             return
+        if calibration is not self._calibration:
+            self._discardChanges()
         self.blockSignals(True)
         self._calibration = calibration
-        self._initCalibration = self._calibration.copy()
+        self._version = calibration.version
+        self._snapshot = self._calibration.snapshot()
         self._implementAnalyse()
         self._supplyWidgets()
         self.blockSignals(False)
         self._treeWidget.setCurrentItem(self._treeWidget.topLevelItem(0))
 
     def closeEvent(self, a0: QtGui.QCloseEvent | None) -> None:
-        if self._calibration != self._initCalibration:
+        if self._isModified():
             messageBox = QtWidgets.QMessageBox(self)
             messageBox.setIcon(QtWidgets.QMessageBox.Icon.Question)
             messageBox.setText(
@@ -179,6 +202,7 @@ class CalibrationExplorerWidget(ExplorerWidget):
                 self.saveCalibration()
                 a0.accept()  # Accept the close event
             elif result == QtWidgets.QMessageBox.StandardButton.No:
+                self._discardChanges()
                 a0.accept()
             else:
                 a0.ignore()
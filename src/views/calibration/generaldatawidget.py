@@ -8,6 +8,7 @@ from src.utils.database import getDataframe
 
 from src.views.base.generaldatawidget import GeneralDataWidget
 from src.utils.paths import resourcePath
+from src.utils.scheduler import getComputeScheduler
 from src.views.calibration.elementsandconcentrationswidget import (
     ElementsAndConcentrationsWidget,
 )
@@ -42,8 +43,10 @@ class CalibrationGeneralDataWidget(GeneralDataWidget):
         super().__init__(parent, editable)
         self._createWidgets()
         self._calibration = None
+        self._version = None
         self._element = None
         self._plotDataItems = None
+        self._energyCalibration = calculation.getEnergyCalibration()
         if calibration is not None:
             self.supply(calibration)
         self.hide()
@@ -61,18 +64,53 @@ class CalibrationGeneralDataWidget(GeneralDataWidget):
             pen=pg.mkPen(color="#330311", width=2),
             brush=pg.mkBrush(192, 192, 192, 100),
             hoverBrush=pg.mkBrush(169, 169, 169, 100),
-            bounds=(0, 2048),
         )
         self._backgroundRegion.setZValue(10)
-        self._backgroundRegion.sigRegionChanged.connect(self._backgroundRegionChanged)
+        self._backgroundRegion.sigRegionChanged.connect(self._previewBackgroundRegion)
+        self._backgroundRegion.sigRegionChangeFinished.connect(
+            self._backgroundRegionChanged
+        )
+
+    def _previewBackgroundRegion(self) -> None:
+        analyse = self._calibration.analyse
+        getComputeScheduler().preview(
+            (self, "background"),
+            analyse.correctedData,
+            analyse.backgroundProfile,
+            self._backgroundRegion.getRegion(),
+            True,
+            callback=partial(self._plotOptimalYs, analyse),
+        )
 
     def _backgroundRegionChanged(self) -> None:
-        self._calibration.analyse.backgroundRegion = self._backgroundRegion.getRegion()
-        for i, plotDataItem in enumerate(self._plotDataItems):
-            plotDataItem.setData(
-                self._calibration.analyse.data[i].x,
-                self._calibration.analyse.data[i].optimalY,
-            )
+        analyse = self._calibration.analyse
+        region = self._backgroundRegion.getRegion()
+        getComputeScheduler().submit(
+            (self, "background"),
+            analyse.correctedData,
+            analyse.backgroundProfile,
+            region,
+            callback=partial(self._backgroundRegionCorrected, analyse, region),
+        )
+
+    def _backgroundRegionCorrected(
+        self, analyse: datatypes.Analyse, region: tuple, optimalYs: list
+    ) -> None:
+        analyse.setBackgroundRegion(region, optimalYs)
+        if analyse is self._calibration.analyse:
+            self._updatePlotDataItems()
+
+    def _updatePlotDataItems(self) -> None:
+        analyse = self._calibration.analyse
+        self._plotOptimalYs(analyse, [d.optimalY for d in analyse.data])
+
+    def _plotOptimalYs(self, analyse: datatypes.Analyse, optimalYs: list) -> None:
+        if analyse is not self._calibration.analyse:
+            return
+        for plotDataItem, data, optimalY in zip(
+            self._plotDataItems, analyse.data, optimalYs
+        ):
+            plotDataItem.setData(data.x, optimalY)
 
     def _createElementAndConcentrationGroupBox(self) -> None:
         self._elementsAndConcentrationsWidget = ElementsAndConcentrationsWidget(
@@ -138,24 +176,48 @@ class CalibrationGeneralDataWidget(GeneralDataWidget):
         self, key: str, widget: QtWidgets.QLineEdit | QtWidgets.QComboBox
     ) -> None:
         if key == "Background Profile":
-            if filename := widget.currentText():
-                profile = datatypes.BackgroundProfile.fromATXBFile(
-                    resourcePath(f"backgrounds/{filename}.atxb")
-                )
-                self._calibration.analyse.backgroundProfile = profile
-                self._backgroundRegion.setRegion(
-                    self._calibration.analyse.backgroundRegion
-                )
-                self._plotWidget.addItem(self._backgroundRegion)
-            else:
-                self._calibration.analyse.backgroundProfile = None
-                self._plotWidget.removeItem(self._backgroundRegion)
+            # Shares the key of the region, a fit of the previous profile is stale
+            getComputeScheduler().submit(
+                (self, "background"),
+                self._fitBackgroundProfile,
+                self._calibration.analyse,
+                widget.currentText(),
+                callback=partial(
+                    self._backgroundProfileFitted, self._calibration.analyse
+                ),
+            )
         else:
             self._calibration.analyse.generalData[key] = (
                 widget.text()
                 if isinstance(widget, QtWidgets.QLineEdit)
                 else widget.currentText()
             )
+            self._calibration.analyse.touch()
+
+    @staticmethod
+    def _fitBackgroundProfile(analyse: datatypes.Analyse, filename: str) -> tuple:
+        profile = None
+        if filename:
+            profile = datatypes.BackgroundProfile.fromATXBFile(
+                resourcePath(f"backgrounds/{filename}.atxb")
+            )
+            return profile, analyse.correctedData(profile, analyse.backgroundRegion)
+        return profile, analyse.correctedData(profile)
+
+    def _backgroundProfileFitted(self, analyse: datatypes.Analyse, result) -> None:
+        profile, optimalYs = result
+        analyse.setBackgroundProfile(profile, optimalYs)
+        if analyse is not self._calibration.analyse:
+            return
+        if profile is not None:
+            self._backgroundRegion.blockSignals(True)
+            self._backgroundRegion.setRegion(analyse.backgroundRegion)
+            self._backgroundRegion.blockSignals(False)
+            if self._backgroundRegion not in self._plotWidget.plotItem.items:
+                self._plotWidget.addItem(self._backgroundRegion)
+        else:
+            self._plotWidget.removeItem(self._backgroundRegion)
+        self._updatePlotDataItems()
 
     def _fillWidgetsFromCalibration(self) -> None:
         for key, widget in self._generalDataWidgetsMap.items():
@@ -174,7 +236,7 @@ class CalibrationGeneralDataWidget(GeneralDataWidget):
             self._plotWidget.addItem(plotDataItem)
             yMax = max(max(plotDataItem.getData()[1]), yMax)
         self._addInfiniteLines()
-        self._plotWidget.setLimits(yMin=-0.1 * yMax, yMax=1.1 * yMax)
+        self._setPlotLimits(yMax, self._calibration.analyse.channels)
 
     def _addInfiniteLines(self):
         for element in self._calibration.concentrations:
@@ -186,7 +248,7 @@ class CalibrationGeneralDataWidget(GeneralDataWidget):
         ):
             kev = row.kiloelectron_volt
             radiationType = row.radiation_type
-            value = calculation.evToPx(kev)
+            value = float(self._energyCalibration.evToPx(kev))
             infiniteLine = pg.InfiniteLine(
                 pos=value,
                 angle=90,
@@ -210,11 +272,17 @@ class CalibrationGeneralDataWidget(GeneralDataWidget):
     def supply(self, calibration: datatypes.Calibration) -> None:
         if calibration is None:
             return
-        if self._calibration and self._calibration == calibration:
+        if calibration is self._calibration and calibration.version == self._version:
             return
         self.blockSignals(True)
         self._calibration = calibration
+        self._version = calibration.version
         self._element = calibration.element
+        channels = calibration.analyse.channels
+        self._energyCalibration = calculation.getEnergyCalibration().forChannels(
+            channels
+        )
+        self._backgroundRegion.setBounds((0, channels))
         self._plotDataItems = [
             pg.PlotDataItem(
                 d.x,
@@ -1,7 +1,7 @@
 from PyQt6 import QtCore, QtWidgets
 
 from src.utils import datatypes
-from src.views.base.tablewidget import DataframeTableWidget
+from src.views.base.tablewidget import DataframeTableView
 
 
 class LinesTableWidget(QtWidgets.QWidget):
@@ -23,10 +23,10 @@ class LinesTableWidget(QtWidgets.QWidget):
             Configures the main layout of the widget, combining the filter and table display.
 
         setFilter(filterName: str) -> None:
-            Updates the displayed table based on the selected filter option.
+            Shows all lines or only the active ones, based on the selected filter option.
 
         _createTableWidgets() -> None:
-            Initializes the table widgets for displaying all lines and active lines.
+            Initializes the table view displaying the lines.
 
         supply(calibration: Calibration) -> None:
             Updates the widget with new calibration data and refreshes the displayed line tables.
@@ -39,7 +39,6 @@ class LinesTableWidget(QtWidgets.QWidget):
     ):
         super().__init__(parent)
         self._calibration = None
-        self._activeDf = None
         self._linesDf = None
         self._initializeUi()
         if calibration is not None:
@@ -63,27 +62,19 @@ class LinesTableWidget(QtWidgets.QWidget):
     def _setUpView(self) -> None:
         self.mainLayout = QtWidgets.QVBoxLayout()
         self.mainLayout.addLayout(self._searchLayout)
-        self.mainLayout.addWidget(self._linesTableWidget)
+        self.mainLayout.addWidget(self._linesTableView)
         self.setLayout(self.mainLayout)
 
     @QtCore.pyqtSlot(str)
     def setFilter(self, filterName: str) -> None:
-        oldWidget = self.mainLayout.itemAt(1).widget()
-        oldWidget.hide()
-        if filterName == "All Lines":
-            self.mainLayout.replaceWidget(oldWidget, self._linesTableWidget)
-            self._linesTableWidget.selectRow(0)
-            self._linesTableWidget.show()
+        if self._linesDf is None or filterName == "All Lines":
+            self._linesTableView.setRowMask(None)
         else:
-            self.mainLayout.replaceWidget(oldWidget, self._activeTableWidget)
-            self._activeTableWidget.selectRow(0)
-            self._activeTableWidget.show()
+            self._linesTableView.setRowMask(self._linesDf["active"].to_numpy() == 1)
+        self._linesTableView.selectRow(0)
 
     def _createTableWidgets(self) -> None:
-        self._linesTableWidget = DataframeTableWidget(self, autoFill=True)
-        self._linesTableWidget.hide()
-        self._activeTableWidget = DataframeTableWidget(self, autoFill=True)
-        self._activeTableWidget.hide()
+        self._linesTableView = DataframeTableView(self)
 
     def supply(self, calibration: datatypes.Calibration) -> None:
         """Updates the widget with the provided calibration data.
@@ -105,9 +96,7 @@ class LinesTableWidget(QtWidgets.QWidget):
         self.blockSignals(True)
         self._calibration = calibration
         self._linesDf = self._calibration.lines.drop(["line_id", "element_id"], axis=1)
-        self._activeDf = self._linesDf.query("active == 1")
-        self._linesTableWidget.supply(self._linesDf)
-        self._activeTableWidget.supply(self._activeDf)
+        self._linesTableView.supply(self._linesDf)
         if self._searchComboBox.count() == 0:
             self._searchComboBox.clear()
             self._searchComboBox.addItems(["All Lines", "Active Lines"])
@@ -1,17 +1,41 @@
 import contextlib
 
+import numpy as np
 import pandas as pd
 import pyqtgraph as pg
 
 from PyQt6 import QtWidgets, QtCore, QtGui
 from dataclasses import dataclass
-from collections import deque
 from functools import partial
 
 from src.utils import calculation, datatypes
 from src.utils.paths import resourcePath
-
-from src.views.base.tablewidget import DataframeTableWidget, TableItem
+from src.utils.snapshot import FrameSnapshot, History
+
+from src.views.base.spectrumoverlay import SpectrumOverlayItem
+from src.views.base.tablewidget import (
+    ButtonDelegate,
+    ComboBoxDelegate,
+    RowMaskProxyModel,
+)
+
+
+# Columns of the lines the peak search edits, recorded for undo
+HISTORY_COLUMNS = [
+    "condition_id",
+    "active",
+    "low_kiloelectron_volt",
+    "high_kiloelectron_volt",
+]
+
+RADIATION_COLORS = {
+    "Ka": "#00FFFF",
+    "Kb": "#FF00FF",
+    "La": "#FFFF00",
+    "Lb": "#00FF00",
+    "Ly": "#FFA500",
+    "Ma": "#ADD8E6",
+}
 
 
 @dataclass(order=True)
@@ -19,6 +43,8 @@ class PlotData:
     spectrumLine: pg.InfiniteLine
     peakLine: pg.InfiniteLine
     region: pg.LinearRegionItem
+    labels: list[pg.InfLineLabel]
+    packetId: int = -1
 
     def activate(self):
         self.active = True
@@ -33,128 +59,324 @@ class PlotData:
         self.region.setMovable(True)
 
     @classmethod
-    def fromSeries(cls, series: pd.Series) -> "PlotData":
-        spectrumLine = cls._generateLine(series)
-        peakLine = cls._generateLine(series, lineType="peak")
-        rng = (
-            calculation.evToPx(float(series["low_kiloelectron_volt"])),
-            calculation.evToPx(float(series["high_kiloelectron_volt"])),
+    def create(cls) -> "PlotData":
+        peakLine = cls._generateLine()
+        labels = [
+            pg.InfLineLabel(peakLine, movable=False, position=position)
+            for position in [0.9, 0.8]
+        ]
+        return PlotData(cls._generateLine(), peakLine, cls._generateRegion(), labels)
+
+    def configure(
+        self,
+        packetId: int,
+        series: pd.Series,
+        energyCalibration: calculation.EnergyCalibration,
+    ) -> None:
+        """Points the items at the line ``series``, they may come from a pool."""
+        self.packetId = packetId
+        self.active = bool(series["active"])
+        value = float(energyCalibration.evToPx(float(series["kiloelectron_volt"])))
+        style = (
+            QtCore.Qt.PenStyle.SolidLine
+            if self.active
+            else QtCore.Qt.PenStyle.DashLine
+        )
+        color = RADIATION_COLORS.get(series["radiation_type"])
+        for line, width in [(self.spectrumLine, 1), (self.peakLine, 2)]:
+            line.setValue(value)
+            line.setPen(pg.mkPen(color=color, width=width, style=style))
+        for label, text in zip(
+            self.labels, [series["radiation_type"], series["symbol"]]
+        ):
+            label.setText(text)
+        self.region.blockSignals(True)
+        self.region.setBounds((0, energyCalibration.channels))
+        self.region.setRegion(
+            energyCalibration.evToPx(
+                [
+                    float(series["low_kiloelectron_volt"]),
+                    float(series["high_kiloelectron_volt"]),
+                ]
+            ).tolist()
         )
-        region = cls._generateRegion(rng, not bool(series["active"]))
-        return PlotData(spectrumLine, peakLine, region)
+        self.region.blockSignals(False)
+        self.region.setMovable(not self.active)
 
     @staticmethod
-    def _generateLine(series: pd.Series, lineType: str = "spectrum") -> pg.InfiniteLine:
-        value = calculation.evToPx(float(series["kiloelectron_volt"]))
+    def _generateLine() -> pg.InfiniteLine:
         line = pg.InfiniteLine()
         line.setAngle(90)
         line.setMovable(False)
-        line.setValue(value)
-        active = bool(series["active"])
-        pen = pg.mkPen()
-        if active:
-            pen.setStyle(QtCore.Qt.PenStyle.SolidLine)
-        else:
-            pen.setStyle(QtCore.Qt.PenStyle.DashLine)
-        radiation = series["radiation_type"]
-        match radiation:
-            case "Ka":
-                pen.setColor(pg.mkColor("#00FFFF"))
-            case "Kb":
-                pen.setColor(pg.mkColor("#FF00FF"))
-            case "La":
-                pen.setColor(pg.mkColor("#FFFF00"))
-            case "Lb":
-                pen.setColor(pg.mkColor("#00FF00"))
-            case "Ly":
-                pen.setColor(pg.mkColor("#FFA500"))
-            case "Ma":
-                pen.setColor(pg.mkColor("#ADD8E6"))
-        if lineType == "peak":
-            pen.setWidth(2)
-            pos = 1
-            for label in [radiation, series["symbol"]]:
-                pos -= 0.1
-                pg.InfLineLabel(line, text=label, movable=False, position=pos)
-        else:
-            pen.setWidth(1)
-        line.setPen(pen)
         return line
 
     @staticmethod
-    def _generateRegion(
-        rng: list[float, float] | tuple[float, float], movable: bool = True
-    ):
+    def _generateRegion() -> pg.LinearRegionItem:
         region = pg.LinearRegionItem(swapMode="push")
         region.setZValue(10)
-        region.setRegion(rng)
-        region.setBounds((0, 2048))
-        region.setMovable(movable)
         return region
 
 
+class PlotDataPool:
+    """Recycles the plot items of hidden lines.
+
+    Items are only built when a line is first shown, so the cost of a supply
+    does not grow with the number of lines in the table. ``factory`` creates
+    a new ``PlotData`` when the pool is empty.
+    """
+
+    def __init__(self, factory) -> None:
+        self._factory = factory
+        self._free = []
+
+    def acquire(
+        self,
+        packetId: int,
+        series: pd.Series,
+        energyCalibration: calculation.EnergyCalibration,
+    ) -> PlotData:
+        plotData = self._free.pop() if self._free else self._factory()
+        plotData.configure(packetId, series, energyCalibration)
+        return plotData
+
+    def release(self, plotData: PlotData) -> None:
+        plotData.packetId = -1
+        self._free.append(plotData)
+
+
 @dataclass
 class DataPacket:
     packetId: int
-    plotData: PlotData
-    tableRow: dict
+    plotData: PlotData | None = None
+
+
+class PeakSearchTableModel(QtCore.QAbstractTableModel):
+    """Lines of the peak search with their intensity, visibility and status.
+
+    The model reads the lines DataFrame of the widget in place, the widget
+    calls ``refreshRow`` after changing a line. Edits of the condition column
+    are not applied here but emitted with ``conditionEdited`` so the widget
+    can record them for undo.
+    """
+
+    HEADERS = [
+        "",
+        "Element",
+        "Type",
+        "KeV",
+        "Low KeV",
+        "High KeV",
+        "Intensity",
+        "Condition",
+        "Status",
+        "",
+    ]
+    (
+        HIDE_COLUMN,
+        SYMBOL_COLUMN,
+        RADIATION_COLUMN,
+        KEV_COLUMN,
+        LOW_KEV_COLUMN,
+        HIGH_KEV_COLUMN,
+        INTENSITY_COLUMN,
+        CONDITION_COLUMN,
+        STATUS_COLUMN,
+        STATUS_BUTTON_COLUMN,
+    ) = range(10)
+    DATAFRAME_COLUMNS = {
+        SYMBOL_COLUMN: "symbol",
+        RADIATION_COLUMN: "radiation_type",
+        KEV_COLUMN: "kiloelectron_volt",
+        LOW_KEV_COLUMN: "low_kiloelectron_volt",
+        HIGH_KEV_COLUMN: "high_kiloelectron_volt",
+    }
+
+    conditionEdited = QtCore.pyqtSignal(int, str)
+
+    def __init__(self, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self._df = pd.DataFrame()
+        self._intensities = []
+        self._visible = []
+        self.conditionItems = [""]
+        self._icons = {
+            True: QtGui.QIcon(resourcePath("resources/icons/show.png")),
+            False: QtGui.QIcon(resourcePath("resources/icons/hide.png")),
+        }
 
+    def supply(
+        self,
+        dataframe: pd.DataFrame,
+        intensities: list,
+        visible: list[bool],
+        conditionIds: list[int],
+    ) -> None:
+        self.beginResetModel()
+        self._df = dataframe
+        self._intensities = intensities
+        self._visible = visible
+        self.conditionItems = [""] + [f"Condition {c}" for c in conditionIds]
+        self.endResetModel()
+
+    def refreshRow(self, packetId: int) -> None:
+        self.dataChanged.emit(
+            self.index(packetId, 0), self.index(packetId, self.columnCount() - 1)
+        )
 
-class ConditionComboBox(QtWidgets.QComboBox):
-    def __init__(self, parent: QtWidgets.QWidget | None = None):
-        super().__init__(parent)
-        self.currentText_ = super().currentText()
-        self.previousText = self.currentText_
-        self.setObjectName("condition-combo-box")
-        self.currentTextChanged.connect(self._currentTextChanged)
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._df)
 
-    @QtCore.pyqtSlot(str)
-    def _currentTextChanged(self, text: str) -> None:
-        self.previousText = self.currentText_
-        self.currentText_ = text
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
 
-    def setCurrentText(self, text: str | None) -> None:
-        self.previousText = self.currentText_
-        self.currentText_ = text
-        return super().setCurrentText(text)
+    def conditionText(self, packetId: int) -> str:
+        conditionId = self._df.at[packetId, "condition_id"]
+        return "" if pd.isna(conditionId) else f"Condition {int(conditionId)}"
 
+    def isActive(self, packetId: int) -> bool:
+        return bool(self._df.at[packetId, "active"])
 
-class PeakSearchTableWidget(DataframeTableWidget):
-    def __init__(
+    def data(
+        self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole
+    ):
+        if not index.isValid():
+            return None
+        packetId, column = index.row(), index.column()
+        if role in [
+            QtCore.Qt.ItemDataRole.DisplayRole,
+            QtCore.Qt.ItemDataRole.EditRole,
+        ]:
+            if column in self.DATAFRAME_COLUMNS:
+                return str(self._df.at[packetId, self.DATAFRAME_COLUMNS[column]])
+            if column == self.INTENSITY_COLUMN:
+                return str(self._intensities[packetId])
+            if column == self.CONDITION_COLUMN:
+                return self.conditionText(packetId)
+            if column == self.STATUS_COLUMN:
+                return "Activated" if self.isActive(packetId) else "Deactivated"
+            if column == self.STATUS_BUTTON_COLUMN:
+                return "Deactivate" if self.isActive(packetId) else "Activate"
+            return None
+        if role == QtCore.Qt.ItemDataRole.DecorationRole:
+            if column == self.HIDE_COLUMN:
+                return self._icons[self._visible[packetId]]
+            return None
+        if role == QtCore.Qt.ItemDataRole.ForegroundRole:
+            if column == self.STATUS_COLUMN:
+                return QtGui.QBrush(
+                    QtCore.Qt.GlobalColor.darkGreen
+                    if self.isActive(packetId)
+                    else QtCore.Qt.GlobalColor.red
+                )
+            return None
+        if role == QtCore.Qt.ItemDataRole.TextAlignmentRole:
+            return QtCore.Qt.AlignmentFlag.AlignCenter
+        return None
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlag:
+        flags = super().flags(index)
+        if index.column() == self.CONDITION_COLUMN and not self.isActive(index.row()):
+            flags |= QtCore.Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def setData(
         self,
-        parent: QtWidgets.QWidget | None = None,
-        dataframe: pd.DataFrame | None = None,
-        autoFill: bool = False,
-        editable: bool = False,
-    ) -> None:
-        super().__init__(parent, dataframe, autoFill, editable)
+        index: QtCore.QModelIndex,
+        value,
+        role: int = QtCore.Qt.ItemDataRole.EditRole,
+    ) -> bool:
+        if index.column() != self.CONDITION_COLUMN:
+            return False
+        self.conditionEdited.emit(index.row(), value)
+        return True
+
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole,
+    ):
+        if role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+
+class PeakSearchTableView(QtWidgets.QTableView):
+    """Table of the peak search lines, filtered through a row mask proxy.
+
+    Buttons and the condition combo box are painted by delegates, a combo box
+    widget only exists while a condition is being edited.
+    """
+
+    hideClicked = QtCore.pyqtSignal(int)
+    statusClicked = QtCore.pyqtSignal(int)
+
+    def __init__(self, parent: QtWidgets.QWidget | None = None) -> None:
+        super().__init__(parent)
         self.setObjectName("peak-lines-table")
-        self.setHeaders(
-            [
-                "",
-                "Element",
-                "Type",
-                "KeV",
-                "Low KeV",
-                "High KeV",
-                "Intensity",
-                "Condition",
-                "Status",
-                "",
-            ]
+        self.tableModel = PeakSearchTableModel(self)
+        self._proxy = RowMaskProxyModel(self)
+        self._proxy.setSourceModel(self.tableModel)
+        self.setModel(self._proxy)
+        self.setAlternatingRowColors(True)
+        self.setFrameShape(QtWidgets.QFrame.Shape.NoFrame)
+        self.setSelectionMode(QtWidgets.QTableView.SelectionMode.SingleSelection)
+        self.setSelectionBehavior(QtWidgets.QTableView.SelectionBehavior.SelectRows)
+        self.setEditTriggers(
+            QtWidgets.QTableView.EditTrigger.CurrentChanged
+            | QtWidgets.QTableView.EditTrigger.SelectedClicked
+            | QtWidgets.QTableView.EditTrigger.DoubleClicked
+        )
+        self.setMouseTracking(True)
+        self.verticalHeader().setSectionResizeMode(
+            QtWidgets.QHeaderView.ResizeMode.Fixed
         )
+        for column, label in enumerate(PeakSearchTableModel.HEADERS):
+            self.horizontalHeader().setSectionResizeMode(
+                column,
+                (
+                    QtWidgets.QHeaderView.ResizeMode.Stretch
+                    if label
+                    else QtWidgets.QHeaderView.ResizeMode.ResizeToContents
+                ),
+            )
+        hideDelegate = ButtonDelegate(self, "hide-button")
+        hideDelegate.clicked.connect(
+            lambda index: self.hideClicked.emit(self._packetId(index))
+        )
+        statusDelegate = ButtonDelegate(self, "status-button")
+        statusDelegate.clicked.connect(
+            lambda index: self.statusClicked.emit(self._packetId(index))
+        )
+        conditionDelegate = ComboBoxDelegate(
+            self, "condition-combo-box", lambda _: self.tableModel.conditionItems
+        )
+        self.setItemDelegateForColumn(PeakSearchTableModel.HIDE_COLUMN, hideDelegate)
+        self.setItemDelegateForColumn(
+            PeakSearchTableModel.STATUS_BUTTON_COLUMN, statusDelegate
+        )
+        self.setItemDelegateForColumn(
+            PeakSearchTableModel.CONDITION_COLUMN, conditionDelegate
+        )
+        self._delegates = [hideDelegate, statusDelegate, conditionDelegate]
 
-    def currentPacketId(self) -> int:
-        return self.getCurrentRow().get("packetId") if self.getCurrentRow() else -1
+    def _packetId(self, index: QtCore.QModelIndex) -> int:
+        return self._proxy.mapToSource(index).row()
 
-    def getRowByPacketId(self, packetId: int) -> dict:
-        return next((d for d in self.rows.values() if d["packetId"] == packetId), None)
+    def setRowMask(self, mask) -> None:
+        self._proxy.setRowMask(mask)
+
+    def currentPacketId(self) -> int:
+        index = self.currentIndex()
+        return self._packetId(index) if index.isValid() else -1
 
     def selectRowByPacketID(self, packetId: int) -> None:
-        for rowIndex, row in self.rows.items():
-            if row["packetId"] == packetId:
-                self.selectRow(rowIndex)
-                break
+        index = self._proxy.mapFromSource(self.tableModel.index(packetId, 0))
+        if index.isValid():
+            self.selectRow(index.row())
+            self.scrollTo(index)
 
 
 class PeakSearchWidget(QtWidgets.QWidget):
@@ -167,12 +389,17 @@ class PeakSearchWidget(QtWidgets.QWidget):
         super().__init__(parent)
         self._analyse = None
         self._df = None
+        self._calibration = None
+        self._version = None
         self._activeIntensities = None
+        self._intensities = None
         self._dataPackets = None
-        self._stack = None
+        self._history = None
         self._visible = None
         self._elementsInRange = None
-        self._kev = [calculation.pxToEv(i) for i in range(2048)]
+        self._plotDataPool = PlotDataPool(self._createPlotData)
+        self._energyCalibration = calculation.getEnergyCalibration()
+        self._kev = self._energyCalibration.kev.clip(0).round(5)
         self._initializeUi()
         if analyse is not None and dataframe is not None:
             self.supply(analyse, dataframe)
@@ -182,13 +409,14 @@ class PeakSearchWidget(QtWidgets.QWidget):
         self._createActions(
             {
                 "undo": True,
+                "redo": True,
                 "region": False,
             }
         )
         self._createToolBar()
         self._createSearchLayout()
         self._createStatusLayout()
-        self._createTableWidget()
+        self._createTableView()
         self._createPlotViewBox()
         self._setUpView()
 
@@ -203,23 +431,57 @@ class PeakSearchWidget(QtWidgets.QWidget):
             if label == "region":
                 action.setCheckable(True)
                 action.triggered.connect(self._toggleRegions)
-            else:
+            elif label == "undo":
                 action.triggered.connect(self._undo)
+            else:
+                action.triggered.connect(self._redo)
+
+    def _historyColumns(self) -> dict:
+        """Columns of the lines the history records, with the visibility."""
+        columns = {name: self._df[name].to_numpy() for name in HISTORY_COLUMNS}
+        columns["visible"] = self._visible
+        return columns
+
+    def _updateHistoryActions(self) -> None:
+        self._actionsMap["undo"].setDisabled(not self._history.canUndo())
+        self._actionsMap["redo"].setDisabled(not self._history.canRedo())
 
     def _undo(self) -> None:
-        packetId, region, condition, action = self._stack.pop()
-        if not self._stack:
-            self._actionsMap["undo"].setDisabled(True)
-        dataPacket = self._dataPackets[packetId]
-        if action == "region":
-            dataPacket.plotData.region.blockSignals(True)
-            dataPacket.plotData.region.setRegion(region)
-            dataPacket.plotData.region.blockSignals(False)
-        elif action == "condition":
-            dataPacket.tableRow["conditionComboBox"].blockSignals(True)
-            dataPacket.tableRow["conditionComboBox"].setCurrentText(condition)
-            dataPacket.tableRow["conditionComboBox"].blockSignals(False)
-        self._isDataPacketChanged(packetId, action)
+        current = self._history.current
+        self._restore(current.changes(self._history.undo()))
+
+    def _redo(self) -> None:
+        current = self._history.current
+        self._restore(current.changes(self._history.redo()))
+
+    def _restore(self, changes: dict) -> None:
+        """Applies the ``changes`` rows of the current snapshot of the history."""
+        columns = self._history.current.columns
+        packetIds = set()
+        for rows in changes.values():
+            packetIds.update(rows.tolist())
+        for packetId in sorted(packetIds):
+            dataPacket = self._dataPackets[packetId]
+            changed = {name for name, rows in changes.items() if packetId in rows}
+            if "condition_id" in changed:
+                conditionId = columns["condition_id"][packetId]
+                self._conditionChanged(
+                    dataPacket,
+                    "" if pd.isna(conditionId) else f"Condition {int(conditionId)}",
+                )
+            if changed & {"low_kiloelectron_volt", "high_kiloelectron_volt"}:
+                self._restoreRegion(
+                    dataPacket,
+                    columns["low_kiloelectron_volt"][packetId],
+                    columns["high_kiloelectron_volt"][packetId],
+                )
+            if "active" in changed:
+                self._setActive(dataPacket, bool(columns["active"][packetId]))
+            if "visible" in changed:
+                self._visibilityChanged(dataPacket)
+            self._tableView.tableModel.refreshRow(packetId)
+        self._updateHistoryActions()
+        self._touchCalibration(changes)
 
     def _toggleRegions(self, checked: bool) -> None:
         for dataPacket in self._dataPackets:
@@ -238,6 +500,7 @@ class PeakSearchWidget(QtWidgets.QWidget):
 
     def _fillToolBarWithActions(self) -> None:
         self._toolBar.addAction(self._actionsMap["undo"])
+        self._toolBar.addAction(self._actionsMap["redo"])
         self._toolBar.addAction(self._actionsMap["region"])
 
     def _createSearchLayout(self) -> None:
@@ -262,139 +525,59 @@ class PeakSearchWidget(QtWidgets.QWidget):
     def _search(self) -> None:
         symbol = self._searchLineEdit.text()
         radiation = self._searchComboBox.currentText()
+        if symbol == "" and radiation == "":
+            self._tableView.setRowMask(None)
+            return
+        mask = np.ones(len(self._df), dtype=bool)
         if symbol != "":
-            df = self._df.query(f"symbol == '{self._searchLineEdit.text()}'")
-            if radiation != "":
-                df = df.query(
-                    f"radiation_type == '{self._searchComboBox.currentText()}'"
-                )
-        elif radiation != "":
-            df = self._df.query(
-                f"radiation_type == '{self._searchComboBox.currentText()}'"
+            mask &= (self._df["symbol"] == symbol).to_numpy()
+        if radiation != "":
+            mask &= (self._df["radiation_type"] == radiation).to_numpy()
+        if mask.any():
+            self._tableView.setRowMask(mask)
+
+    def _createTableView(self) -> None:
+        self._tableView = PeakSearchTableView(self)
+        self._tableView.setMaximumHeight(200)
+        self._tableView.hideClicked.connect(
+            partial(self._dataPacketChanged, action="visibility")
+        )
+        self._tableView.statusClicked.connect(
+            partial(self._dataPacketChanged, action="status")
+        )
+        self._tableView.tableModel.conditionEdited.connect(
+            lambda packetId, text: self._dataPacketChanged(
+                packetId, "condition", text
             )
-        else:
-            for packetId in self._df.index:
-                self._tableWidget.setRowHidden(packetId, False)
-            return
-        if not df.empty:
-            for packetId in self._df.index:
-                if packetId not in df.index:
-                    self._tableWidget.setRowHidden(packetId, True)
-                else:
-                    self._tableWidget.setRowHidden(packetId, False)
-
-    def _addRow(self, row: dict) -> None:
-        self._tableWidget.setRowCount(self._tableWidget.rowCount() + 1)
-        rowIndex, columnIndex = self._tableWidget.rowCount() - 1, 0
-        for component in row.values():
-            if isinstance(component, QtWidgets.QWidget):
-                self._tableWidget.setCellWidget(rowIndex, columnIndex, component)
-                columnIndex += 1
-            elif isinstance(component, QtWidgets.QTableWidgetItem):
-                item = component.clone()
-                self._tableWidget.setItem(rowIndex, columnIndex, item)
-                columnIndex += 1
-
-    def _createTableWidget(self) -> None:
-        self._tableWidget = PeakSearchTableWidget(self)
-        self._tableWidget.setMaximumHeight(200)
-        self._tableWidget.itemSelectionChanged.connect(self._itemSelectionChanged)
+        )
+        self._tableView.selectionModel().selectionChanged.connect(
+            self._itemSelectionChanged
+        )
 
     @QtCore.pyqtSlot()
     def _itemSelectionChanged(self) -> None:
-        if packetId := self._tableWidget.currentPacketId() == -1:
+        if (packetId := self._tableView.currentPacketId()) == -1:
             return
         if self._visible[packetId]:
             dataPacket = self._dataPackets[packetId]
             self._hoverOverPlotData(dataPacket.plotData)
 
-    def _hoverOverPlotData(self, plotData: datatypes.PlotData):
+    def _hoverOverPlotData(self, plotData: PlotData) -> None:
         minX, maxX = plotData.region.getRegion()
         viewMinX, viewMaxX = self._peakPlot.viewRange()[0]
         if viewMinX > minX or viewMaxX < maxX:
             zoomedArea = (minX - 50, maxX + 50)
             self._zoomRegion.setRegion(zoomedArea)
 
-    @QtCore.pyqtSlot()
-    def _selectDataPacket(self, dataPacket: DataPacket) -> None:
-        if dataPacket.packetId in [row["packetId"] for row in self._tableWidget.rows]:
-            self._tableWidget.selectRowByPacketID(dataPacket.packetId)
-            self._hoverOverPlotData(dataPacket.plotData)
+    def _selectDataPacket(self, packetId: int, *args) -> None:
+        self._tableView.selectRowByPacketID(packetId)
+        self._hoverOverPlotData(self._dataPackets[packetId].plotData)
 
-    def _createTableRow(self, packetId: int, series: pd.Series) -> dict:
+    def _intensity(self, symbol: str, radiation: str):
         try:
-            intensity = self._activeIntensities[series["symbol"]][
-                series["radiation_type"]
-            ]
+            return self._activeIntensities[symbol][radiation]
         except KeyError:
-            intensity = "NA"
-        tableRow = {
-            "packetId": packetId,
-            "hideButton": self._createHideWidget(packetId),
-            "symbol": TableItem(series["symbol"]),
-            "radiation-type": TableItem(series["radiation_type"]),
-            "kiloelectronVolt": TableItem(str(series["kiloelectron_volt"])),
-            "lowKiloelectronVolt": TableItem(str(series["low_kiloelectron_volt"])),
-            "highKiloelectronVolt": TableItem(str(series["high_kiloelectron_volt"])),
-            "intensity": TableItem(str(intensity)),
-            "conditionComboBox": self._createConditionComboBox(packetId, series),
-            "status": (
-                TableItem("Activated")
-                if series["active"] == 1
-                else TableItem("Deactivated")
-            ),
-            "statusButton": self._createStatusButton(packetId, series),
-        }
-        if tableRow["status"].text() == "Activated":
-            tableRow["status"].setForeground(QtCore.Qt.GlobalColor.darkGreen)
-        else:
-            tableRow["status"].setForeground(QtCore.Qt.GlobalColor.red)
-        return tableRow
-
-    def _createHideWidget(self, packetId: int) -> QtWidgets.QPushButton:
-        if self._visible[packetId]:
-            widget = QtWidgets.QPushButton(
-                parent=self, icon=QtGui.QIcon(resourcePath("resources/icons/show.png"))
-            )
-        else:
-            widget = QtWidgets.QPushButton(
-                parent=self, icon=QtGui.QIcon(resourcePath("resources/icons/hide.png"))
-            )
-        widget.setObjectName("hide-button")
-        widget.clicked.connect(partial(self._dataPacketChanged, packetId, "visibility"))
-        return widget
-
-    def _createConditionComboBox(
-        self, packetId: int, series: pd.Series
-    ) -> QtWidgets.QPushButton:
-        widget = ConditionComboBox(self)
-        items = [f"Condition {d.conditionId}" for d in self._analyse.data]
-        items.insert(0, "")
-        widget.addItems(items)
-        if series["active"]:
-            widget.setDisabled(True)
-        if pd.isna(series["condition_id"]) is False:
-            widget.setCurrentText(f"Condition {int(series['condition_id'])}")
-        widget.currentTextChanged.connect(
-            partial(self._dataPacketChanged, packetId, "condition")
-        )
-        return widget
-
-    def _createStatusButton(
-        self, packetId: int, series: pd.Series
-    ) -> QtWidgets.QPushButton:
-        if not series["active"]:
-            widget = QtWidgets.QPushButton("Activate", self)
-        else:
-            widget = QtWidgets.QPushButton("Deactivate", self)
-        widget.setObjectName("status-button")
-        widget.clicked.connect(partial(self._dataPacketChanged, packetId, "status"))
-        return widget
-
-    def _fillTable(self) -> None:
-        self._tableWidget.supply(self._df)
-        for packet in self._dataPackets:
-            self._tableWidget.addRow(packet.tableRow)
+            return "NA"
 
     def _createStatusLayout(self) -> None:
         self._statusLabel = QtWidgets.QLabel(self)
@@ -423,6 +606,10 @@ class PeakSearchWidget(QtWidgets.QWidget):
         self._peakPlot.vb.scaleBy(center=(0, 0))
         self._peakPlot.vb.menu.clear()
         self._peakPlot.setMinimumHeight(250)
+        self._peakCurve = SpectrumOverlayItem()
+        self._peakPlot.addItem(self._peakCurve)
+        self._peakPlot.addItem(self._vLine, ignoreBounds=True)
+        self._peakPlot.addItem(self._hLine, ignoreBounds=True)
         self._peakPlot.sigRangeChanged.connect(self._adjustZoom)
         self._peakPlot.scene().sigMouseMoved.connect(self._mouseMoved)
         self._peakPlot.scene().sigMouseClicked.connect(self._openPopUp)
@@ -451,8 +638,7 @@ class PeakSearchWidget(QtWidgets.QWidget):
         if event.button() != QtCore.Qt.MouseButton.RightButton:
             return
         minX, maxX = self._zoomRegion.getRegion()
-        minKev = calculation.pxToEv(minX)
-        maxKev = calculation.pxToEv(maxX)
+        minKev, maxKev = self._energyCalibration.pxToEv((minX, maxX))
         self._peakPlot.vb.menu.clear()
         self._elementsInRange = self._df.query(
             f"kiloelectron_volt <= {maxKev} and high_kiloelectron_volt >= {minKev}"
@@ -477,27 +663,30 @@ class PeakSearchWidget(QtWidgets.QWidget):
             f"symbol == '{elementSymbol}' and radiation_type == '{radiationType}'"
         )
         packetId = df.index.values[0]
-        self._tableWidget.selectRowByPacketID(packetId)
+        self._tableView.selectRowByPacketID(packetId)
         self._dataPacketChanged(packetId, "visibility")
 
     def _showAll(self) -> None:
         for packetId in self._elementsInRange.index:
             if self._visible[packetId] is False:
-                self._tableWidget.selectRowByPacketID(packetId)
+                self._tableView.selectRowByPacketID(packetId)
                 self._dataPacketChanged(packetId, "visibility")
 
     def _hideAll(self) -> None:
         for packetId in self._elementsInRange.index:
             if self._visible[packetId] is True:
-                self._tableWidget.selectRowByPacketID(packetId)
+                self._tableView.selectRowByPacketID(packetId)
                 self._dataPacketChanged(packetId, "visibility")
 
     def _createSpectrumPlot(self) -> None:
         self._spectrumPlot = self._graphicsLayoutWidget.addPlot(row=1, col=0)
         self._spectrumPlot.setMouseEnabled(x=False, y=False)
         self._spectrumPlot.showGrid(x=True, y=True)
+        self._spectrumCurve = SpectrumOverlayItem()
+        self._spectrumPlot.addItem(self._spectrumCurve)
         self._zoomRegion = pg.LinearRegionItem(clipItem=self._spectrumPlot)
         self._zoomRegion.sigRegionChanged.connect(self._showZoomedRegion)
+        self._spectrumPlot.addItem(self._zoomRegion, ignoreBounds=True)
 
     def _showZoomedRegion(self):
         minX, maxX = self._zoomRegion.getRegion()
@@ -507,50 +696,82 @@ class PeakSearchWidget(QtWidgets.QWidget):
         self.mainLayout = QtWidgets.QVBoxLayout()
         self.mainLayout.addWidget(self._toolBar)
         self.mainLayout.addLayout(self._searchLayout)
-        self.mainLayout.addWidget(self._tableWidget)
+        self.mainLayout.addWidget(self._tableView)
         self.mainLayout.addLayout(self._statusLayout)
         self.mainLayout.addWidget(self._graphicsLayoutWidget)
         self.setLayout(self.mainLayout)
 
-    def _dataPacketChanged(self, packetId: int, action: str) -> bool:
-        dataPacket = self._dataPackets[packetId]
-        condition = dataPacket.tableRow["conditionComboBox"].previousText
-        region = (
-            calculation.evToPx(
-                float(dataPacket.tableRow["lowKiloelectronVolt"].text())
-            ),
-            calculation.evToPx(
-                float(dataPacket.tableRow["highKiloelectronVolt"].text())
-            ),
-        )
-        if self._isDataPacketChanged(packetId, action):
-            self._stack.append((packetId, region, condition, action))
-            self._actionsMap["undo"].setDisabled(False)
-
-    def _isDataPacketChanged(self, packetId: int, action: str) -> bool:
+    def _dataPacketChanged(
+        self, packetId: int, action: str, condition: str | None = None
+    ) -> None:
+        if not self._isDataPacketChanged(packetId, action, condition):
+            return
+        snapshot = self._history.current.update(self._historyColumns(), [packetId])
+        if changes := self._history.current.changes(snapshot):
+            self._history.push(snapshot)
+            self._updateHistoryActions()
+            self._touchCalibration(changes)
+
+    def _touchCalibration(self, changes: dict) -> None:
+        """Stamps the calibration when ``changes`` edited its lines.
+
+        Other widgets refresh on the new version, this one is already up to date.
+        """
+        if set(changes) - {"visible"}:
+            self._calibration.touch()
+            self._version = self._calibration.version
+
+    def _isDataPacketChanged(
+        self, packetId: int, action: str, condition: str | None = None
+    ) -> bool:
         dataPacket = self._dataPackets[packetId]
         if action == "visibility":
-            return self._visibilityChanged(dataPacket)
+            changed = self._visibilityChanged(dataPacket)
         elif action == "condition":
-            return self._conditionChanged(dataPacket)
+            changed = self._conditionChanged(dataPacket, condition)
         elif action == "status":
-            return self._statusChanged(dataPacket)
+            changed = self._statusChanged(dataPacket)
         elif action == "region":
-            return self._regionChanged(dataPacket)
+            changed = self._regionChanged(dataPacket)
+        else:
+            return False
+        if changed:
+            self._tableView.tableModel.refreshRow(packetId)
+        return changed
+
+    def _createPlotData(self) -> PlotData:
+        plotData = PlotData.create()
+        plotData.region.sigRegionChangeFinished.connect(
+            lambda: self._dataPacketChanged(plotData.packetId, "region")
+        )
+        plotData.peakLine.sigClicked.connect(
+            lambda: self._selectDataPacket(plotData.packetId)
+        )
+        plotData.spectrumLine.sigClicked.connect(
+            lambda: self._selectDataPacket(plotData.packetId)
+        )
+        return plotData
+
+    def _releasePlotData(self, dataPacket: DataPacket) -> None:
+        self._erasePlotData(dataPacket.plotData)
+        self._plotDataPool.release(dataPacket.plotData)
+        dataPacket.plotData = None
 
     def _visibilityChanged(self, dataPacket: DataPacket) -> bool:
-        hideButton = dataPacket.tableRow.get("hideButton")
         if self._visible[dataPacket.packetId]:
-            hideButton.setIcon(QtGui.QIcon(resourcePath("resources/icons/hide.png")))
-            self._erasePlotData(dataPacket.plotData)
+            self._releasePlotData(dataPacket)
         else:
-            hideButton.setIcon(QtGui.QIcon(resourcePath("resources/icons/show.png")))
+            dataPacket.plotData = self._plotDataPool.acquire(
+                dataPacket.packetId,
+                self._df.loc[dataPacket.packetId],
+                self._energyCalibration,
+            )
             self._drawPlotData(dataPacket.plotData)
             self._hoverOverPlotData(dataPacket.plotData)
         self._visible[dataPacket.packetId] = not self._visible[dataPacket.packetId]
         return True
 
-    def _drawPlotData(self, plotData: datatypes.PlotData) -> None:
+    def _drawPlotData(self, plotData: PlotData) -> None:
         if plotData.peakLine not in self._peakPlot.items:
             self._peakPlot.addItem(plotData.peakLine)
         if plotData.spectrumLine not in self._spectrumPlot.items:
@@ -561,7 +782,7 @@ class PeakSearchWidget(QtWidgets.QWidget):
         ):
             self._peakPlot.addItem(plotData.region)
 
-    def _erasePlotData(self, plotData: datatypes.PlotData) -> None:
+    def _erasePlotData(self, plotData: PlotData) -> None:
         if plotData.peakLine in self._peakPlot.items:
             self._peakPlot.removeItem(plotData.peakLine)
         if plotData.spectrumLine in self._spectrumPlot.items:
@@ -569,37 +790,37 @@ class PeakSearchWidget(QtWidgets.QWidget):
         if plotData.region in self._peakPlot.items:
             self._peakPlot.removeItem(plotData.region)
 
-    def _conditionChanged(self, dataPacket: DataPacket) -> bool:
-        if conditionId := dataPacket.tableRow.get("conditionComboBox").currentText():
-            conditionId = int(conditionId.split(" ")[-1])
-            dataPacket.plotData.conditionId = conditionId
+    def _conditionChanged(self, dataPacket: DataPacket, condition: str) -> bool:
+        if condition:
+            conditionId = int(condition.split(" ")[-1])
             self._df.at[dataPacket.packetId, "condition_id"] = conditionId
             if analyseData := next(
                 (
                     d
                     for d in self._analyse.data
-                    if d.conditionId == dataPacket.plotData.conditionId
+                    if d.conditionId == conditionId
                 ),
                 None,
             ):
                 y = analyseData.y
-                minX = calculation.evToPx(
-                    self._df.at[dataPacket.packetId, "low_kiloelectron_volt"]
+                evToPx = self._energyCalibration.evToPx
+                minX = float(
+                    evToPx(self._df.at[dataPacket.packetId, "low_kiloelectron_volt"])
                 )
-                maxX = calculation.evToPx(
-                    self._df.at[dataPacket.packetId, "high_kiloelectron_volt"]
+                maxX = float(
+                    evToPx(self._df.at[dataPacket.packetId, "high_kiloelectron_volt"])
                 )
                 intensity = y[round(minX) : round(maxX)].sum()
             else:
                 intensity = "NA"
         else:
+            self._df.at[dataPacket.packetId, "condition_id"] = np.nan
             intensity = "NA"
-        dataPacket.tableRow.get("intensity").setText(str(intensity))
+        self._intensities[dataPacket.packetId] = intensity
         return True
 
     def _statusChanged(self, dataPacket: DataPacket) -> bool:
-        conditionComboBox = dataPacket.tableRow.get("conditionComboBox")
-        if conditionComboBox.currentText() == "":
+        if pd.isna(self._df.at[dataPacket.packetId, "condition_id"]):
             messageBox = QtWidgets.QMessageBox(self)
             messageBox.setIcon(QtWidgets.QMessageBox.Icon.Critical)
             messageBox.setText(
@@ -609,39 +830,32 @@ class PeakSearchWidget(QtWidgets.QWidget):
             messageBox.setStandardButtons(QtWidgets.QMessageBox.StandardButton.Ok)
             messageBox.exec()
             return False
-        self._df.at[dataPacket.packetId, "active"] = int(
-            not self._df.at[dataPacket.packetId, "active"]
-        )
-        statusItem = dataPacket.tableRow.get("status")
-        statusButton = dataPacket.tableRow.get("statusButton")
-        if self._df.at[dataPacket.packetId, "active"]:
-            dataPacket.plotData.activate()
-            statusItem.setText("Activated")
-            statusItem.setForeground(QtCore.Qt.GlobalColor.darkGreen)
-            statusButton.setText("Deactivate")
-            conditionComboBox.setDisabled(True)
-        else:
-            dataPacket.plotData.deactivate()
-            statusItem.setText("Deactivated")
-            statusItem.setForeground(QtCore.Qt.GlobalColor.red)
-            statusButton.setText("Activate")
-            conditionComboBox.setDisabled(False)
-        if self._visible[dataPacket.packetId]:
+        self._setActive(dataPacket, not self._df.at[dataPacket.packetId, "active"])
+        return True
+
+    def _setActive(self, dataPacket: DataPacket, active: bool) -> None:
+        self._df.at[dataPacket.packetId, "active"] = int(active)
+        if dataPacket.plotData is not None:
+            if active:
+                dataPacket.plotData.activate()
+            else:
+                dataPacket.plotData.deactivate()
             self._erasePlotData(dataPacket.plotData)
             self._hoverOverPlotData(dataPacket.plotData)
             self._drawPlotData(dataPacket.plotData)
-        return True
 
-    def _regionChanged(self, dataPacket: DataPacket) -> bool:
+    def _regionChanged(
+        self, dataPacket: DataPacket, region: tuple[float, float] | None = None
+    ) -> bool:
         def getKev(index, default):
             try:
                 return self._kev[int(index)]
             except IndexError:
                 return default
 
-        minX, maxX = dataPacket.plotData.region.getRegion()
-        minKev = getKev(minX, 0)
-        maxKev = getKev(maxX, self._kev[-1])
+        minX, maxX = region or dataPacket.plotData.region.getRegion()
+        minKev = float(getKev(minX, 0))
+        maxKev = float(getKev(maxX, self._kev[-1]))
 
         if analyseData := next(
             (
@@ -658,69 +872,81 @@ class PeakSearchWidget(QtWidgets.QWidget):
         self._df.at[dataPacket.packetId, "low_kiloelectron_volt"] = minKev
         self._df.at[dataPacket.packetId, "high_kiloelectron_volt"] = maxKev
 
-        dataPacket.tableRow.get("lowKiloelectronVolt").setText(str(minKev))
-        dataPacket.tableRow.get("highKiloelectronVolt").setText(str(maxKev))
-        dataPacket.tableRow.get("intensity").setText(str(intensity))
+        self._intensities[dataPacket.packetId] = intensity
         return True
 
+    def _restoreRegion(self, dataPacket: DataPacket, low: float, high: float) -> None:
+        evToPx = self._energyCalibration.evToPx
+        region = (float(evToPx(low)), float(evToPx(high)))
+        if dataPacket.plotData is not None:
+            dataPacket.plotData.region.blockSignals(True)
+            dataPacket.plotData.region.setRegion(region)
+            dataPacket.plotData.region.blockSignals(False)
+        self._regionChanged(dataPacket, region)
+        # The region snaps to channels, keep the energies of the snapshot
+        self._df.at[dataPacket.packetId, "low_kiloelectron_volt"] = low
+        self._df.at[dataPacket.packetId, "high_kiloelectron_volt"] = high
+
+    def _clearCurves(self) -> None:
+        self._spectrumCurve.clear()
+        self._peakCurve.clear()
+
     def displayAnalyseData(self, analyseDataConditionId: int) -> None:
         analyseData = self._analyse.getDataByConditionId(analyseDataConditionId)
-        x = analyseData.x
-        y = analyseData.y
-        self._peakPlot.clear()
-        self._spectrumPlot.clear()
-        self._spectrumPlot.addItem(self._zoomRegion, ignoreBounds=True)
-        self._peakPlot.addItem(self._vLine, ignoreBounds=True)
-        self._peakPlot.addItem(self._hLine, ignoreBounds=True)
-        self._spectrumPlot.setLimits(xMin=0, xMax=max(x), yMin=0, yMax=1.1 * max(y))
-        self._spectrumPlot.setXRange(0, max(x))
-        self._spectrumPlot.setYRange(0, 1.1 * max(y))
-        self._peakPlot.setLimits(xMin=0, xMax=max(x), yMin=0, yMax=1.1 * max(y))
+        # Both plots draw from the pyramid of the data, built once per spectrum
+        pyramid = analyseData.pyramid()
+        for curve in (self._spectrumCurve, self._peakCurve):
+            curve.clear()
+            curve.setCurve(analyseData.conditionId, pyramid, "w")
+        xMax = float(analyseData.x.max())
+        yMax = 1.1 * pyramid.extrema()[1]
+        self._spectrumPlot.setLimits(xMin=0, xMax=xMax, yMin=0, yMax=yMax)
+        self._spectrumPlot.setXRange(0, xMax)
+        self._spectrumPlot.setYRange(0, yMax)
+        self._peakPlot.setLimits(xMin=0, xMax=xMax, yMin=0, yMax=yMax)
         self._peakPlot.setXRange(0, 100)
-        self._spectrumPlot.plot(x=x, y=y, pen=pg.mkPen("w", width=2))
-        self._peakPlot.plot(x=x, y=y, pen=pg.mkPen("w", width=2))
-        for dataPacket in self._dataPackets:
-            if self._visible[dataPacket.packetId]:
-                self._drawPlotData(dataPacket.plotData)
-        self._zoomRegion.setBounds((0, max(x)))
+        self._zoomRegion.setBounds((0, xMax))
         self._zoomRegion.setRegion((0, 100))
         self._setCoordinate(0, 0)
 
     def supply(self, calibration: datatypes.Calibration) -> None:
         analyse = calibration.analyse
         dataframe = calibration.lines
-        if (
-            self._analyse
-            and self._analyse == analyse
-            and self._df is not None
-            and self._df.equals(dataframe)
-        ):
+        if calibration is self._calibration and calibration.version == self._version:
             return
         self.blockSignals(True)
+        for dataPacket in self._dataPackets or []:
+            if dataPacket.plotData is not None:
+                self._releasePlotData(dataPacket)
+        if self._analyse is not analyse:
+            self._clearCurves()
+        self._calibration = calibration
+        self._version = calibration.version
         self._analyse = analyse
         self._df = dataframe
+        self._energyCalibration = calculation.getEnergyCalibration().forChannels(
+            analyse.channels
+        )
+        self._kev = self._energyCalibration.kev.clip(0).round(5)
         self._visible = [False for _ in range(len(self._df))]
         self._activeIntensities = self._analyse.calculateActiveIntensities(self._df)
-        self._dataPackets = []
-        for packetId, s in self._df.iterrows():
-            plotData = PlotData.fromSeries(s)
-            plotData.region.sigRegionChangeFinished.connect(
-                partial(self._dataPacketChanged, packetId, "region")
-            )
-            plotData.peakLine.sigClicked.connect(
-                partial(self._selectDataPacket, plotData)
-            )
-            plotData.spectrumLine.sigClicked.connect(
-                partial(self._selectDataPacket, plotData)
-            )
-            dataPacket = DataPacket(
-                packetId, plotData, self._createTableRow(packetId, s)
-            )
-            self._dataPackets.append(dataPacket)
-        self._stack = deque()
+        self._dataPackets = [DataPacket(packetId) for packetId in self._df.index]
+        self._intensities = [
+            self._intensity(symbol, radiation)
+            for symbol, radiation in zip(self._df["symbol"], self._df["radiation_type"])
+        ]
+        self._history = History(FrameSnapshot.take(self._historyColumns()))
+        self._updateHistoryActions()
+        self._tableView.tableModel.supply(
+            self._df,
+            self._intensities,
+            self._visible,
+            [d.conditionId for d in self._analyse.data],
+        )
         items = self._df["radiation_type"].unique().tolist()
         items.insert(0, "")
+        self._searchComboBox.clear()
         self._searchComboBox.addItems(items)
         self._searchLineEdit.clear()
-        self._fillTable()
+        self._tableView.setRowMask(None)
         self.blockSignals(False)
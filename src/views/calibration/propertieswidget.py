@@ -12,6 +12,8 @@ class CalibrationPropertiesWidget(QtWidgets.QWidget):
         calibration: None = None,
     ) -> None:
         super().__init__(parent)
+        self._calibration = None
+        self._version = None
         self._initializeUi()
         if calibration is not None:
             self.supply(calibration)
@@ -98,10 +100,11 @@ class CalibrationPropertiesWidget(QtWidgets.QWidget):
     def supply(self, calibration: datatypes.Calibration) -> None:
         if calibration is None:
             return
-        if self._calibration and self._calibration == calibration:
+        if calibration is self._calibration and calibration.version == self._version:
             return
         self.blockSignals(True)
         self._calibration = calibration
+        self._version = calibration.version
         self._filenameLineEdit.setText(self._calibration.filename)
         self._analyseFileHyperLink.setText(
             f'<a href="#">{self._calibration.analyse.filePath}</a>'
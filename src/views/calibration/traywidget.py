@@ -156,7 +156,7 @@ class CalibrationTrayWidget(TrayWidget):
                 self._calibrationExplorer.close()
             else:
                 self._calibrationExplorer = CalibrationExplorerWidget(
-                    parent=self, calibration=self._calibration.copy()
+                    parent=self, calibration=self._calibration
                 )
                 self._calibrationExplorer.showMaximized()
                 self._calibrationExplorer.saved.connect(self._saveSignalArrived)
@@ -2,7 +2,7 @@ from PyQt6 import QtWidgets
 
 from src.utils import datatypes
 from src.utils.datatypes import Calibration
-from src.views.base.tablewidget import DataframeTableWidget
+from src.views.base.tablewidget import DataframeTableView
 
 
 class CalibrationsTableWidget(QtWidgets.QWidget):
@@ -13,6 +13,7 @@ class CalibrationsTableWidget(QtWidgets.QWidget):
     ) -> None:
         super().__init__(parent)
         self._method = None
+        self._version = None
         self._initializeUi()
         if method is not None:
             self._tableWidget.supply(
@@ -20,7 +21,7 @@ class CalibrationsTableWidget(QtWidgets.QWidget):
             )
 
     def _initializeUi(self) -> None:
-        self._tableWidget = DataframeTableWidget(self, autoFill=True)
+        self._tableWidget = DataframeTableView(self)
         self._setUpView()
 
     def _setUpView(self) -> None:
@@ -32,10 +33,11 @@ class CalibrationsTableWidget(QtWidgets.QWidget):
     def supply(self, method: datatypes.Method) -> None:
         if method is None:
             return
-        if self._method and self._method == method:
+        if method is self._method and method.version == self._version:
             return
         self.blockSignals(True)
         self._method = method
+        self._version = method.version
         df = method.calibrations.drop("calibration_id", axis=1)
         df["state"] = df["state"].apply(Calibration.convertStateToStatus)
         self._tableWidget.supply(df)
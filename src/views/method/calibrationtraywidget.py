@@ -23,6 +23,7 @@ class MethodCalibrationTrayWidget(CalibrationTrayWidget):
     ):
         super(CalibrationTrayWidget, self).__init__(parent)
         self._method = None
+        self._version = None
         self._df = None
         self._calibration = None
         self._widgets = {
@@ -77,7 +78,7 @@ class MethodCalibrationTrayWidget(CalibrationTrayWidget):
                     index=[0],
                 )
                 self._df.loc[len(self._df)] = row.iloc[0]
-                self._method.addCalibrationLines(self._calibration)
+                self._method.addCalibration(self._calibration)
                 self._insertCalibration()
             else:
                 messageBox = QtWidgets.QMessageBox()
@@ -106,13 +107,14 @@ class MethodCalibrationTrayWidget(CalibrationTrayWidget):
             filename = self._calibration.filename
             index = self._df.query(f"filename == '{filename}'").index
             self._df.drop(index, inplace=True)
-            self._method.removeCalibrationLines(self._calibration)
+            self._method.removeCalibration(self._calibration)
             self._tableWidget.removeRow(self._tableWidget.currentRow())
 
     def supply(self, method: datatypes.Method) -> None:
         if method is None:
             return
-        if self._method and self._method == method:
+        if method is self._method and method.version == self._version:
             return
         self._method = method
+        self._version = method.version
         super().supply(method.calibrations)
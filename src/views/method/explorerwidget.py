@@ -2,6 +2,7 @@ from PyQt6 import QtCore, QtWidgets
 
 from src.utils.datatypes import Method
 from src.utils.database import getDatabase
+from src.utils.registry import getMethodRegistry
 
 from src.views.base.explorerwidget import ExplorerWidget
 from src.views.method.analytesandconditionswidget import AnalytesAndConditionsWidget
@@ -19,7 +20,8 @@ class MethodExplorer(ExplorerWidget):
     ):
         super().__init__(parent)
         self._method = None
-        self._initMethod = None
+        self._version = None
+        self._snapshot = None
         self._widgets = {
             "Calibrations": MethodCalibrationTrayWidget(self),
             "Analytes And Conditions": AnalytesAndConditionsWidget(self, editable=True),
@@ -44,7 +46,7 @@ class MethodExplorer(ExplorerWidget):
             action()
 
     def newMethod(self):
-        if self._method != self._initMethod:
+        if self._isModified():
             messageBox = QtWidgets.QMessageBox(self)
             messageBox.setIcon(QtWidgets.QMessageBox.Icon.Question)
             messageBox.setText(
@@ -64,11 +66,12 @@ class MethodExplorer(ExplorerWidget):
             self.requestNewMethod.emit()
 
     def saveMethod(self) -> None:
-        # if self._method == self._initMethod:
+        # if not self._isModified():
         #     return
         self._method.state = 1
         self._method.save()
-        self._initMethod = self._method.copy()
+        getMethodRegistry().update(self._method)
+        self._snapshot = self._method.snapshot()
         getDatabase().executeQuery(
             "UPDATE Methods "
             f"SET state = {self._method.state} "
@@ -109,6 +112,12 @@ class MethodExplorer(ExplorerWidget):
             newWidget.show()
             newWidget.setFocus()
 
+    def _isModified(self) -> bool:
+        """Whether the method changed since it was supplied or saved."""
+        return self._snapshot is not None and not self._snapshot.matches(
+            self._method
+        )
+
     def _supplyWidgets(self) -> None:
         for widget in self._widgets.values():
             widget.supply(self._method)
@@ -116,17 +125,18 @@ class MethodExplorer(ExplorerWidget):
     def supply(self, method: Method) -> None:
         if method is None:
             return
-        if self._method and self._method == method:
+        if method is self._method and method.version == self._version:
             return
         self.blockSignals(True)
         self._method = method
-        self._initMethod = self._method.copy()
+        self._version = method.version
+        self._snapshot = self._method.snapshot()
         self._supplyWidgets()
         self.blockSignals(False)
         self._treeWidget.setCurrentItem(self._treeWidget.topLevelItem(0))
 
     def closeEvent(self, a0) -> None:
-        if self._method != self._initMethod:
+        if self._isModified():
             messageBox = QtWidgets.QMessageBox(self)
             messageBox.setIcon(QtWidgets.QMessageBox.Icon.Question)
             messageBox.setText(
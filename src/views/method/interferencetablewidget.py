@@ -1,7 +1,7 @@
 from PyQt6 import QtWidgets
 
 from src.utils import datatypes
-from src.views.base.tablewidget import DataframeTableWidget
+from src.views.base.tablewidget import DataframeTableView
 
 
 class InterferencesTableWidget(QtWidgets.QWidget):
@@ -18,7 +18,7 @@ class InterferencesTableWidget(QtWidgets.QWidget):
         self.hide()
 
     def _initializeUi(self) -> None:
-        self._tableWidget = DataframeTableWidget(self, autoFill=True)
+        self._tableWidget = DataframeTableView(self)
         self._setUpView()
 
     def _setUpView(self) -> None:
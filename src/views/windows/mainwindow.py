@@ -1,13 +1,16 @@
+import logging
+
 from functools import partial
-from typing import Optional
 
 import pandas
 import pyqtgraph as pg
 from PyQt6 import QtCore, QtGui, QtWidgets
 
-from src.utils import datatypes
+from src.utils import calculation, datatypes
 from src.utils.database import getDataframe
 from src.utils.paths import resourcePath
+from src.utils.scheduler import BatchLoader, getComputeScheduler
+from src.views.base.spectrumoverlay import SpectrumOverlayItem
 from src.views.base.tablewidget import TableWidget
 from src.views.calibration.traywidget import CalibrationTrayWidget
 from src.views.method.traywidget import MethodTrayWidget
@@ -44,6 +47,7 @@ class AnalyseGeneralDataGroupBox(QtWidgets.QGroupBox):
         super().__init__(parent)
         self.setTitle("General Data")
         self._analyse = None
+        self._version = None
         self._generalDataWidgetsMap = {}
         self._initializeUi()
         if analyse is not None:
@@ -100,13 +104,27 @@ class AnalyseGeneralDataGroupBox(QtWidgets.QGroupBox):
 
     def _generalDataChanged(self, key, widget) -> None:
         if key == "Background Profile":
-            if filename := widget.currentText():
-                profile = datatypes.BackgroundProfile.fromATXBFile(
-                    resourcePath(f"backgrounds/{filename}.atxb")
-                )
-                self._analyse.backgroundProfile = profile
-            else:
-                self._analyse.backgroundProfile = None
+            getComputeScheduler().submit(
+                (self, "background-profile"),
+                self._fitBackgroundProfile,
+                self._analyse,
+                widget.currentText(),
+                callback=partial(self._backgroundProfileFitted, self._analyse),
+            )
+
+    @staticmethod
+    def _fitBackgroundProfile(analyse: datatypes.Analyse, filename: str) -> tuple:
+        profile = None
+        if filename:
+            profile = datatypes.BackgroundProfile.fromATXBFile(
+                resourcePath(f"backgrounds/{filename}.atxb")
+            )
+        return profile, analyse.correctedData(profile)
+
+    def _backgroundProfileFitted(self, analyse: datatypes.Analyse, result) -> None:
+        profile, optimalYs = result
+        analyse.setBackgroundProfile(profile, optimalYs)
+        if analyse is self._analyse:
             self.backgroundChanged.emit()
 
     def _fillWidgetsFromAnalyse(self) -> None:
@@ -122,10 +140,11 @@ class AnalyseGeneralDataGroupBox(QtWidgets.QGroupBox):
             widget.setDisabled(a0)
 
     def supply(self, analyse: datatypes.Analyse) -> None:
-        self.blockSignals(True)
-        if analyse == self._analyse:
+        if analyse is self._analyse and analyse.version == self._version:
             return
+        self.blockSignals(True)
         self._analyse = analyse
+        self._version = analyse.version
         self._fillWidgetsFromAnalyse()
         self.blockSignals(False)
 
@@ -248,6 +267,19 @@ class ConditionFormWidget(QtWidgets.QListView):
         self.blockSignals(False)
 
 
+class ConditionTreeWidgetItem(QtWidgets.QTreeWidgetItem):
+    """Tree item of a condition, drawn by the spectrum overlay once checked."""
+
+    def __init__(self, analyseData: datatypes.AnalyseData, color: str) -> None:
+        super().__init__()
+        self.analyseData = analyseData
+        self.color = color
+
+    @property
+    def curveKey(self) -> int:
+        return id(self)
+
+
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self, bundleType: int = 0):
         super().__init__()
@@ -270,6 +302,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self._createGeneralDataGroupBox()
         self._createConditionFormWidget()
         self._createCoordinateLabel()
+        self._createAnalyseLoader()
         self._setUpView()
 
     def _createActions(self) -> None:
@@ -376,17 +409,36 @@ class MainWindow(QtWidgets.QMainWindow):
         self._plotWidget.showGrid(x=True, y=True)
         self._plotWidget.setFrameShape(QtWidgets.QFrame.Shape.NoFrame)
         self._plotWidget.setMinimumSize(500, 500)
-        self._plotWidget.setXRange(0, 2048)
-        self._plotWidget.setLimits(xMin=-100, xMax=2148, yMax=1)
+        self._plotWidget.setLimits(yMax=1)
+        self._channels = None
+        self._setChannels(calculation.getEnergyCalibration().channels)
+        self._spectrumOverlay = SpectrumOverlayItem()
+        self._plotWidget.addItem(self._spectrumOverlay)
         self._backgroundRegion = pg.LinearRegionItem(
             pen=pg.mkPen(color="#330311", width=2),
             brush=pg.mkBrush(192, 192, 192, 100),
             hoverBrush=pg.mkBrush(169, 169, 169, 100),
-            bounds=(0, 2048),
         )
         self._backgroundRegion.setZValue(10)
         self._plotWidget.scene().sigMouseMoved.connect(self._mouseMoved)
-        self._backgroundRegion.sigRegionChanged.connect(self._backgroundRegionChanged)
+        self._backgroundRegion.sigRegionChanged.connect(self._previewBackgroundRegion)
+        self._backgroundRegion.sigRegionChangeFinished.connect(
+            self._backgroundRegionChanged
+        )
+
+    def _setChannels(self, channels: int) -> None:
+        """Fits the x-axis to spectra of ``channels`` channels."""
+        if channels == self._channels:
+            return
+        self._channels = channels
+        margin = channels / 20
+        self._plotWidget.setLimits(xMin=-margin, xMax=channels + margin)
+        self._plotWidget.setXRange(0, channels)
+
+    def _showBackgroundRegion(self) -> None:
+        self._backgroundRegion.setBounds((0, self._analyse.channels))
+        self._backgroundRegion.setRegion(self._analyse.backgroundRegion)
+        self._plotWidget.addItem(self._backgroundRegion)
 
     def _mouseMoved(self, pos: QtCore.QPointF) -> None:
         if self._plotWidget.sceneBoundingRect().contains(pos):
@@ -396,13 +448,52 @@ class MainWindow(QtWidgets.QMainWindow):
     def _setCoordinate(self, x: float, y: float) -> None:
         self._coordinateLabel.setText(f"x = {round(x, 2)} y = {round(y, 2)}")
 
+    def _previewBackgroundRegion(self) -> None:
+        getComputeScheduler().preview(
+            (self, "background-region"),
+            self._analyse.correctedData,
+            self._analyse.backgroundProfile,
+            self._backgroundRegion.getRegion(),
+            True,
+            callback=partial(
+                self._plotOptimalYs, self._analyse, self._treeWidget.currentItem()
+            ),
+        )
+
     def _backgroundRegionChanged(self) -> None:
-        self._analyse.backgroundRegion = self._backgroundRegion.getRegion()
-        item = self._treeWidget.currentItem()
+        region = self._backgroundRegion.getRegion()
+        getComputeScheduler().submit(
+            (self, "background-region"),
+            self._analyse.correctedData,
+            self._analyse.backgroundProfile,
+            region,
+            callback=partial(
+                self._backgroundRegionCorrected,
+                self._analyse,
+                self._treeWidget.currentItem(),
+                region,
+            ),
+        )
+
+    def _backgroundRegionCorrected(
+        self,
+        analyse: datatypes.Analyse,
+        item: QtWidgets.QTreeWidgetItem,
+        region: tuple,
+        optimalYs: list,
+    ) -> None:
+        analyse.setBackgroundRegion(region, optimalYs)
+        self._plotOptimalYs(analyse, item, optimalYs)
+
+    def _plotOptimalYs(
+        self,
+        analyse: datatypes.Analyse,
+        item: QtWidgets.QTreeWidgetItem,
+        optimalYs: list,
+    ) -> None:
         for i in range(item.childCount()):
-            item.child(i).plotDataItem.setData(
-                self._analyse.data[i].x, self._analyse.data[i].optimalY
-            )
+            if self._spectrumOverlay.hasCurve(key := item.child(i).curveKey):
+                self._spectrumOverlay.setCurveData(key, optimalYs[i])
 
     def _createTreeWidget(self) -> None:
         self._treeWidget = QtWidgets.QTreeWidget(self)
@@ -440,24 +531,26 @@ class MainWindow(QtWidgets.QMainWindow):
         self._actionsMap["results"].setDisabled(False)
         if self._analyse.generalData["Background Profile"]:
             if self._backgroundRegion not in self._plotWidget.plotItem.items:
-                self._backgroundRegion.setRegion(self._analyse.backgroundRegion)
-                self._plotWidget.addItem(self._backgroundRegion)
+                self._showBackgroundRegion()
         elif self._backgroundRegion in self._plotWidget.plotItem.items:
             self._plotWidget.removeItem(self._backgroundRegion)
 
     @QtCore.pyqtSlot(QtWidgets.QTreeWidgetItem, int)
     def _itemChanged(self, item: QtWidgets.QTreeWidgetItem, column: int) -> None:
-        if getattr(item, "plotDataItem", None) is None:
+        if not isinstance(item, ConditionTreeWidgetItem):
             return
         if item.checkState(column) == QtCore.Qt.CheckState.Checked:
-            if item.plotDataItem not in self._plotWidget.plotItem.items:
-                self._plotWidget.addItem(item.plotDataItem)
-                if (
-                    yMax := max(item.plotDataItem.getData()[1])
-                ) * 1.1 > self._plotWidget.getViewBox().state["limits"]["yLimits"][1]:
+            if not self._spectrumOverlay.hasCurve(item.curveKey):
+                self._spectrumOverlay.setCurve(
+                    item.curveKey, item.analyseData.pyramid(corrected=True), item.color
+                )
+                self._setChannels(max(self._channels, self._spectrumOverlay.channels()))
+                _, yMax = self._spectrumOverlay.yRange()
+                limits = self._plotWidget.getViewBox().state["limits"]
+                if yMax * 1.1 > limits["yLimits"][1]:
                     self._plotWidget.setLimits(yMin=-0.1 * yMax, yMax=yMax * 1.1)
         else:
-            self._plotWidget.removeItem(item.plotDataItem)
+            self._spectrumOverlay.removeCurve(item.curveKey)
 
     def _fillTreeWidget(self) -> None:
         items = ["Text Files", "Antique'X Files", "Packet Files"]
@@ -475,8 +568,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if self._analyse:
             if self._analyse.generalData["Background Profile"]:
                 if self._backgroundRegion not in self._plotWidget.plotItem.items:
-                    self._backgroundRegion.setRegion(self._analyse.backgroundRegion)
-                    self._plotWidget.addItem(self._backgroundRegion)
+                    self._showBackgroundRegion()
                     if (item := self._treeWidget.currentItem()).checkState(
                         0
                     ) == QtCore.Qt.CheckState.Unchecked:
@@ -521,34 +613,69 @@ class MainWindow(QtWidgets.QMainWindow):
             "Antique'X Spectrum (*.atx);;Text Spectrum (*.txt)",
         )
         if fileNames:
-            for fileName in fileNames:
-                self._addAnalyseFromFileName(fileName)
+            self._loadAnalyses(fileNames)
             mapper = {"Text Spectrum (*.txt)": 0, "Antique'X Spectrum (*.atx)": 1}
             topLevelItem = self._treeWidget.topLevelItem(mapper[filters])
             if not topLevelItem.isExpanded():
                 self._treeWidget.expandItem(topLevelItem)
 
-    def _addAnalyseFromFileName(self, filename: str) -> None:
-        analyse = self._constructAnalyseFromFilename(filename)
-        if analyse is not None and analyse.data:
-            self.addAnalyse(analyse)
-        else:
+    def _createAnalyseLoader(self) -> None:
+        # Building the tree items of an analyse takes ~10 ms, keep batches short
+        self._analyseLoader = BatchLoader(
+            datatypes.Analyse.fromFile, self, maxWorkers=2, batchSize=4
+        )
+        self._analyseLoader.batchLoaded.connect(self._analysesLoaded)
+        self._analyseLoader.progressed.connect(self._analysesProgressed)
+        self._analyseLoader.finished.connect(self._analysesFinished)
+        self._invalidFileNames = []
+        self._progressDialog = None
+
+    def _loadAnalyses(self, fileNames: list[str]) -> None:
+        if self._progressDialog is None:
+            self._progressDialog = QtWidgets.QProgressDialog(
+                "Opening files...", "Cancel", 0, 0, self
+            )
+            self._progressDialog.setWindowTitle("Open File")
+            self._progressDialog.setWindowModality(
+                QtCore.Qt.WindowModality.WindowModal
+            )
+            self._progressDialog.setMinimumDuration(500)
+            self._progressDialog.canceled.connect(self._analyseLoader.cancel)
+        self._analyseLoader.load(fileNames)
+
+    @QtCore.pyqtSlot(list)
+    def _analysesLoaded(self, batch: list) -> None:
+        self._treeWidget.setUpdatesEnabled(False)
+        for fileName, analyse, error in batch:
+            if analyse is not None and analyse.data:
+                self.addAnalyse(analyse)
+            else:
+                if error is not None:
+                    logging.error(f"Failed to open {fileName}: {error}")
+                self._invalidFileNames.append(fileName)
+        self._treeWidget.setUpdatesEnabled(True)
+
+    @QtCore.pyqtSlot(int, int)
+    def _analysesProgressed(self, done: int, total: int) -> None:
+        if self._progressDialog is not None and not self._progressDialog.wasCanceled():
+            self._progressDialog.setMaximum(total)
+            self._progressDialog.setValue(done)
+
+    @QtCore.pyqtSlot()
+    def _analysesFinished(self) -> None:
+        if self._progressDialog is not None:
+            self._progressDialog.close()
+            self._progressDialog.deleteLater()
+            self._progressDialog = None
+        if self._invalidFileNames:
             messageBox = QtWidgets.QMessageBox(self)
             messageBox.setIcon(QtWidgets.QMessageBox.Icon.Critical)
             messageBox.setWindowTitle("Invalid File Selected!")
             messageBox.setText("Make Sure You Are Opening The Right File")
+            messageBox.setDetailedText("\n".join(self._invalidFileNames))
             messageBox.setStandardButtons(QtWidgets.QMessageBox.StandardButton.Ok)
             messageBox.show()
-
-    @staticmethod
-    def _constructAnalyseFromFilename(filename: str) -> datatypes.Analyse | None:
-        extension = filename[-4:]
-        analyse: Optional[datatypes.Analyse] = None
-        if extension == ".txt":
-            analyse = datatypes.Analyse.fromTXTFile(filename)
-        elif extension == ".atx":
-            analyse = datatypes.Analyse.fromATXFile(filename)
-        return analyse
+            self._invalidFileNames = []
 
     def addAnalyse(self, analyse: datatypes.Analyse) -> None:
         item = QtWidgets.QTreeWidgetItem()
@@ -561,13 +688,10 @@ class MainWindow(QtWidgets.QMainWindow):
             | QtCore.Qt.ItemFlag.ItemIsUserCheckable
         )
         for index, data in enumerate(analyse.data):
-            child = QtWidgets.QTreeWidgetItem()
+            child = ConditionTreeWidgetItem(data, COLORS[index])
             child.setText(0, f"Condition {data.conditionId}")
             child.setFlags(child.flags() | QtCore.Qt.ItemFlag.ItemIsUserCheckable)
             child.setCheckState(0, QtCore.Qt.CheckState.Unchecked)
-            child.plotDataItem = pg.PlotDataItem(
-                x=data.x, y=data.optimalY, pen=pg.mkPen(color=COLORS[index], width=2)
-            )
             item.addChild(child)
             colorButton = pg.ColorButton()
             colorButton.setColor(COLORS[index])
@@ -579,11 +703,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self._treeWidget.topLevelItem(mapper[analyse.extension]).addChild(item)
 
     def _colorChanged(
-        self, item: QtWidgets.QTreeWidgetItem, colorButton: pg.ColorButton
+        self, item: ConditionTreeWidgetItem, colorButton: pg.ColorButton
     ) -> None:
-        self._plotWidget.removeItem(item.plotDataItem)
-        item.plotDataItem.setPen(pg.mkPen(color=colorButton.color(), width=2))
-        self._plotWidget.addItem(item.plotDataItem)
+        item.color = colorButton.color()
+        if self._spectrumOverlay.hasCurve(item.curveKey):
+            self._spectrumOverlay.setCurveColor(item.curveKey, item.color)
 
     def resetWindow(self) -> None:
         messageBox = QtWidgets.QMessageBox(self)
@@ -600,7 +724,10 @@ class MainWindow(QtWidgets.QMainWindow):
                 item = self._treeWidget.topLevelItem(topLevelIndex)
                 while item.childCount() != 0:
                     item.takeChild(0)
+            getComputeScheduler().cancel((self, "background-region"))
             self._plotWidget.clear()
+            self._spectrumOverlay.clear()
+            self._plotWidget.addItem(self._spectrumOverlay)
 
     def _openMethodTrayWidget(self) -> None:
         self._methodTray = MethodTrayWidget(
@@ -621,14 +748,35 @@ class MainWindow(QtWidgets.QMainWindow):
         self._backgroundTray.showMaximized()
 
     def _openResultsWidget(self):
-        self._resultDialog = ResultDialog(
-            self,
-            self._analyse.calculateConcentrations(
-                datatypes.Method.fromATXMFile(resourcePath("methods/Fundamental.atxm"))
-            ),
+        self._actionsMap["results"].setDisabled(True)
+        getComputeScheduler().submit(
+            (self, "results"),
+            self._quantify,
+            self._analyse,
+            callback=self._showResults,
+            errorCallback=self._quantificationFailed,
         )
+
+    @staticmethod
+    def _quantify(analyse: datatypes.Analyse) -> dict:
+        return analyse.calculateConcentrations(
+            datatypes.Method.fromATXMFile(resourcePath("methods/Fundamental.atxm"))
+        )
+
+    def _showResults(self, result: dict) -> None:
+        self._actionsMap["results"].setDisabled(False)
+        self._resultDialog = ResultDialog(self, result)
         self._resultDialog.exec()
 
+    def _quantificationFailed(self, error: Exception) -> None:
+        self._actionsMap["results"].setDisabled(False)
+        messageBox = QtWidgets.QMessageBox(self)
+        messageBox.setIcon(QtWidgets.QMessageBox.Icon.Critical)
+        messageBox.setText(f"The quantification failed: {error}")
+        messageBox.setWindowTitle("Quantification failed")
+        messageBox.setStandardButtons(QtWidgets.QMessageBox.StandardButton.Ok)
+        messageBox.exec()
+
     def saveFile(self) -> None:
         filepath, _ = QtWidgets.QFileDialog.getSaveFileName(
             self,
@@ -0,0 +1,77 @@
+import pytest
+
+import numpy as np
+
+from src.utils import calculation
+
+
+@pytest.fixture
+def linear_calibration():
+    return calculation.EnergyCalibration(1, -0.0255, 0.01491, None)
+
+
+@pytest.fixture
+def quadratic_calibration():
+    return calculation.EnergyCalibration(2, -0.0255, 0.01491, 2e-7, 4096)
+
+
+class TestEnergyCalibration:
+    def test_lookup_table(self, linear_calibration):
+        assert linear_calibration.kev.shape == (2048,)
+        assert linear_calibration.kev[100] == pytest.approx(-0.0255 + 100 * 0.01491)
+        assert not linear_calibration.kev.flags.writeable
+
+    def test_scalar_matches_legacy_functions(self, linear_calibration):
+        assert linear_calibration.evToPx(6.4) == pytest.approx(
+            (6.4 + 0.0255) / 0.01491
+        )
+        assert calculation.pxToEv(100) == pytest.approx(1.4655)
+
+    @pytest.mark.parametrize("calibration", ["linear", "quadratic"])
+    def test_round_trip(self, request, calibration):
+        energyCalibration = request.getfixturevalue(f"{calibration}_calibration")
+        px = np.arange(0, energyCalibration.channels, 7, dtype=float)
+        ev = energyCalibration.pxToEv(px)
+        assert ev.shape == px.shape
+        np.testing.assert_allclose(energyCalibration.evToPx(ev), px, atol=1e-6)
+
+    def test_ev_to_channel_is_clipped(self, linear_calibration):
+        channels = linear_calibration.evToChannel(np.array([-5.0, 6.4, 500.0]))
+        assert channels[0] == 0
+        assert channels[1] == round((6.4 + 0.0255) / 0.01491)
+        assert channels[2] == linear_calibration.channels
+
+    def test_hashable_dict(self, quadratic_calibration):
+        restored = calculation.EnergyCalibration.fromHashableDict(
+            quadratic_calibration.toHashableDict()
+        )
+        assert restored == quadratic_calibration
+
+    def test_for_channels_keeps_energy_range(self, quadratic_calibration):
+        finer = quadratic_calibration.forChannels(8192)
+        assert finer.channels == 8192
+        assert finer.pxToEv(2000) == pytest.approx(quadratic_calibration.pxToEv(1000))
+        assert finer.kev[-1] == pytest.approx(quadratic_calibration.pxToEv(4095.5))
+        assert quadratic_calibration.forChannels(4096) is quadratic_calibration
+
+    def test_from_database(self):
+        energyCalibration = calculation.getEnergyCalibration()
+        assert energyCalibration.energyCalibrationId == 1
+        assert energyCalibration.a1 == pytest.approx(calculation.A1)
+        with pytest.raises(KeyError):
+            calculation.EnergyCalibration.fromDatabase(-1)
+
+
+class TestRebin:
+    def test_integer_ratio_sums_channels(self):
+        counts = np.arange(8)
+        np.testing.assert_array_equal(calculation.rebin(counts, 4), [1, 5, 9, 13])
+        assert calculation.rebin(counts, 8).tolist() == counts.tolist()
+
+    def test_fractional_ratio_keeps_totals(self):
+        counts = np.vstack([np.arange(12.0), np.ones(12)])
+        rebinned = calculation.rebin(counts, 5)
+        assert rebinned.shape == (2, 5)
+        np.testing.assert_allclose(rebinned.sum(axis=1), counts.sum(axis=1))
+        np.testing.assert_allclose(rebinned[0, :2], [1.8, 7.4])
+        np.testing.assert_allclose(calculation.rebin(np.ones(4), 8), np.full(8, 0.5))
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from src.client import InstrumentClient, LoadGenerator, ReplyError, parseMix
+from src.server import QuantificationServer
+from src.utils.synthetic import syntheticAnalyse
+
+
+@pytest.fixture
+def server():
+    server = QuantificationServer(
+        "127.0.0.1", 0, maxWorkers=2, processes=2, useProcesses=False
+    )
+    server.start()
+    yield server
+    server.stop()
+
+
+class TestInstrumentClient:
+    def test_check_and_unknown_method(self, server):
+        async def run():
+            async with InstrumentClient(*server.address) as client:
+                assert (await client.check()).startswith("Server is running")
+                with pytest.raises(ReplyError):
+                    await client.method("DoesNotExist")
+
+        asyncio.run(run())
+
+    def test_text_protocol(self, server):
+        async def run():
+            async with InstrumentClient(*server.address, binary=False) as client:
+                await client.openGui()
+                with pytest.raises(ReplyError, match="Unknown method"):
+                    await client.method("DoesNotExist")
+                with pytest.raises(ReplyError, match="-qnt failed"):
+                    await client.quantify(syntheticAnalyse("text"), "DoesNotExist")
+                # Replies of the text commands above are not left on the stream
+                assert (await client.check()).startswith("Server is running")
+                await client.exitApplication()
+
+        asyncio.run(run())
+        server._thread.join(5)
+        assert not server._thread.is_alive()
+
+
+class TestLoadGenerator:
+    @pytest.mark.parametrize("binary", [True, False], ids=["binary", "text"])
+    def test_report(self, server, binary):
+        generator = LoadGenerator(
+            *server.address,
+            mix={"-chk": 1, "-opn": 1},
+            connections=2,
+            concurrency=4,
+            requests=40,
+            binary=binary,
+        )
+        report = asyncio.run(generator.run())
+        assert report["total"]["count"] == 40
+        assert report["total"]["errors"] == 0
+        assert set(report["commands"]) == {"-chk", "-opn"}
+        stats = report["total"]
+        assert stats["p50"] <= stats["p95"] <= stats["p99"] <= stats["max"]
+
+    def test_mix_needs_method(self):
+        with pytest.raises(ValueError):
+            LoadGenerator("127.0.0.1", 0, mix={"-met": 1})
+
+    def test_parse_mix(self):
+        assert parseMix("-chk=1,-als=2.5,-opn") == {"-chk": 1, "-als": 2.5, "-opn": 1}
+
@@ -1,3 +1,4 @@
+import os
 import pytest
 import socket
 import json
@@ -371,3 +372,107 @@ class TestMethod:
             "mock_open"
         ].return_value.__enter__.return_value
         mock_file_handle.write.assert_called_once_with(b"encrypted_text\n")
+
+
+class TestCalibrationContributions:
+    @pytest.fixture
+    def calibrationFiles(self, tmp_path, monkeypatch):
+        (tmp_path / "calibrations").mkdir()
+        monkeypatch.setattr(
+            datatypes, "resourcePath", lambda path: str(tmp_path / path)
+        )
+
+        def fromATXCFile(cls, filePath):
+            with open(filePath) as f:
+                kwargs = json.load(f)
+            return cls(1, os.path.basename(filePath)[:-5], "Fe", **kwargs)
+
+        monkeypatch.setattr(
+            datatypes.Calibration, "fromATXCFile", classmethod(fromATXCFile)
+        )
+
+        def write(filename, concentration, coefficient, mtime):
+            filePath = tmp_path / "calibrations" / f"{filename}.atxc"
+            filePath.write_text(
+                json.dumps(
+                    {
+                        "concentrations": {"Fe": concentration},
+                        "coefficients": {"Fe": {"Ka": coefficient}},
+                    }
+                )
+            )
+            os.utime(filePath, (mtime, mtime))
+            return datatypes.Calibration.fromATXCFile(str(filePath))
+
+        return write
+
+    @staticmethod
+    def sums(method):
+        return method.coefficientStatistics.sums.loc["Fe-Ka"].to_dict()
+
+    def test_remove_after_edit(self, calibrationFiles):
+        method = datatypes.Method(1, "method")
+        method.calibrations.loc[0, "filename"] = "a"
+        method.addCalibration(calibrationFiles("a", 10.0, 2.0, 1000))
+        method.calibrations.loc[1, "filename"] = "b"
+        method.addCalibration(calibrationFiles("b", 20.0, 3.0, 1000))
+
+        edited = calibrationFiles("b", 20.0, 5.0, 2000)
+        method.calibrations.drop(1, inplace=True)
+        method.removeCalibration(edited)
+
+        assert list(method.contributions) == ["a"]
+        assert self.sums(method) == {"sxy": 20, "sxx": 100, "syy": 4, "count": 1}
+
+    def test_refresh_edited_calibrations(self, calibrationFiles):
+        method = datatypes.Method(1, "method")
+        method.calibrations.loc[0, "filename"] = "a"
+        method.addCalibration(calibrationFiles("a", 10.0, 2.0, 1000))
+        calibrationFiles("a", 10.0, 4.0, 2000)
+
+        method.refreshCalibrations()
+        assert self.sums(method) == {"sxy": 40, "sxx": 100, "syy": 16, "count": 1}
+        assert method.contributions["a"]["mtime"] == 2000
+
+        restored = datatypes.Method.fromHashableDict(
+            json.loads(json.dumps(method.toHashableDict()))
+        )
+        assert restored.contributions == method.contributions
+
+
+class TestVersion:
+    def test_mutators_bump_versions(self):
+        y = np.random.default_rng(0).poisson(100, 2048)
+        analyse = datatypes.Analyse("a.txt", [datatypes.AnalyseData(1, y)])
+        calibration = datatypes.Calibration(1, "calib", "Fe", {"Fe": 10.0})
+        method = datatypes.Method(1, "method")
+        assert len({analyse.version, calibration.version, method.version}) == 3
+        assert analyse.copy().version != analyse.version
+
+        version = calibration.version
+        calibration.analyse = analyse
+        assert calibration.version > version
+        version = calibration.version
+        analyse.setBackgroundRegion((100, 1500), [y.copy()])
+        assert analyse.version > version
+        assert calibration.version == analyse.version
+
+        version = method.version
+        method.addCalibrationLines(calibration)
+        assert method.version > version
+
+
+class TestIntensities:
+    def test_memoized_until_regions_or_background_change(self):
+        y = np.random.default_rng(0).poisson(100, 2048)
+        data = datatypes.AnalyseData(1, y)
+        lines = datatypes.getDataframe("Lines").copy()
+        intensities = data.calculateIntensities(lines)
+        assert data.calculateIntensities(lines.copy()) is intensities
+        lines.at[0, "high_kiloelectron_volt"] += 0.5
+        widened = data.calculateIntensities(lines)
+        assert widened is not intensities
+        symbol, radiation = lines.at[0, "symbol"], lines.at[0, "radiation_type"]
+        assert widened[symbol][radiation] > intensities[symbol][radiation]
+        data.optimalY = y // 2
+        assert data.calculateIntensities(lines) is not widened
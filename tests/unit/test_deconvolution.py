@@ -0,0 +1,64 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from scipy.special import erf
+
+from src.utils import calculation
+from src.utils.deconvolution import PeakFitter
+
+
+@pytest.fixture
+def mock_overlapping_lines():
+    return pd.DataFrame(
+        {
+            "line_id": [1, 2, 3],
+            "symbol": ["Mn", "Fe", "Cu"],
+            "radiation_type": ["Kb", "Ka", "Ka"],
+            "kiloelectron_volt": [6.4904, 6.4039, 8.0478],
+            "low_kiloelectron_volt": [6.3, 6.2, 7.85],
+            "high_kiloelectron_volt": [6.7, 6.6, 8.25],
+            "active": [1, 1, 1],
+            "condition_id": [4.0, 4.0, 4.0],
+        }
+    )
+
+
+def gaussianSpectrum(areas: dict, channels: int = 2048) -> np.ndarray:
+    energyCalibration = calculation.getEnergyCalibration()
+    edges = energyCalibration.pxToEv(np.arange(channels + 1) - 0.5)
+    spectrum = np.zeros(channels)
+    for kev, area in areas.items():
+        sigma = PeakFitter.sigma(np.array(kev))
+        cdf = 0.5 * (1 + erf((edges - kev) / (np.sqrt(2) * sigma)))
+        spectrum += area * np.diff(cdf)
+    return spectrum
+
+
+class TestPeakFitter:
+    def test_clusters(self, mock_overlapping_lines):
+        fitter = PeakFitter(mock_overlapping_lines)
+        assert sorted(c.lineRows.size for c in fitter.clusters) == [1, 2]
+
+    def test_fit_separates_overlaps(self, mock_overlapping_lines):
+        fitter = PeakFitter(mock_overlapping_lines)
+        spectra = np.stack(
+            [
+                gaussianSpectrum({6.4904: 1000, 6.4039: 5000, 8.0478: 2000}),
+                gaussianSpectrum({6.4039: 3000}),
+            ]
+        )
+        intensities = fitter.fit({4: spectra})
+        fractions = np.empty(3)
+        for cluster in fitter.clusters:
+            fractions[cluster.lineRows] = cluster.roiFractions
+        np.testing.assert_allclose(
+            intensities / fractions,
+            [[1000, 5000, 2000], [0, 3000, 0]],
+            atol=1,
+        )
+
+    def test_missing_condition(self, mock_overlapping_lines):
+        fitter = PeakFitter(mock_overlapping_lines)
+        assert np.isnan(fitter.fit({1: np.zeros((1, 2048))})).all()
@@ -0,0 +1,128 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from src.utils import calculation, datatypes
+from src.utils.identification import PeakIdentifier
+
+
+@pytest.fixture
+def mock_identification_lines():
+    return pd.DataFrame(
+        {
+            "line_id": [1, 2, 3, 4],
+            "symbol": ["Fe", "Fe", "Cu", "Mn"],
+            "radiation_type": ["Ka", "Kb", "Ka", "Kb"],
+            "kiloelectron_volt": [6.4039, 7.058, 8.0478, 6.4904],
+            "low_kiloelectron_volt": [6.2, 6.9, 7.9, 6.3],
+            "high_kiloelectron_volt": [6.6, 7.2, 8.2, 6.6],
+            "active": [0, 0, 0, 0],
+            "condition_id": [np.nan, np.nan, np.nan, np.nan],
+        }
+    )
+
+
+@pytest.fixture
+def mock_identification_conditions():
+    return pd.DataFrame({"condition_id": [1, 2], "kilovolt": [8.0, 20.0]})
+
+
+def spectrum(peaks: dict, channels: int = 2048) -> np.ndarray:
+    energyCalibration = calculation.getEnergyCalibration()
+    x = np.arange(channels)
+    y = np.full(channels, 20.0)
+    for kev, height in peaks.items():
+        center = energyCalibration.evToPx(kev)
+        y += height * np.exp(-0.5 * ((x - center) / 4) ** 2)
+    return y
+
+
+class TestPeakIdentifier:
+    def test_detect_peaks(self, mock_identification_lines, mock_conditions):
+        identifier = PeakIdentifier(mock_identification_lines, mock_conditions)
+        spectra = np.stack([spectrum({6.4039: 5000}), spectrum({})])
+        rows, energies, net, snr = identifier.detectPeaks(spectra)
+        assert rows.tolist() == [0]
+        assert energies[0] == pytest.approx(6.4039, abs=0.01)
+
+    def test_match_peaks_uses_energy_index(
+        self, mock_identification_lines, mock_conditions
+    ):
+        identifier = PeakIdentifier(mock_identification_lines, mock_conditions)
+        peakIndexes, lineRows = identifier.matchPeaks(np.array([6.42, 8.05]))
+        assert sorted(zip(peakIndexes, lineRows)) == [(0, 0), (1, 2)]
+
+    def test_identify(
+        self, mock_identification_lines, mock_identification_conditions
+    ):
+        identifier = PeakIdentifier(
+            mock_identification_lines, mock_identification_conditions
+        )
+        analyse = datatypes.Analyse(
+            "fe.txt",
+            [
+                datatypes.AnalyseData(1, spectrum({})),
+                datatypes.AnalyseData(2, spectrum({6.4039: 5000, 7.058: 800})),
+            ],
+        )
+        proposals = identifier.identify([analyse]).set_index("line_id")
+        assert proposals.loc[[1, 2], "active"].all()
+        assert (proposals.loc[[1, 2], "condition_id"] == 2).all()
+        assert 3 not in proposals.index
+
+    def test_apply_proposals(self, mock_identification_lines):
+        proposals = pd.DataFrame(
+            {"line_id": [1, 2], "condition_id": [2, 2], "active": [True, False]}
+        )
+        lines = PeakIdentifier.applyProposals(mock_identification_lines, proposals)
+        assert lines["active"].tolist() == [1, 0, 0, 0]
+        assert lines.at[0, "condition_id"] == 2
+        assert mock_identification_lines["active"].sum() == 0
+
+    def test_apply_calibration_set_sharing_lines(
+        self, mock_identification_lines, mock_identification_conditions
+    ):
+        identifier = PeakIdentifier(
+            mock_identification_lines, mock_identification_conditions
+        )
+        calibrations = [
+            datatypes.Calibration(
+                i,
+                filename,
+                "Fe",
+                {"Fe": concentration},
+                _analyse=datatypes.Analyse(
+                    f"{filename}.txt",
+                    [
+                        datatypes.AnalyseData(1, spectrum({})),
+                        datatypes.AnalyseData(2, spectrum(peaks)),
+                    ],
+                ),
+            )
+            for i, (filename, concentration, peaks) in enumerate(
+                [
+                    ("low", 10.0, {6.4039: 2000, 7.058: 300}),
+                    ("high", 40.0, {6.4039: 5000, 7.058: 800}),
+                ]
+            )
+        ]
+        proposals = identifier.identifyCalibrations(calibrations)
+        shared = proposals[proposals["active"] & (proposals["line_id"] == 1)]
+        assert shared["filename"].tolist() == ["low", "high"]
+
+        lines = PeakIdentifier.applyProposals(mock_identification_lines, proposals)
+        assert lines["active"].tolist() == [1, 1, 0, 0]
+        assert lines.loc[[0, 1], "condition_id"].tolist() == [2, 2]
+
+    def test_apply_best_scoring_proposal(self, mock_identification_lines):
+        proposals = pd.DataFrame(
+            {
+                "line_id": [1, 1, 1],
+                "condition_id": [1, 2, 1],
+                "score": [0.6, 0.9, 0.95],
+                "active": [True, True, False],
+            }
+        )
+        lines = PeakIdentifier.applyProposals(mock_identification_lines, proposals)
+        assert lines.at[0, "condition_id"] == 2
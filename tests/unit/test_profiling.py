@@ -0,0 +1,55 @@
+import json
+import pstats
+
+import numpy as np
+import pytest
+
+from src.utils import datatypes, profiling
+from src.utils.database import getDataframe
+
+
+@pytest.fixture
+def profiler():
+    profiler = profiling.enable()
+    yield profiler
+    profiling.disable()
+
+
+class TestProfiling:
+    def test_disabled(self):
+        profiling.disable()
+        with profiling.stage("decode"):
+            pass
+        assert profiling.snapshot() is None
+
+    def test_nested_stages(self, profiler):
+        @profiling.profiled("intensities")
+        def inner():
+            return 1
+
+        with profiling.stage("decode"):
+            assert inner() == 1
+            inner()
+        stages = profiling.snapshot()["stages"]
+        assert stages["decode"]["count"] == 1
+        assert stages["intensities"]["count"] == 2
+        assert sum(stages["intensities"]["histogram"]) == 2
+        assert stages["decode"]["self"] <= stages["decode"]["total"]
+        assert profiler.edges[("decode", "intensities")][0] == 2
+
+    def test_datatypes_stages(self, profiler):
+        data = datatypes.AnalyseData(1, np.full(2048, 5))
+        data.calculateIntensities(getDataframe("Lines"))
+        data.applyBackgroundProfile(None)
+        assert set(profiler.stages) == {"intensities", "background"}
+
+    def test_exports(self, profiler, tmp_path):
+        with profiling.stage("write"):
+            with profiling.stage("decrypt"):
+                pass
+        profiling.dump(str(tmp_path / "profile.json"))
+        profiling.dump(str(tmp_path / "profile.prof"))
+        report = json.loads((tmp_path / "profile.json").read_text())
+        assert report["stages"]["write"]["count"] == 1
+        stats = pstats.Stats(str(tmp_path / "profile.prof"))
+        assert stats.total_calls == 2
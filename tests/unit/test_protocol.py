@@ -0,0 +1,69 @@
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+from src.utils import protocol
+
+
+@pytest.fixture
+def socket_pair():
+    left, right = socket.socketpair()
+    yield left, right
+    left.close()
+    right.close()
+
+
+class TestFrames:
+    def test_round_trip(self, socket_pair):
+        sender, receiver = socket_pair
+        payload = bytes(range(256)) * 1000
+        thread = threading.Thread(
+            target=protocol.writeFrame, args=(sender, "-als", 7, payload)
+        )
+        thread.start()
+        frame = protocol.readFrame(receiver)
+        thread.join()
+        assert (frame.command, frame.requestId) == ("-als", 7)
+        assert bytes(frame.payload) == payload
+
+    def test_magic_already_read(self, socket_pair):
+        sender, receiver = socket_pair
+        protocol.writeFrame(sender, "-met", 3, "Fundamental")
+        assert receiver.recv(4) == protocol.MAGIC
+        frame = protocol.readFrame(receiver, magicRead=True)
+        assert frame.text() == "Fundamental"
+
+    def test_closed_connection(self, socket_pair):
+        sender, receiver = socket_pair
+        sender.sendall(protocol.packHeader("-als", 1, 100) + b"short")
+        sender.close()
+        with pytest.raises(ConnectionError):
+            protocol.readFrame(receiver)
+
+
+class TestTextProtocol:
+    def test_marker_split_across_sends(self, socket_pair):
+        sender, receiver = socket_pair
+        message = '{"filePath": "é"}'.encode("utf-8")
+        for chunk in [message[:13], message[13:] + b"-s", b"tp", b"-chk"]:
+            sender.sendall(chunk)
+        assert bytes(protocol.recvUntilMarker(receiver)) == message
+        assert receiver.recv(4) == b"-chk"
+
+
+class TestAnalysePayload:
+    def test_round_trip(self):
+        spectra = [
+            {"conditionId": 1, "y": np.arange(2048, dtype=np.uint32)},
+            {"conditionId": 4, "y": np.linspace(0, 1, 2048)},
+        ]
+        payload = protocol.encodeAnalyse(
+            {"filePath": "sample.txt", "data": spectra, "generalData": {}}
+        )
+        decoded = protocol.decodeAnalyse(bytearray(payload))
+        assert decoded["filePath"] == "sample.txt"
+        for expected, data in zip(spectra, decoded["data"]):
+            assert data["conditionId"] == expected["conditionId"]
+            np.testing.assert_array_equal(data["y"], expected["y"])
@@ -0,0 +1,45 @@
+import numpy as np
+
+from src.utils.datatypes import AnalyseData
+from src.utils.pyramid import MinMaxPyramid
+
+
+class TestMinMaxPyramid:
+    def test_levels_hold_block_extrema(self):
+        pyramid = MinMaxPyramid(np.array([0, 5, 1, 1, 9, 2, 3]))
+        minima, maxima = pyramid.level(1)
+        assert minima.tolist() == [[0, 1, 2, 3]]
+        assert maxima.tolist() == [[5, 1, 9, 3]]
+        minima, maxima = pyramid.level(3)
+        assert (minima.tolist(), maxima.tolist()) == ([[0]], [[9]])
+        assert pyramid.extrema() == (0, 9)
+
+    def test_vertices_follow_pixels(self):
+        y = np.random.default_rng(0).poisson(100, 16384)
+        pyramid = MinMaxPyramid(y)
+        x, ys, connect = pyramid.vertices(0, 16384, 1000)
+        assert pyramid.levelFor(16384, 1000) == 4
+        assert x.size == ys.size == 2 * 1024
+        assert ys.max() == y.max() and ys.min() == y.min()
+        assert connect[-1] == 0 and connect[:-1].all()
+        x, ys, _ = pyramid.vertices(100, 600, 1000)
+        assert x.tolist() == list(range(100, 600))
+        assert ys.tolist() == y[100:600].tolist()
+
+    def test_stack_breaks_between_rows(self):
+        first = MinMaxPyramid(np.arange(6))
+        second = MinMaxPyramid(np.arange(6, 12))
+        stacked = MinMaxPyramid.stack([first, second])
+        x, ys, connect = stacked.vertices(1, 4, 10)
+        assert x.tolist() == [1, 2, 3] * 2
+        assert ys.tolist() == [1, 2, 3, 7, 8, 9]
+        assert connect.tolist() == [1, 1, 0, 1, 1, 0]
+        assert stacked.level(1)[1].tolist() == [[1, 3, 5], [7, 9, 11]]
+
+    def test_analyse_data_rebuilds_when_corrected(self):
+        data = AnalyseData(1, np.array([4, 8, 2, 6]))
+        pyramid = data.pyramid(corrected=True)
+        assert data.pyramid(corrected=True) is pyramid
+        data.optimalY = data.y - 2
+        assert data.pyramid(corrected=True).extrema() == (0, 6)
+        assert data.pyramid().extrema() == (2, 8)
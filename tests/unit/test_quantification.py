@@ -0,0 +1,111 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils import datatypes, quantification
+from src.utils.registry import MethodEntry, getMethodRegistry
+from tests.unit.test_deconvolution import gaussianSpectrum
+
+
+@pytest.fixture
+def fe_method(monkeypatch):
+    method = datatypes.Method(1, "FeTest")
+    mask = (method.lines["symbol"] == "Fe") & (method.lines["radiation_type"] == "Ka")
+    method.lines.loc[mask, ["active", "condition_id"]] = [1, 1]
+    method.coefficients = pd.DataFrame({0: [0.01]}, index=["Fe-Ka"])
+    method.interferences = pd.DataFrame({"Fe": [0.0]}, index=["Fe-Ka"])
+    monkeypatch.setitem(
+        getMethodRegistry()._entries, "FeTest", MethodEntry(method, None, b"")
+    )
+    return method
+
+
+@pytest.fixture
+def fe_analyse():
+    y = np.full(2048, 5)
+    y[420:440] = 1000
+    return datatypes.Analyse("sample.txt", [datatypes.AnalyseData(1, y)])
+
+
+class TestQuantification:
+    def test_quantify_uses_cached_method(self, fe_method, fe_analyse):
+        result = quantification.quantify(fe_analyse, "FeTest")
+        assert result["method"] == "FeTest"
+        assert result["concentrations"] == fe_analyse.calculateConcentrations(
+            fe_method
+        )
+        assert result["concentrations"]["Fe"]["Ka"] > 0
+
+    def test_finer_spectra_quantify_alike(self, fe_method, fe_analyse):
+        y = np.repeat(fe_analyse.data[0].y, 4) / 4
+        finer = datatypes.Analyse("fine.txt", [datatypes.AnalyseData(1, y)])
+        assert finer.channels == 8192
+        assert finer.backgroundRegion == (0, 8192)
+        assert finer.calculateConcentrations(
+            fe_method
+        ) == fe_analyse.calculateConcentrations(fe_method)
+
+    def test_binary_request(self, fe_method, fe_analyse):
+        reply = quantification.quantifyBinary(fe_analyse.toBinary(method="FeTest"))
+        assert b'"Fe": {"Ka":' in reply
+
+    def test_unknown_method(self, fe_analyse):
+        with pytest.raises(KeyError):
+            quantification.quantify(fe_analyse, "DoesNotExist")
+
+    def test_fit_mode_separates_overlaps(self, fe_method):
+        lines = fe_method.lines
+        feKa = (lines["symbol"] == "Fe") & (lines["radiation_type"] == "Ka")
+        mnKb = (lines["symbol"] == "Mn") & (lines["radiation_type"] == "Kb")
+        lines.loc[mnKb, ["active", "condition_id"]] = [1, 1]
+        keys = ["Fe-Ka", "Mn-Kb"]
+        fe_method.coefficients = pd.DataFrame({0: [0.01, 0.01]}, index=keys)
+        fe_method.interferences = pd.DataFrame(0.0, index=keys, columns=["Fe", "Mn"])
+        # Only Fe, whose Ka peak lies in the Mn-Kb region too
+        kev = lines.loc[feKa, "kiloelectron_volt"].iloc[0]
+        y = np.round(gaussianSpectrum({kev: 100_000})).astype(int)
+        analyse = datatypes.Analyse("fe.txt", [datatypes.AnalyseData(1, y)])
+
+        reply = quantification.quantifyBinary(
+            analyse.toBinary(method="FeTest", mode="fit")
+        )
+        result = json.loads(reply)
+        assert result["mode"] == "fit"
+        assert result["concentrations"] == analyse.calculateConcentrations(
+            fe_method, "fit"
+        )
+        assert result["concentrations"]["Fe"]["Ka"] == pytest.approx(1000, rel=1e-3)
+        assert "Mn" not in result["concentrations"]
+        assert "Mn" in analyse.calculateConcentrations(fe_method)
+
+    def test_unknown_mode(self, fe_method, fe_analyse):
+        with pytest.raises(ValueError):
+            quantification.quantify(fe_analyse, "FeTest", mode="peaks")
+
+    def test_profile_reloaded_once_saved(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            quantification, "resourcePath", lambda path: str(tmp_path / path)
+        )
+        reads = []
+
+        def fromATXBFile(path):
+            reads.append(path)
+            return datatypes.BackgroundProfile(len(reads), "Bg", "")
+
+        monkeypatch.setattr(
+            datatypes.BackgroundProfile, "fromATXBFile", staticmethod(fromATXBFile)
+        )
+        monkeypatch.setattr(quantification, "_profiles", {})
+        path = tmp_path / "backgrounds" / "Bg.atxb"
+        path.parent.mkdir()
+        path.write_bytes(b"")
+        first = quantification.getBackgroundProfile("Bg")
+        assert quantification.getBackgroundProfile("Bg") is first
+        mtime = path.stat().st_mtime_ns + 10**9
+        os.utime(path, ns=(mtime, mtime))
+        assert quantification.getBackgroundProfile("Bg").profileId == 2
+        with pytest.raises(KeyError):
+            quantification.getBackgroundProfile("Missing")
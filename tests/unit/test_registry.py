@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from src.utils import datatypes, registry
+
+
+@pytest.fixture
+def method_registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        registry.MethodRegistry,
+        "methodPath",
+        staticmethod(lambda name: str(tmp_path / f"{name}.atxm")),
+    )
+    loads = []
+
+    def fromATXMFile(path):
+        loads.append(path)
+        return datatypes.Method(1, os.path.basename(path)[:-5])
+
+    monkeypatch.setattr(registry.Method, "fromATXMFile", staticmethod(fromATXMFile))
+    (tmp_path / "FeTest.atxm").write_bytes(b"")
+    methodRegistry = registry.MethodRegistry()
+    methodRegistry.loads = loads
+    return methodRegistry
+
+
+class TestMethodRegistry:
+    def test_reuses_fresh_entry(self, method_registry):
+        first = method_registry.get("FeTest")
+        assert method_registry.get("FeTest") is first
+        assert method_registry.cached("FeTest") is first
+        assert len(method_registry.loads) == 1
+        assert first.forVB == first.method.forVB().encode("utf-8")
+
+    def test_reloads_when_file_changes(self, method_registry):
+        first = method_registry.get("FeTest")
+        path = method_registry.methodPath("FeTest")
+        os.utime(path, ns=(first.mtime + 10**9, first.mtime + 10**9))
+        assert method_registry.cached("FeTest") is None
+        assert method_registry.get("FeTest") is not first
+        assert len(method_registry.loads) == 2
+
+    def test_update_replaces_entry(self, method_registry):
+        method_registry.get("FeTest")
+        saved = datatypes.Method(1, "FeTest", "saved")
+        method_registry.update(saved)
+        assert method_registry.method("FeTest").description == "saved"
+        assert len(method_registry.loads) == 1
+
+    def test_invalidate(self, method_registry):
+        method_registry.get("FeTest")
+        method_registry.invalidate("FeTest")
+        assert method_registry.cached("FeTest") is None
+
+    def test_unknown_method(self, method_registry):
+        with pytest.raises(KeyError):
+            method_registry.get("DoesNotExist")
+
+    def test_method_saved_after_start(self, method_registry):
+        path = method_registry.methodPath("CuTest")
+        with open(path, "wb"):
+            pass
+        assert method_registry.method("CuTest").filename == "CuTest"
+        with pytest.raises(KeyError):
+            method_registry.get("../FeTest")
@@ -0,0 +1,100 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from src.utils.regression import RegressionStatistics
+
+
+class TestRegressionStatistics:
+    def test_matches_batch_regression(self):
+        keys = ["Fe-Ka", "Cu-Ka", "Fe-Ka", "Cu-Ka", "Fe-Ka"]
+        x = [1.0, 2.0, 2.0, 4.0, 3.0]
+        y = [3.1, 1.2, 5.8, 2.1, 9.3]
+        statistics = RegressionStatistics(["key"])
+        statistics.update(keys[:2], x[:2], y[:2])
+        statistics.update(keys[2:], x[2:], y[2:])
+        result = statistics.result()
+        for key in ["Fe-Ka", "Cu-Ka"]:
+            xs = np.array([v for k, v in zip(keys, x) if k == key])
+            ys = np.array([v for k, v in zip(keys, y) if k == key])
+            (slope,), (rss,), *_ = np.linalg.lstsq(xs[:, None], ys, rcond=None)
+            uncertainty = np.sqrt(rss / (len(xs) - 1) / (xs @ xs))
+            assert result.toSeries()[key] == pytest.approx(slope)
+            assert result.uncertaintySeries()[key] == pytest.approx(uncertainty)
+
+    def test_duplicate_concentrations_are_pooled(self):
+        statistics = RegressionStatistics(["key"])
+        statistics.update(["Fe-Ka"] * 3, [2, 2, 4], [2, 6, 8])
+        result = statistics.result()
+        assert result.counts.tolist() == [3]
+        assert result.slopes[0] == pytest.approx(48 / 24)
+        assert result.uncertainties[0] > 0
+
+    def test_tuple_keys_and_scale(self):
+        statistics = RegressionStatistics(["key", "interferer"])
+        statistics.update(
+            [("Fe-Ka", "Mn"), ("Fe-Ka", "Cr"), ("Fe-Ka", "Mn")],
+            [1, 1, 2],
+            [0.1, 0.2, 0.2],
+        )
+        result = statistics.result(scale=100)
+        series = result.toSeries()
+        assert series[("Fe-Ka", "Mn")] == pytest.approx(10)
+        assert series[("Fe-Ka", "Cr")] == pytest.approx(20)
+        assert np.isnan(result.uncertaintySeries()[("Fe-Ka", "Cr")])
+
+    def test_remove_restores_previous_fit(self):
+        statistics = RegressionStatistics(["key", "interferer"])
+        statistics.update([("Fe-Ka", "Mn"), ("Fe-Ka", "Cr")], [1, 1], [0.1, 0.2])
+        before = statistics.result().toSeries()
+        statistics.update([("Fe-Ka", "Mn"), ("Cu-Ka", "Ni")], [2, 3], [0.5, 0.3])
+        statistics.update(
+            [("Fe-Ka", "Mn"), ("Cu-Ka", "Ni")], [2, 3], [0.5, 0.3], sign=-1
+        )
+        after = statistics.result().toSeries()
+        assert after.index.tolist() == before.index.tolist()
+        np.testing.assert_allclose(after.values, before.values)
+
+    def test_hashable_dict_round_trip(self):
+        statistics = RegressionStatistics(["key", "interferer"])
+        statistics.update([("Fe-Ka", "Mn")], [1.5], [0.3])
+        restored = RegressionStatistics.fromHashableDict(statistics.toHashableDict())
+        pd.testing.assert_frame_equal(restored.sums, statistics.sums)
+
+    def test_weighted_fit_and_residuals(self):
+        keys = ["Fe-Ka", "Fe-Ka", "Fe-Ka", "Cu-Ka", "Cu-Ka"]
+        x = np.array([1.0, 2.0, 3.0, 1.0, 2.0])
+        y = np.array([2.2, 3.9, 6.3, 0.4, 1.1])
+        w = np.array([1.0, 4.0, 0.5, 2.0, 1.0])
+        statistics = RegressionStatistics(["key"])
+        statistics.update(keys, x, y, weights=w)
+        result = statistics.result(scale=100)
+        residuals = result.residuals(keys, x, y)
+        for key in ["Fe-Ka", "Cu-Ka"]:
+            rows = np.array([k == key for k in keys])
+            root = np.sqrt(w[rows])
+            (slope,), *_ = np.linalg.lstsq(
+                (x[rows] * root)[:, None], y[rows] * root, rcond=None
+            )
+            expected = y[rows] - slope * x[rows]
+            rss = w[rows] @ expected**2
+            sxx = w[rows] @ x[rows] ** 2
+            uncertainty = np.sqrt(rss / (rows.sum() - 1) / sxx)
+            assert result.toSeries()[key] == pytest.approx(slope * 100)
+            assert result.rssSeries()[key] == pytest.approx(rss)
+            assert result.uncertaintySeries()[key] == pytest.approx(uncertainty * 100)
+            np.testing.assert_allclose(residuals[rows], expected)
+        # Uniform weights would fit Fe-Ka differently
+        assert result.toSeries()["Fe-Ka"] != pytest.approx(
+            100 * (x[:3] @ y[:3]) / (x[:3] @ x[:3])
+        )
+
+    def test_remove_weighted_observations(self):
+        statistics = RegressionStatistics(["key"])
+        statistics.update(["Fe-Ka"] * 2, [1, 2], [2, 4.2], weights=[1, 3])
+        before = statistics.sums.copy()
+        statistics.update(["Fe-Ka"], [3], [5.0], weights=[2])
+        statistics.update(["Fe-Ka"], [3], [5.0], sign=-1, weights=[2])
+        pd.testing.assert_frame_equal(statistics.sums, before)
+        assert np.isnan(statistics.result().residuals(["Cu-Ka"], [1], [1])[0])
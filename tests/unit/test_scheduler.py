@@ -0,0 +1,185 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src.utils.datatypes import (
+    Analyse,
+    AnalyseData,
+    BackgroundProfile,
+    previewDecimation,
+)
+from src.utils.scheduler import BatchLoader, ComputeScheduler
+
+
+@pytest.fixture
+def scheduler(qtbot):
+    scheduler = ComputeScheduler(maxWorkers=2)
+    yield scheduler
+    scheduler.shutdown()
+
+
+class TestComputeScheduler:
+    def test_delivers_result_in_gui_thread(self, qtbot, scheduler):
+        results = []
+        scheduler.submit(
+            "source",
+            lambda a, b: (a + b, threading.current_thread()),
+            1,
+            2,
+            callback=results.append,
+        )
+        qtbot.waitUntil(lambda: len(results) == 1)
+        value, worker = results[0]
+        assert value == 3
+        assert worker is not threading.main_thread()
+        assert not scheduler.isBusy("source")
+
+    def test_coalesces_and_drops_stale_results(self, qtbot, scheduler):
+        started = threading.Event()
+        release = threading.Event()
+        calls, results = [], []
+
+        def work(value):
+            calls.append(value)
+            if value == 0:
+                started.set()
+                release.wait(5)
+            return value
+
+        scheduler.submit("source", work, 0, callback=results.append)
+        started.wait(5)
+        for value in range(1, 5):
+            scheduler.submit("source", work, value, callback=results.append)
+        release.set()
+        qtbot.waitUntil(lambda: not scheduler.isBusy("source"))
+        assert calls == [0, 4]
+        assert results == [4]
+        assert scheduler.stats()["coalesced"] == 3
+        assert scheduler.stats()["dropped"] == 1
+
+    def test_cancel(self, qtbot, scheduler):
+        release = threading.Event()
+        results = []
+        scheduler.submit("source", release.wait, 5, callback=results.append)
+        scheduler.cancel("source")
+        release.set()
+        qtbot.waitUntil(lambda: not scheduler.isBusy("source"))
+        qtbot.wait(10)
+        assert results == []
+
+    def test_error_callback(self, qtbot, scheduler):
+        errors = []
+        scheduler.submit("source", lambda: 1 / 0, errorCallback=errors.append)
+        qtbot.waitUntil(lambda: len(errors) == 1)
+        assert isinstance(errors[0], ZeroDivisionError)
+
+    def test_result_supersedes_preview(self, qtbot, scheduler):
+        release = threading.Event()
+        previews, results = [], []
+        scheduler.preview("source", release.wait, 5, callback=previews.append)
+        scheduler.submit("source", str, "full", callback=results.append)
+        qtbot.waitUntil(lambda: len(results) == 1)
+        release.set()
+        qtbot.waitUntil(lambda: not scheduler.isBusy(("source", "preview")))
+        assert results == ["full"]
+        assert previews == []
+
+    def test_preview_cancels_result(self, qtbot, scheduler):
+        release = threading.Event()
+        previews, results = [], []
+        scheduler.submit("source", release.wait, 5, callback=results.append)
+        scheduler.preview("source", str, "preview", callback=previews.append)
+        qtbot.waitUntil(lambda: len(previews) == 1)
+        release.set()
+        qtbot.waitUntil(lambda: not scheduler.isBusy("source"))
+        assert previews == ["preview"]
+        assert results == []
+
+    def test_keys_are_independent(self, qtbot, scheduler):
+        results = {}
+        for key in ["a", "b"]:
+            scheduler.submit(
+                key, str.upper, key, callback=lambda r, k=key: results.update({k: r})
+            )
+        qtbot.waitUntil(lambda: len(results) == 2)
+        assert results == {"a": "A", "b": "B"}
+
+
+class TestBatchLoader:
+    def test_delivers_every_result_in_batches(self, qtbot):
+        loader = BatchLoader(lambda value: 1 / value, batchSize=3, interval=5)
+        batches = []
+        loader.batchLoaded.connect(batches.append)
+        with qtbot.waitSignal(loader.finished):
+            loader.load([1, 2, 0, 4, 5, 8, 10])
+        loader.shutdown()
+        assert all(len(batch) <= 3 for batch in batches)
+        results = {
+            value: (result, error) for b in batches for value, result, error in b
+        }
+        assert results.keys() == {1, 2, 0, 4, 5, 8, 10}
+        assert results[4] == (0.25, None)
+        assert isinstance(results[0][1], ZeroDivisionError)
+        assert not loader.isRunning()
+
+    def test_cancel(self, qtbot):
+        started = threading.Event()
+        release = threading.Event()
+
+        def work(value):
+            started.set()
+            release.wait(5)
+            return value
+
+        loader = BatchLoader(work, maxWorkers=1)
+        batches, progress = [], []
+        loader.batchLoaded.connect(batches.append)
+        loader.progressed.connect(lambda done, total: progress.append((done, total)))
+        loader.load(list(range(10)))
+        started.wait(5)
+        loader.cancel()
+        release.set()
+        qtbot.waitUntil(lambda: not loader.isRunning())
+        loader.shutdown()
+        assert [value for batch in batches for value, _, _ in batch] == [0]
+        assert progress[-1] == (10, 10)
+
+
+class TestCorrectedData:
+    def test_matches_background_region_setter(self):
+        rng = np.random.default_rng(0)
+        y = rng.poisson(100, 2048) + np.linspace(500, 0, 2048).astype(int)
+        profile = BackgroundProfile(1, "test", "", smoothness=4.0)
+        expected = Analyse("a.txt", [AnalyseData(1, y)])
+        expected.backgroundProfile = profile
+        expected.backgroundRegion = (100, 1500)
+        analyse = Analyse("a.txt", [AnalyseData(1, y)])
+        optimalYs = analyse.correctedData(profile, (100, 1500))
+        assert np.array_equal(analyse.data[0].optimalY, y)
+        analyse.setBackgroundProfile(profile, analyse.correctedData(profile))
+        analyse.setBackgroundRegion((100, 1500), optimalYs)
+        assert np.array_equal(analyse.data[0].optimalY, expected.data[0].optimalY)
+        assert analyse.backgroundRegion == (100, 1500)
+        assert analyse.generalData["Background Profile"] == "test"
+
+    def test_preview_approximates_full_fit(self):
+        x = np.arange(16384)
+        y = np.random.default_rng(0).poisson(2000 * np.exp(-x / 6000) + 50)
+        data = AnalyseData(1, y)
+        profile = BackgroundProfile(1, "test", "", smoothness=16.0, distance="8")
+        decimation = previewDecimation(y.size)
+        assert decimation == 16
+        full = y - data.correctedY(profile)
+        preview = y - data.correctedY(profile, decimation=decimation)
+        assert np.abs(preview - full).mean() < 0.05 * full.mean()
+
+    def test_peak_kwargs_scale_sample_distances(self):
+        profile = BackgroundProfile(
+            1, "test", "", distance="10", width="(2, 8)", height="5"
+        )
+        assert profile.peakKwargs(0.25) == {
+            "distance": 2,
+            "width": (0.5, 2.0),
+            "height": 5,
+        }
@@ -0,0 +1,67 @@
+import socket
+
+import pytest
+
+from src.server import QuantificationServer
+from src.utils import protocol
+
+
+@pytest.fixture
+def server():
+    server = QuantificationServer(
+        "127.0.0.1", 0, maxWorkers=2, processes=2, useProcesses=False
+    )
+    server.start()
+    yield server
+    server.stop()
+
+
+def connect(server: QuantificationServer) -> socket.socket:
+    return socket.create_connection(server.address, timeout=5)
+
+
+class TestQuantificationServer:
+    def test_text_status(self, server):
+        with connect(server) as client:
+            client.sendall(b"-chk")
+            assert client.recv(255).startswith(b"Server is running")
+
+    def test_concurrent_clients(self, server):
+        clients = [connect(server) for _ in range(3)]
+        try:
+            for requestId, client in enumerate(clients):
+                protocol.writeFrame(client, "-chk", requestId)
+            for requestId, client in enumerate(clients):
+                frame = protocol.readFrame(client)
+                assert (frame.command, frame.requestId) == ("-chk", requestId)
+        finally:
+            for client in clients:
+                client.close()
+
+    def test_unknown_frame_replies_error(self, server):
+        with connect(server) as client:
+            protocol.writeFrame(client, "-xyz", 42)
+            frame = protocol.readFrame(client)
+            assert (frame.command, frame.requestId) == ("-err", 42)
+
+    def test_stop_closes_connections(self, server):
+        client = connect(server)
+        client.sendall(b"-chk")
+        client.recv(255)
+        server.stop()
+        assert not server._thread.is_alive()
+        assert client.recv(1) == b""
+        client.close()
+
+    def test_stats(self, server):
+        with connect(server) as client:
+            payload = protocol.encodeAnalyse(
+                {"method": "DoesNotExist", "data": [{"conditionId": 1, "y": [0]}]}
+            )
+            protocol.writeFrame(client, "-qnt", 1, payload)
+            assert protocol.readFrame(client).command == "-err"
+            protocol.writeFrame(client, "-sts", 2)
+            stats = protocol.readFrame(client).json()
+        assert stats["queueDepth"] == 0
+        assert stats["failed"] == 1
+        assert stats["freeSlots"] == stats["queueSize"] + stats["processes"]
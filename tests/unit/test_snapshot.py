@@ -0,0 +1,83 @@
+import numpy as np
+import pandas
+
+from src.utils.datatypes import Analyse, AnalyseData, Calibration
+from src.utils.snapshot import FrameSnapshot, History
+
+
+class TestFrameSnapshot:
+    def test_update_shares_unchanged_columns(self):
+        frame = pandas.DataFrame(
+            {"a": [1.0, 2.0, np.nan], "b": [0, 1, 0], "c": ["x", "y", "z"]}
+        )
+        first = FrameSnapshot.take(frame)
+        frame.at[1, "b"] = 0
+        second = first.update(frame, [1])
+        assert second.columns["a"] is first.columns["a"]
+        assert second.columns["c"] is first.columns["c"]
+        assert not second.columns["b"].flags.writeable
+        assert first.changes(second).keys() == {"b"}
+        assert first.changes(second)["b"].tolist() == [1]
+        assert second.matches(frame) and not first.matches(frame)
+
+    def test_history_undo_redo(self):
+        columns = {"a": np.zeros(4), "visible": [False] * 4}
+        history = History(FrameSnapshot.take(columns))
+        for row in range(3):
+            columns["visible"][row] = True
+            history.push(history.current.update(columns, [row]))
+        assert history.canUndo() and not history.canRedo()
+        current = history.current
+        changes = current.changes(history.undo())
+        assert {name: rows.tolist() for name, rows in changes.items()} == {
+            "visible": [2]
+        }
+        history.redo()
+        assert history.current is current
+
+
+class TestSnapshot:
+    def test_calibration_changes(self):
+        y = np.random.default_rng(0).poisson(100, 2048)
+        analyse = Analyse("a.txt", [AnalyseData(1, y)])
+        calibration = Calibration(1, "calib", "Fe", {"Fe": 10.0}, 0, analyse)
+        snapshot = calibration.snapshot()
+        assert snapshot.matches(calibration)
+        calibration.lines.at[0, "active"] = 1
+        assert not snapshot.matches(calibration)
+        calibration.lines.at[0, "active"] = 0
+        calibration.concentrations["Fe"] = 12.0
+        assert not snapshot.matches(calibration)
+        calibration.concentrations["Fe"] = 10.0
+        assert snapshot.matches(calibration)
+        analyse.setBackgroundRegion((100, 1500), [y.copy()])
+        assert not snapshot.matches(calibration)
+
+    def test_restore_changed_rows(self):
+        calibration = Calibration(1, "calib", "Fe", {"Fe": 10.0})
+        snapshot = calibration.snapshot()
+        lines = calibration.lines
+        activeColumn = snapshot.frames["_lines"].columns["active"]
+        rows = np.flatnonzero(lines["active"] == 0)[:2].tolist()
+        lines.loc[rows, "active"] = 1
+        lines.at[rows[1], "condition_id"] = 9
+        calibration.concentrations["Fe"] = 12.0
+
+        changes = snapshot.changes(calibration)
+        assert set(changes) == {"_lines", "concentrations"}
+        assert changes["_lines"]["active"].tolist() == rows
+        assert changes["_lines"]["condition_id"].tolist() == rows[1:]
+
+        snapshot.restore(calibration, changes)
+        assert snapshot.matches(calibration)
+        assert calibration.lines is lines
+        assert calibration.concentrations == {"Fe": 10.0}
+        assert snapshot.frames["_lines"].columns["active"] is activeColumn
+
+    def test_restore_reshaped_frame(self):
+        calibration = Calibration(1, "calib", "Fe", {"Fe": 10.0})
+        snapshot = calibration.snapshot()
+        calibration._lines = calibration.lines.iloc[:10]
+        assert snapshot.changes(calibration) == {"_lines": None}
+        snapshot.restore(calibration)
+        assert snapshot.matches(calibration)
@@ -0,0 +1,22 @@
+import numpy as np
+
+from src.views.base.spectrumoverlay import SpectrumOverlayItem
+
+
+class TestSpectrumOverlayItem:
+    def test_groups_curves_by_color(self, qtbot):
+        overlay = SpectrumOverlayItem()
+        overlay.setCurve("a", np.array([1, 4, 2]), "#FF0000")
+        overlay.setCurve("b", np.array([0, 3, 8]), "#FF0000")
+        overlay.setCurve("c", np.array([5, 5, 5]), "#0000FF")
+        groups = overlay._stackedGroups()
+        assert [pyramid.ys.shape for _, pyramid in groups] == [(2, 3), (1, 3)]
+        assert overlay.yRange() == (0, 8)
+        overlay.setCurveColor("c", "#FF0000")
+        overlay.removeCurve("b")
+        groups = overlay._stackedGroups()
+        assert [pyramid.ys.shape for _, pyramid in groups] == [(2, 3)]
+        assert overlay.yRange() == (1, 5)
+        overlay.clear()
+        assert overlay.yRange() == (0, 0)
+        assert overlay.dataBounds(1) == (None, None)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from src.utils.spectrumring import SpectrumRing
+
+
+@pytest.fixture
+def ring():
+    ring = SpectrumRing(slots=2, slotBytes=256)
+    yield ring
+    ring.close()
+
+
+class TestSpectrumRing:
+    def test_attached_views_share_memory(self, ring):
+        entries = ring.write(
+            1,
+            [
+                {"conditionId": 4, "y": np.arange(16, dtype=float)},
+                {"conditionId": 6, "y": [7] * 8},
+            ],
+        )
+        assert [(e["conditionId"], e["size"]) for e in entries] == [(4, 16), (6, 8)]
+        attached = SpectrumRing.attach(ring.spec)
+        data = attached.read(1, entries)
+        np.testing.assert_array_equal(data[0]["y"], np.arange(16))
+        assert data[1]["y"].tolist() == [7] * 8
+        ring._view(1, entries[1])[0] = 3
+        assert data[1]["y"][0] == 3
+        del data
+        attached.close()
+
+    def test_keeps_dtypes_and_sends_oversized_spectra_inline(self, ring):
+        counts = np.arange(20, dtype=np.int32)
+        large = np.arange(40, dtype=np.int64)
+        entries = ring.write(
+            0,
+            [
+                {"conditionId": 1, "y": counts},
+                {"conditionId": 2, "y": large},
+                {"conditionId": 3, "y": counts[:5]},
+            ],
+        )
+        data = ring.read(0, entries)
+        assert [d["y"].dtype for d in data] == [np.int32, np.int64, np.int32]
+        assert "y" in entries[1] and "y" not in entries[2]
+        np.testing.assert_array_equal(data[1]["y"], large)
+        np.testing.assert_array_equal(data[2]["y"], counts[:5])
+        del data
@@ -0,0 +1,37 @@
+import numpy as np
+
+from src.utils import calculation
+from src.utils.synthetic import (
+    calibrationLines,
+    syntheticAnalyse,
+    syntheticCalibrations,
+)
+
+
+class TestSyntheticAnalyse:
+    def test_peaks(self):
+        analyse = syntheticAnalyse("sample", ["Fe"], [1], np.random.default_rng(0))
+        assert analyse.filename == "sample"
+        y = analyse.data[0].y
+        feKa = int(calculation.getEnergyCalibration().evToChannel(6.40))
+        assert y[feKa - 3 : feKa + 4].max() > 5 * np.median(y)
+
+    def test_seeded(self):
+        first = syntheticAnalyse("sample", rng=np.random.default_rng(1))
+        second = syntheticAnalyse("sample", rng=np.random.default_rng(1))
+        assert first == second
+
+
+class TestSyntheticCalibrations:
+    def test_lines(self):
+        lines = calibrationLines(["Fe", "Pb"])
+        active = lines[lines["active"] == 1].set_index("symbol")
+        assert active.loc["Fe", "radiation_type"] == "Ka"
+        assert active.loc["Pb", "radiation_type"] == "La"
+        assert active["condition_id"].notna().all()
+
+    def test_coefficients(self):
+        calibrations = syntheticCalibrations(["Fe", "Cu"], np.random.default_rng(0))
+        assert [c.element for c in calibrations] == ["Fe", "Cu"]
+        assert calibrations[0].coefficients["Fe"]["Ka"] > 0
+        assert set(calibrations[1].activeIntensities) == {"Fe", "Cu"}
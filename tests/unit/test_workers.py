@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from src.utils import workers
+
+
+def slowJob(seconds: float) -> tuple[float, dict]:
+    time.sleep(seconds)
+    return seconds, {"parse": 0.0, "compute": seconds}
+
+
+def readSlot(slot: int, metadata: dict) -> tuple[float, dict]:
+    analyse = workers.analyseFromSlot(slot, metadata)
+    return float(analyse.data[0].y.sum()), {}
+
+
+def readSpectra(slot: int, metadata: dict) -> tuple[list, dict]:
+    analyse = workers.analyseFromSlot(slot, metadata)
+    return [(d.y.dtype, int(d.y.sum())) for d in analyse.data], {}
+
+
+def failingJob() -> tuple[None, dict]:
+    raise ValueError("broken spectrum")
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestWorkerPool:
+    def test_results_follow_their_submitter(self):
+        async def scenario():
+            pool = workers.WorkerPool(2, queueSize=4, useProcesses=False)
+            await pool.start()
+            results = await asyncio.gather(
+                *(pool.submit(slowJob, s) for s in [0.05, 0.0, 0.02])
+            )
+            stats = pool.stats()
+            await pool.close()
+            return results, stats
+
+        results, stats = run(scenario())
+        assert results == [0.05, 0.0, 0.02]
+        assert stats["completed"] == 3
+        assert stats["timings"]["slowJob"]["compute"]["count"] == 3
+
+    def test_errors_are_routed_back(self):
+        async def scenario():
+            pool = workers.WorkerPool(1, useProcesses=False)
+            await pool.start()
+            try:
+                with pytest.raises(ValueError, match="broken spectrum"):
+                    await pool.submit(failingJob)
+                return pool.stats()
+            finally:
+                await pool.close()
+
+        assert run(scenario())["failed"] == 1
+
+    def test_bounded_queue_holds_submitters(self):
+        async def scenario():
+            pool = workers.WorkerPool(1, queueSize=1, useProcesses=False)
+            await pool.start()
+            first = asyncio.ensure_future(pool.submit(slowJob, 0.1))
+            await asyncio.sleep(0.01)
+            await pool.enqueue(slowJob, 0.0)
+            held = asyncio.ensure_future(pool.enqueue(slowJob, 0.0))
+            await asyncio.sleep(0.02)
+            assert not held.done()
+            assert pool.stats()["queueDepth"] == 1
+            await first
+            await asyncio.wait_for(held, 1)
+            await pool.close()
+
+        run(scenario())
+
+    def test_process_pool(self):
+        async def scenario():
+            pool = workers.WorkerPool(1, queueSize=2)
+            await pool.start()
+            try:
+                future = await pool.enqueueAnalyse(
+                    workers.quantifyAnalyse,
+                    {"method": "DoesNotExist", "data": [{"conditionId": 1, "y": [1]}]},
+                )
+                with pytest.raises(KeyError):
+                    await future
+                return pool.stats()
+            finally:
+                await pool.close()
+
+        assert run(scenario())["freeSlots"] == 3
+
+    def test_analyse_slots_are_recycled(self):
+        async def scenario():
+            pool = workers.WorkerPool(1, queueSize=1, useProcesses=False, slots=1)
+            await pool.start()
+            try:
+                spectra = [np.full(2048, value) for value in range(3)]
+                futures = [
+                    await pool.enqueueAnalyse(
+                        readSlot, {"data": [{"conditionId": 1, "y": y}]}
+                    )
+                    for y in spectra
+                ]
+                return await asyncio.gather(*futures)
+            finally:
+                await pool.close()
+
+        assert run(scenario()) == [0.0, 2048.0, 4096.0]
+
+    def test_spectra_larger_than_a_slot(self):
+        async def scenario():
+            pool = workers.WorkerPool(1, useProcesses=False)
+            await pool.start()
+            try:
+                data = [
+                    {"conditionId": c, "y": np.full(8192, c, dtype=np.int64)}
+                    for c in range(1, 7)
+                ]
+                return await (await pool.enqueueAnalyse(readSpectra, {"data": data}))
+            finally:
+                await pool.close()
+
+        assert run(scenario()) == [(np.int64, 8192 * c) for c in range(1, 7)]